@@ -1,5 +1,5 @@
 import os
-from quart import Quart, render_template, request, jsonify, send_file, Response
+from quart import Quart, render_template, request, jsonify, send_file, Response, make_response
 from dotenv import load_dotenv
 from pathlib import Path
 import json
@@ -10,10 +10,20 @@ from quart_cors import cors
 # Initialize paths for data storage
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / 'data'
-DATA_FILE = DATA_DIR / 'temp_result.json'
 
-from backend.agents.orchestrator import OrchestratorAgent
+from backend.agents.registry import init_registry, get_registry, close_registry
+from backend.agents.writer import GRANT_SECTIONS
 from backend.utils.docx_generator import generate_docx
+from backend.utils.grant_schema import normalize_grant_content
+from backend.utils.job_store import JobStore, STATUS_COMPLETED, STATUS_QUEUED, STATUS_PROCESSING, STATUS_CANCELLED
+from backend.utils.job_events import JobEventBus
+from backend.utils.job_worker import JobWorker
+from backend.utils.cassette import close_cassette
+from backend.utils.llm_cache import get_completion_cache
+from backend.utils.metrics import REGISTRY, timed
+from backend.utils.rate_limiter import PRIORITIES
+from backend.utils.http_client import close_shared_clients
+from backend.agents.cached_connector import get_search_caches
 
 # Load environment variables from .env in the app directory
 dotenv_path = Path(__file__).resolve().parent / '.env'
@@ -26,6 +36,59 @@ app = Quart(__name__,
 app = cors(app, allow_origin="*", allow_headers=["Content-Type"], allow_methods=["GET", "POST", "OPTIONS"])
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'default-secret-key')
 
+# Per-job store for generation status and results
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', '86400'))
+JOB_EVICTION_INTERVAL = int(os.getenv('JOB_EVICTION_INTERVAL', '600'))
+job_store = JobStore(DATA_DIR / 'jobs.db', ttl_seconds=JOB_TTL_SECONDS)
+
+# Progress events published by the workers and streamed to the review page
+event_bus = JobEventBus(job_store)
+
+# Generation jobs run in worker.py processes; this runs one in the app process instead, for development
+EMBEDDED_WORKER = os.getenv('EMBEDDED_WORKER', 'false').lower() == 'true'
+embedded_worker = None
+embedded_worker_task = None
+# Share the Azure OpenAI quota with the worker pool, unless configured
+os.environ.setdefault('AZURE_OPENAI_QUOTA_SHARES',
+                      '1' if EMBEDDED_WORKER else str(int(os.getenv('WORKER_PROCESSES', '2')) + 1))
+
+async def evict_expired_jobs():
+    """Periodically remove jobs whose TTL has elapsed"""
+    while True:
+        try:
+            job_store.evict_expired()
+        except Exception as ev_e:
+            app.logger.error(f"Job eviction error: {ev_e}")
+        await asyncio.sleep(JOB_EVICTION_INTERVAL)
+
+@app.before_serving
+async def start_job_eviction():
+    app.add_background_task(evict_expired_jobs)
+
+@app.before_serving
+async def start_agent_registry():
+    # Build the kernel, plugins and agents once, sharing one pooled Azure OpenAI client
+    global embedded_worker, embedded_worker_task
+    try:
+        registry = await init_registry(warm_up=os.getenv('AZURE_OPENAI_WARMUP', 'true').lower() == 'true')
+    except ValueError as reg_e:
+        app.logger.error(f"Agent registry not initialized: {reg_e}")
+        return
+    if EMBEDDED_WORKER:
+        embedded_worker = JobWorker(job_store, event_bus, registry.orchestrator)
+        embedded_worker_task = asyncio.create_task(embedded_worker.run())
+
+@app.after_serving
+async def close_job_store():
+    if embedded_worker is not None:
+        # Requeue unfinished jobs before the store closes
+        embedded_worker.stop()
+        await embedded_worker_task
+    job_store.close()
+    await close_registry()
+    await close_shared_clients()
+    close_cassette()
+
 # Add after_request to inject CORS headers on every response
 @app.after_request
 async def add_cors_headers(response):
@@ -53,64 +116,207 @@ async def review():
 async def generate_grant():
     """API endpoint to generate grant content"""
     data = await request.get_json()
-    # Remove existing result for fresh polling
-    if DATA_FILE.exists():
-        DATA_FILE.unlink()
     # Extract required information
     nonprofit_website = data.get('nonprofit_website', '')
     grant_url = data.get('grant_url', '')
     nonprofit_name = data.get('nonprofit_name', '')
     nonprofit_mission = data.get('nonprofit_mission', '')
+    # Full generations queue behind interactive calls (section edits) for model capacity
+    priority = data.get('priority', 'batch')
+    if priority not in PRIORITIES:
+        return jsonify({'status': 'error', 'message': f'Unknown priority: {priority}'}), 400
     
-    # Initialize the orchestrator agent to coordinate the process
-    orchestrator = OrchestratorAgent()
+    # Queue the job for a worker; its status and result are tracked independently
+    job_id = job_store.create_job({
+        'nonprofit_website': nonprofit_website,
+        'grant_url': grant_url,
+        'nonprofit_name': nonprofit_name,
+        'nonprofit_mission': nonprofit_mission,
+        'priority': priority
+    }, priority=PRIORITIES[priority])
+    event_bus.publish(job_id, 'queued', {'job_id': job_id})
     
-    # Launch generation process asynchronously
-    async def generate_in_background():
-        try:
-            # Offload synchronous grant generation to a thread to avoid blocking the event loop
-            result = await asyncio.to_thread(
-                orchestrator.generate_grant_content,
-                nonprofit_website,
-                grant_url,
-                nonprofit_name,
-                nonprofit_mission
-            )
-            # Ensure data directory exists
-            DATA_DIR.mkdir(parents=True, exist_ok=True)
-            # Store result in a temporary JSON file
-            with DATA_FILE.open('w', encoding='utf-8') as f:
-                json.dump(result, f)
-        except Exception as bg_e:
-            app.logger.error(f"Background generation error: {bg_e}")
+    return jsonify({
+        'status': STATUS_QUEUED,
+        'job_id': job_id,
+        'message': 'Grant generation queued. Redirecting to review page.'
+    })
+
+@app.route('/api/regenerate-section', methods=['POST'])
+async def regenerate_section():
+    """API endpoint to redraft one section of a generated grant"""
+    data = await request.get_json()
+    job_id = data.get('job_id', '')
+    section = data.get('section', '')
+    instructions = data.get('instructions') or None
+    try:
+        orchestrator = get_registry().orchestrator
+    except RuntimeError as reg_e:
+        app.logger.error(f"Cannot regenerate section: {reg_e}")
+        return jsonify({'status': 'error', 'message': 'Grant generation is not configured on this server.'}), 503
+    if section not in GRANT_SECTIONS:
+        return jsonify({'status': 'error', 'message': f'Unknown section: {section}'}), 400
+    job = job_store.get_status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown or expired job.'}), 404
+    if job['status'] != STATUS_COMPLETED:
+        return jsonify(job), 409
     
-    # Schedule background async task
-    asyncio.create_task(generate_in_background())
+    grant_content = job_store.get_result(job_id)
+    context = job_store.get_context(job_id) or {}
+    try:
+        content = await orchestrator.regenerate_section(section, grant_content, context, instructions)
+    except Exception as regen_e:
+        app.logger.error(f"Error regenerating {section} for job {job_id}: {regen_e}")
+        return jsonify({'status': 'error', 'message': str(regen_e)}), 500
+    # Store the section in its canonical shape, e.g. goals as a list
+    content = normalize_grant_content({section: content})[section]
+    job_store.update_section(job_id, section, content)
+    return jsonify({
+        'status': 'completed',
+        'job_id': job_id,
+        'section': section,
+        'content': content
+    })
+
+@app.route('/api/revise-grant', methods=['POST'])
+async def revise_grant():
+    """API endpoint to apply review findings to the sections of a generated grant they name"""
+    data = await request.get_json()
+    job_id = data.get('job_id', '')
+    try:
+        orchestrator = get_registry().orchestrator
+    except RuntimeError as reg_e:
+        app.logger.error(f"Cannot revise grant: {reg_e}")
+        return jsonify({'status': 'error', 'message': 'Grant generation is not configured on this server.'}), 503
+    job = job_store.get_status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown or expired job.'}), 404
+    if job['status'] != STATUS_COMPLETED:
+        return jsonify(job), 409
     
+    grant_content = job_store.get_result(job_id)
+    context = job_store.get_context(job_id) or {}
+    try:
+        patches = await orchestrator.revise_grant(grant_content, context)
+    except Exception as revise_e:
+        app.logger.error(f"Error revising grant for job {job_id}: {revise_e}")
+        return jsonify({'status': 'error', 'message': str(revise_e)}), 500
+    # Merge each revised section on its own so concurrent edits to other sections are kept
+    patches = {section: content for section, content in normalize_grant_content(patches).items() if section in patches}
+    for section, content in patches.items():
+        job_store.update_section(job_id, section, content)
     return jsonify({
-        'status': 'processing',
-        'message': 'Grant generation started. Redirecting to review page.'
+        'status': 'completed',
+        'job_id': job_id,
+        'patches': patches
     })
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+async def get_job_status(job_id):
+    """Get the status and timestamps of a generation job"""
+    job = job_store.get_status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown or expired job.'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+async def get_job_result(job_id):
+    """Get the result of a completed generation job"""
+    job = job_store.get_status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown or expired job.'}), 404
+    if job['status'] != STATUS_COMPLETED:
+        return jsonify(job), 409
+    return jsonify({
+        'status': 'completed',
+        'job_id': job_id,
+        'data': job_store.get_result(job_id)
+    })
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+async def cancel_job(job_id):
+    """Cancel a queued or running generation job"""
+    status = job_store.request_cancel(job_id)
+    if status is None:
+        return jsonify({'status': 'error', 'message': 'Job is not running.'}), 404
+    if status == STATUS_CANCELLED:
+        event_bus.publish(job_id, 'cancelled', {'job_id': job_id, 'message': 'Cancelled by user'})
+        return jsonify({'status': STATUS_CANCELLED, 'job_id': job_id})
+    # The worker running the job stops it at its next heartbeat
+    return jsonify({'status': 'cancelling', 'job_id': job_id}), 202
+
+def format_sse(event, data):
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+async def stream_job_events(job_id):
+    """Stream progress events and the final result of a job as Server-Sent Events"""
+    job = job_store.get_status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown or expired job.'}), 404
+    
+    async def event_stream():
+        # Jobs that finished before their history was kept (or after it expired) resolve immediately
+        if job['status'] not in (STATUS_QUEUED, STATUS_PROCESSING) and \
+                not await asyncio.to_thread(event_bus.has_history, job_id):
+            if job['status'] == STATUS_COMPLETED:
+                result = await asyncio.to_thread(job_store.get_result, job_id)
+                yield format_sse('completed', {'job_id': job_id, 'data': result})
+            elif job['status'] == STATUS_CANCELLED:
+                yield format_sse('cancelled', {'job_id': job_id, 'message': job['error']})
+            else:
+                yield format_sse('failed', {'job_id': job_id, 'message': job['error']})
+            return
+        async for message in event_bus.subscribe(job_id):
+            if message is None:
+                # Heartbeat comment keeps proxies from closing an idle stream
+                yield b": keep-alive\n\n"
+                continue
+            yield format_sse(message['event'], {**message['data'], 'timestamp': message['timestamp']})
+    
+    response = await make_response(event_stream(), {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.timeout = None
+    return response
+
 @app.route('/api/get-grant-status', methods=['GET'])
 async def get_grant_status():
-    """Check the status of grant generation"""
-    if DATA_FILE.exists():
-        try:
-            with DATA_FILE.open('r', encoding='utf-8') as f:
-                result = json.load(f)
-        except Exception as f_e:
-            app.logger.error(f"Error reading result file: {f_e}")
-            return jsonify({'status': 'error', 'message': 'Could not read result file.'}), 500
+    """Check the status of grant generation for a job"""
+    job_id = request.args.get('job_id', '')
+    job = job_store.get_status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown or expired job.'}), 404
+    if job['status'] == STATUS_COMPLETED:
         return jsonify({
             'status': 'completed',
-            'data': result
-        })
-    else:
-        return jsonify({
-            'status': 'processing',
-            'message': 'Grant generation is still in progress'
+            'job_id': job_id,
+            'data': job_store.get_result(job_id)
         })
+    if job['error']:
+        return jsonify({'status': job['status'], 'job_id': job_id, 'message': job['error']})
+    return jsonify({
+        'status': job['status'],
+        'job_id': job_id,
+        'message': 'Grant generation is still in progress'
+    })
+
+@app.route('/api/cache/stats', methods=['GET'])
+async def get_cache_stats():
+    """Hit/miss counters of the LLM completion and search result caches"""
+    cache = get_completion_cache()
+    search_results, _ = get_search_caches()
+    llm_stats = {'enabled': True, **cache.stats()} if cache is not None else {'enabled': False}
+    return jsonify({'llm': llm_stats, 'search': search_results.stats()})
+
+@app.route('/api/metrics', methods=['GET'])
+async def get_metrics():
+    """Latency, token, cache and job metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/save-grant', methods=['POST'])
 async def save_grant():
@@ -118,8 +324,12 @@ async def save_grant():
     data = await request.get_json()
     content = data.get('content', {})
     
-    # Generate docx file
-    docx_bytes = generate_docx(content)
+    # Generate docx file from content validated against the grant schema
+    try:
+        with timed('docx', 'render'):
+            docx_bytes = generate_docx(content)
+    except ValueError as val_e:
+        return jsonify({'status': 'error', 'message': f'Invalid grant content: {val_e}'}), 400
     
     # Create a BytesIO object to serve the file
     buffer = BytesIO(docx_bytes)
@@ -0,0 +1,44 @@
+import os
+from typing import Optional
+from openai import AsyncAzureOpenAI
+from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+
+# API version used when AZURE_OPENAI_API_VERSION is not set
+DEFAULT_API_VERSION = "2024-06-01"
+
+
+def get_azure_settings():
+    """
+    Read the Azure OpenAI settings from the environment.
+
+    Returns:
+        tuple: (endpoint, api_key, deployment_name, api_version)
+    """
+    azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+    api_version = os.getenv("AZURE_OPENAI_API_VERSION", DEFAULT_API_VERSION)
+    if not all([azure_endpoint, azure_api_key, deployment_name]):
+        raise ValueError("Azure OpenAI credentials not properly configured in .env file")
+    return azure_endpoint, azure_api_key, deployment_name, api_version
+
+
+def create_azure_chat_service(async_client: Optional[AsyncAzureOpenAI] = None) -> AzureChatCompletion:
+    """
+    Create an Azure chat completion service.
+
+    Args:
+        async_client (Optional[AsyncAzureOpenAI]): Shared OpenAI client to send requests through.
+            When omitted the service creates its own client.
+
+    Returns:
+        AzureChatCompletion: The chat completion service
+    """
+    azure_endpoint, azure_api_key, deployment_name, api_version = get_azure_settings()
+    return AzureChatCompletion(
+        deployment_name=deployment_name,
+        endpoint=azure_endpoint,
+        api_key=azure_api_key,
+        api_version=api_version,
+        async_client=async_client
+    )
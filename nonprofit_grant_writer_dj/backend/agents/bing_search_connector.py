@@ -1,25 +1,28 @@
+import os
 import logging
-from httpx import AsyncClient
-from semantic_kernel.connectors.search_engine.connector import ConnectorBase
 from semantic_kernel.exceptions import ServiceInvalidRequestError
+from .cached_connector import CachedSearchConnector
 
 logger = logging.getLogger(__name__)
 
-class BingSearchConnector(ConnectorBase):
+class BingSearchConnector(CachedSearchConnector):
     """A search engine connector that uses the Bing Web Search API for web search."""
 
+    engine = "bing"
+
     def __init__(self, api_key: str):
         if not api_key:
             raise ServiceInvalidRequestError("Bing Search API key is required.")
         self.api_key = api_key
-        self.endpoint = "https://api.bing.microsoft.com/v7.0/search"
+        self.endpoint = os.getenv("BING_SEARCH_ENDPOINT", "https://api.bing.microsoft.com/v7.0/search")
 
     async def search(self, query: str, num_results: int = 3, offset: int = 0) -> list[str]:
         """
         Perform a Bing Web Search API call and return top snippets.
         """
-        if not query:
-            raise ServiceInvalidRequestError("query cannot be empty.")
+        return await super().search(query, num_results, offset)
+
+    async def _search(self, query: str, num_results: int, offset: int) -> list[str]:
         headers = {"Ocp-Apim-Subscription-Key": self.api_key}
         params = {
             "q": query,
@@ -27,17 +30,12 @@ class BingSearchConnector(ConnectorBase):
             "offset": offset,
             "responseFilter": "Webpages"
         }
-        try:
-            async with AsyncClient(timeout=5) as client:
-                response = await client.get(self.endpoint, headers=headers, params=params)
-                response.raise_for_status()
-                data = response.json()
-                snippets: list[str] = []
-                web_pages = data.get("webPages", {}).get("value", [])
-                for item in web_pages[:num_results]:
-                    snippet = item.get("snippet") or item.get("name") or ""
-                    snippets.append(snippet)
-                return snippets
-        except Exception as e:
-            logger.error(f"Bing search failed: {e}")
-            raise ServiceInvalidRequestError("Bing search failed.") from e 
\ No newline at end of file
+        response = await self.client.get(self.endpoint, headers=headers, params=params)
+        response.raise_for_status()
+        data = response.json()
+        snippets: list[str] = []
+        web_pages = data.get("webPages", {}).get("value", [])
+        for item in web_pages[:num_results]:
+            snippet = item.get("snippet") or item.get("name") or ""
+            snippets.append(snippet)
+        return snippets
@@ -0,0 +1,120 @@
+import os
+import time
+import json
+import logging
+from abc import abstractmethod
+from typing import List, Optional
+
+import httpx
+from semantic_kernel.connectors.search_engine.connector import ConnectorBase
+from semantic_kernel.exceptions import ServiceInvalidRequestError
+
+from ..utils.cassette import get_cassette
+from ..utils.http_client import get_shared_client
+from ..utils.metrics import REGISTRY, timed
+from ..utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE = REGISTRY.counter("grant_search_cache_total", "Search calls served from the result cache or the engine")
+
+_result_cache: Optional[TTLCache] = None
+_failure_cache: Optional[TTLCache] = None
+
+
+def get_search_caches():
+    """
+    Get the process-wide search result and failure caches.
+
+    Returns:
+        tuple: (result cache, failure cache)
+    """
+    global _result_cache, _failure_cache
+    if _result_cache is None:
+        _result_cache = TTLCache(
+            maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+        )
+        _failure_cache = TTLCache(maxsize=256, ttl=float(os.getenv("SEARCH_NEGATIVE_TTL", "30")))
+    return _result_cache, _failure_cache
+
+
+def is_engine_failure(error: BaseException) -> bool:
+    """Check whether a search failed because the engine is unreachable or failing, not because of the query."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return False
+
+
+class CachedSearchConnector(ConnectorBase):
+    """
+    Base class for search connectors that share one pooled HTTP client and cache results.
+    Results are cached by (engine, query, num_results, offset). Failures are remembered for
+    SEARCH_NEGATIVE_TTL seconds: connection errors, throttling and 5xx responses skip the
+    whole engine, while any other failure only skips the query that caused it.
+    """
+
+    # Engine name used in cache keys and log messages
+    engine = "search"
+
+    @property
+    def client(self):
+        """The shared, pooled HTTP client for search requests."""
+        return get_shared_client("SEARCH", timeout=5.0)
+
+    async def search(self, query: str, num_results: int = 1, offset: int = 0) -> List[str]:
+        """
+        Return search snippets, served from the cache when possible.
+        With a cassette configured, searches are recorded to or replayed from it.
+        """
+        if not query:
+            raise ServiceInvalidRequestError("query cannot be empty.")
+        cassette = get_cassette()
+        if cassette is None:
+            return await self._cached_search(query, num_results, offset)
+        key = json.dumps([self.engine, query, num_results, offset], ensure_ascii=False)
+        if cassette.replaying:
+            entry = cassette.lookup("search", key)
+            with timed("search", self.engine):
+                await cassette.wait(entry["seconds"])
+            if entry["response"].get("error"):
+                raise ServiceInvalidRequestError(entry["response"]["error"])
+            return list(entry["response"]["snippets"])
+        start = time.monotonic()
+        try:
+            snippets = await self._cached_search(query, num_results, offset)
+        except ServiceInvalidRequestError as ex:
+            cassette.record("search", key, {"error": str(ex)}, time.monotonic() - start)
+            raise
+        cassette.record("search", key, {"snippets": snippets}, time.monotonic() - start)
+        return snippets
+
+    async def _cached_search(self, query: str, num_results: int, offset: int) -> List[str]:
+        """Return search snippets from the result cache or the engine."""
+        results, failures = get_search_caches()
+        key = (self.engine, query, num_results, offset)
+        cached = results.get(key)
+        if cached is not None:
+            SEARCH_CACHE.inc(engine=self.engine, result="hit")
+            return list(cached)
+        SEARCH_CACHE.inc(engine=self.engine, result="miss")
+        if failures.get(self.engine):
+            raise ServiceInvalidRequestError(f"{self.engine} search is temporarily unavailable.")
+        if failures.get(key):
+            raise ServiceInvalidRequestError(f"{self.engine} search failed for this query.")
+        try:
+            with timed("search", self.engine):
+                snippets = await self._search(query, num_results, offset)
+        except Exception as ex:
+            logger.error(f"{self.engine} search failed: {ex}")
+            failures.set(self.engine if is_engine_failure(ex) else key, True)
+            raise ServiceInvalidRequestError(f"{self.engine} search failed.") from ex
+        results.set(key, tuple(snippets))
+        return snippets
+
+    @abstractmethod
+    async def _search(self, query: str, num_results: int, offset: int) -> List[str]:
+        """Call the search engine."""
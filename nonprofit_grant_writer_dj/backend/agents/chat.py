@@ -0,0 +1,228 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
+from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+
+from ..utils.cassette import Cassette, get_cassette
+from ..utils.llm_cache import get_completion_cache, make_cache_key
+from ..utils.json_stream import StreamingJSONParser, validate_json
+from ..utils.metrics import record_completion, timed
+from ..utils.rate_limiter import backoff_delay, get_scheduler, is_transient_error, retry_after_seconds
+from ..utils.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Characters per delta when a recorded reply is replayed as a stream
+REPLAY_CHUNK_CHARS = 64
+
+
+class ChatResult:
+    """Result of an agent chat completion."""
+
+    def __init__(self, content: str, cached: bool = False, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.content = content
+        self.cached = cached
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+def _usage(usage, history: ChatHistory, content: str):
+    """Token usage reported by the service, estimated locally when the response has none."""
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens is None:
+        prompt_tokens = sum(count_tokens(str(message.content or "")) for message in history.messages)
+    if completion_tokens is None:
+        completion_tokens = count_tokens(content)
+    return prompt_tokens, completion_tokens
+
+
+def _record(cassette: Cassette, key: str, result: ChatResult, seconds: float,
+            first_token_seconds: Optional[float] = None) -> None:
+    """Append a completion to the cassette being recorded."""
+    cassette.record("chat", key, {
+        "content": result.content,
+        "cached": result.cached,
+        "prompt_tokens": result.prompt_tokens,
+        "completion_tokens": result.completion_tokens
+    }, seconds, first_token_seconds=first_token_seconds)
+
+
+async def _replay(agent: ChatCompletionAgent, cassette: Cassette, key: str,
+                  on_delta: Optional[Callable[[str], None]]) -> ChatResult:
+    """Serve a completion from the cassette, streaming it in pieces when on_delta is given."""
+    entry = cassette.lookup("chat", key)
+    response = entry["response"]
+    content = response["content"]
+    first_token_seconds = entry.get("first_token_seconds")
+    with timed("llm", agent.name):
+        if on_delta is None:
+            await cassette.wait(entry["seconds"])
+        else:
+            await cassette.wait(first_token_seconds)
+            pieces = [content[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(content), REPLAY_CHUNK_CHARS)]
+            pause = max(entry["seconds"] - (first_token_seconds or 0), 0) / max(len(pieces), 1)
+            for piece in pieces:
+                on_delta(piece)
+                await cassette.wait(pause)
+    record_completion(agent.name, response["prompt_tokens"], response["completion_tokens"],
+                      cached=response["cached"], first_token_seconds=first_token_seconds)
+    logger.info(f"{agent.name} completion replayed from {cassette.path.name}")
+    return ChatResult(content, response["cached"], response["prompt_tokens"], response["completion_tokens"])
+
+
+async def _call_model(agent: ChatCompletionAgent, history: ChatHistory, execution_settings,
+                      on_delta: Optional[Callable[[str], None]]) -> Tuple[str, Any, Optional[float]]:
+    """Send one request to the agent's service, streaming it when on_delta is given."""
+    first_token_seconds = None
+    start = time.monotonic()
+    with timed("llm", agent.name):
+        if on_delta is None:
+            response = await agent.service.get_chat_message_content(
+                chat_history=history, settings=execution_settings, kernel=agent.kernel
+            )
+            content = str(response.content) if response is not None and response.content else ""
+            usage = (response.metadata or {}).get("usage") if response is not None else None
+        else:
+            parts, usage = [], None
+            async for chunk in agent.service.get_streaming_chat_message_content(
+                chat_history=history, settings=execution_settings, kernel=agent.kernel
+            ):
+                if chunk is None:
+                    continue
+                # Usage, when reported, arrives with the final chunk
+                usage = (chunk.metadata or {}).get("usage") or usage
+                text = str(chunk.content) if chunk.content else ""
+                if text:
+                    if first_token_seconds is None:
+                        first_token_seconds = time.monotonic() - start
+                    parts.append(text)
+                    on_delta(text)
+            content = "".join(parts)
+    return content, usage, first_token_seconds
+
+
+async def complete_chat(agent: ChatCompletionAgent, prompt: str,
+                        on_delta: Optional[Callable[[str], None]] = None, use_cache: bool = True,
+                        **settings) -> ChatResult:
+    """
+    Send a single prompt to an agent and return its reply.
+    Every agent call goes through here, so the completion cache sits in front of all of them,
+    every call's wall time, time to first token and token use is recorded, calls can be
+    recorded to or replayed from a cassette (see get_cassette), and model requests are
+    admitted by the process-wide rate-limit scheduler, which also retries throttled ones.
+
+    Args:
+        agent (ChatCompletionAgent): The agent whose service, instructions and plugins are used
+        prompt (str): The user prompt
+        on_delta (Optional[Callable[[str], None]]): When given, the reply is streamed and this is
+            called with each piece of text as it arrives (once with the whole reply on a cache hit)
+        use_cache (bool): Whether a cached reply may be served; regenerations and revisions pass False
+            so a repeated prompt gets a new reply, which then replaces the cached one
+        **settings: Sampling settings such as temperature or max_tokens
+
+    Returns:
+        ChatResult: The reply content and whether it came from the cache
+    """
+    plugins = sorted(agent.kernel.plugins) if agent.kernel else []
+    deployment = getattr(agent.service, "ai_model_id", "")
+    cache = get_completion_cache()
+    cassette = get_cassette()
+    key = None
+    if cache is not None or cassette is not None:
+        key = make_cache_key(deployment, agent.instructions or "", prompt, {**settings, "plugins": plugins})
+    if cassette is not None and cassette.replaying:
+        return await _replay(agent, cassette, key, on_delta)
+    if cache is not None and use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(f"{agent.name} completion served from cache (0 tokens)")
+            record_completion(agent.name, 0, 0, cached=True)
+            if on_delta is not None:
+                on_delta(cached)
+            result = ChatResult(cached, cached=True)
+            if cassette is not None:
+                _record(cassette, key, result, 0.0)
+            return result
+
+    history = ChatHistory(system_message=agent.instructions)
+    history.add_user_message(prompt)
+    execution_settings = AzureChatPromptExecutionSettings(**settings)
+    if plugins:
+        # Let the model call the agent's search tools
+        execution_settings.function_choice_behavior = FunctionChoiceBehavior.Auto()
+    scheduler = get_scheduler()
+    # Admission estimate: the prompt plus the completion the settings allow for
+    estimate = sum(count_tokens(str(message.content or "")) for message in history.messages) + int(
+        settings.get("max_tokens") or os.getenv("AZURE_OPENAI_EXPECTED_COMPLETION_TOKENS", "1000")
+    )
+    delivered = False
+
+    def forward(text: str) -> None:
+        nonlocal delivered
+        delivered = True
+        on_delta(text)
+
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        await scheduler.acquire(estimate)
+        try:
+            content, usage, first_token_seconds = await _call_model(
+                agent, history, execution_settings, forward if on_delta is not None else None
+            )
+            break
+        except Exception as e:
+            retry_after = retry_after_seconds(e)
+            transient = retry_after is None and is_transient_error(e)
+            # A failed call is sent again unless part of it was already streamed
+            if (retry_after is None and not transient) or delivered or attempt >= scheduler.max_retries:
+                raise
+            if transient:
+                logger.warning(f"{agent.name} completion failed ({e}); retrying")
+                await asyncio.sleep(backoff_delay(attempt))
+            else:
+                # Throttling pauses every caller, not just this one
+                scheduler.throttled(retry_after, attempt)
+            attempt += 1
+    prompt_tokens, completion_tokens = _usage(usage, history, content)
+    scheduler.settle(estimate, prompt_tokens + completion_tokens)
+    record_completion(agent.name, prompt_tokens, completion_tokens, first_token_seconds=first_token_seconds)
+    logger.info(f"{agent.name} completion used {prompt_tokens} prompt + {completion_tokens} completion tokens")
+
+    result = ChatResult(content, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    if cassette is not None:
+        _record(cassette, key, result, time.monotonic() - start, first_token_seconds)
+    if cache is not None and content:
+        cache.set(key, content)
+    return result
+
+
+async def complete_json(agent: ChatCompletionAgent, prompt: str, root: Optional[str] = "{",
+                        schema: Optional[Dict[str, Any]] = None,
+                        on_field: Optional[Callable[[Any, Any], None]] = None, **settings) -> Any:
+    """
+    Send a prompt that asks for JSON and parse the reply in a single pass as it streams in.
+
+    Args:
+        agent (ChatCompletionAgent): The agent to call
+        prompt (str): The user prompt
+        root (Optional[str]): "{" or "[" for the expected top-level value; either when None
+        schema (Optional[Dict[str, Any]]): Required fields and types, see validate_json
+        on_field (Optional[Callable[[Any, Any], None]]): Called with each top-level field as soon as it closes
+        **settings: Sampling settings such as temperature or max_tokens
+
+    Returns:
+        Any: The parsed and validated value
+
+    Raises:
+        JSONParseError: If the reply holds no valid JSON value
+    """
+    parser = StreamingJSONParser(root, on_field=on_field)
+    await complete_chat(agent, prompt, on_delta=parser.feed, **settings)
+    return validate_json(parser.close(), schema)
@@ -1,30 +1,32 @@
 import os
+import asyncio
 import logging
 from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+from .azure_service import create_azure_chat_service
+from .chat import complete_json
+from ..utils.json_stream import JSONParseError
+from ..utils.document_ingest import chunk_blocks, detect_file_type, iter_string_blocks, iter_text_blocks
 
 logger = logging.getLogger(__name__)
 
+# Categories of information extracted from grant documents
+EXTRACTION_CATEGORIES = ("requirements", "eligibility", "funding_priorities", "deadlines", "budget_constraints", "other")
+
 class FileSurferAgent:
     """
     Agent responsible for processing and analyzing files.
     """
     
-    def __init__(self):
-        """Initialize the file surfer agent."""
-        self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        
-        if not all([self.azure_endpoint, self.azure_api_key, self.deployment_name]):
-            raise ValueError("Azure OpenAI credentials not properly configured in .env file")
+    def __init__(self, azure_service=None):
+        """
+        Initialize the file surfer agent.
         
-        # Initialize Azure service
-        self.azure_service = AzureChatCompletion(
-            deployment_name=self.deployment_name,
-            endpoint=self.azure_endpoint,
-            api_key=self.azure_api_key
-        )
+        Args:
+            azure_service (AzureChatCompletion, optional): Shared chat completion service.
+                A dedicated service is created when omitted.
+        """
+        # Use the shared Azure service if provided
+        self.azure_service = azure_service or create_azure_chat_service()
         
         # Create the file surfer agent
         self.agent = ChatCompletionAgent(
@@ -42,6 +44,10 @@ class FileSurferAgent:
             """,
             service=self.azure_service
         )
+        
+        # Chunk size and extraction concurrency for long documents
+        self.chunk_tokens = int(os.getenv("FILE_SURFER_CHUNK_TOKENS", "1500"))
+        self.max_workers = int(os.getenv("FILE_SURFER_MAX_WORKERS", "4"))
     
     async def process_file(self, file_content, file_type):
         """
@@ -54,27 +60,115 @@ class FileSurferAgent:
         Returns:
             dict: Extracted information from the file
         """
-        # This is a placeholder implementation
-        # In a real implementation, you would use libraries to process different file types
-        # and then use the agent to analyze the extracted text
+        return await self._extract(chunk_blocks(iter_string_blocks(file_content), self.chunk_tokens), file_type)
+    
+    async def process_path(self, path, file_type=None):
+        """
+        Stream a PDF, DOCX or text file from disk and extract relevant information.
+        The file is parsed incrementally, so only the chunks being analyzed are held in memory.
         
-        context = f"""
-        I have a {file_type} file with the following content:
+        Args:
+            path (str): Path of the file
+            file_type (str, optional): Type of the file; detected from the extension if omitted
+            
+        Returns:
+            dict: Extracted information from the file
+        """
+        file_type = file_type or detect_file_type(path)
+        return await self._extract(chunk_blocks(iter_text_blocks(path, file_type), self.chunk_tokens), file_type)
+    
+    async def _extract(self, chunks, file_type):
+        """
+        Map-reduce extraction: analyze chunks concurrently with a bounded worker pool,
+        then merge the per-chunk findings into one structured result.
+        
+        Args:
+            chunks (Iterator[str]): Token-bounded chunks, produced lazily
+            file_type (str): Type of the file
+            
+        Returns:
+            dict: Merged extraction result
+        """
+        queue = asyncio.Queue(maxsize=self.max_workers * 2)
+        findings = []
+        done = object()
         
-        {file_content[:1000]}
-        (Content truncated for brevity)
+        async def produce():
+            # Parsing may be CPU-bound (PDF text extraction), so advance the iterator in a thread
+            index = 0
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, done)
+                if chunk is done:
+                    break
+                await queue.put((index, chunk))
+                index += 1
+            for _ in range(self.max_workers):
+                await queue.put(None)
         
-        Please extract the key information from this file that would be relevant for a grant application.
-        Focus on identifying:
+        async def work():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, chunk = item
+                findings.append((index, await self._extract_chunk(chunk, file_type)))
         
-        1. Any specific requirements or guidelines
-        2. Eligibility criteria
-        3. Funding priorities
-        4. Application deadlines
-        5. Budget constraints or requirements
+        tasks = [asyncio.create_task(produce()), *(asyncio.create_task(work()) for _ in range(self.max_workers))]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A parsing error or failed model call stops the whole extraction, so nothing is
+            # left blocked on the queue
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        findings.sort(key=lambda finding: finding[0])
+        return {
+            "file_type": file_type,
+            "chunks_processed": len(findings),
+            "extracted_info": merge_findings(finding for _, finding in findings)
+        }
+    
+    async def _extract_chunk(self, chunk, file_type):
+        """Extract grant requirements from a single chunk."""
+        context = f"""
+        The following is an excerpt from a {file_type} file related to a grant application:
         
-        Format your response as a structured summary.
+        {chunk}
+        
+        Extract the key information from this excerpt that would be relevant for a grant application.
+        Only include information that is stated in the excerpt. Format your response as a JSON object
+        with the following keys, each holding a list of short strings (use an empty list if none apply):
+        "requirements", "eligibility", "funding_priorities", "deadlines", "budget_constraints", "other".
         """
         
-        result = await self.agent.complete_chat_async(context)
-        return {"file_type": file_type, "extracted_info": result.content} 
\ No newline at end of file
+        try:
+            return await complete_json(self.agent, context)
+        except JSONParseError as e:
+            logger.error(f"Error parsing file extraction: {e}")
+            return {"other": [e.text.strip()]} if e.text.strip() else {}
+
+
+def merge_findings(findings):
+    """
+    Merge per-chunk extraction results, de-duplicating entries within each category.
+    
+    Args:
+        findings (Iterable[dict]): Per-chunk results
+        
+    Returns:
+        dict: One list per category, in document order
+    """
+    merged = {category: [] for category in EXTRACTION_CATEGORIES}
+    seen = {category: set() for category in EXTRACTION_CATEGORIES}
+    for finding in findings:
+        for category, items in finding.items():
+            category = category if category in merged else "other"
+            for item in items if isinstance(items, list) else [items]:
+                text = str(item).strip()
+                key = " ".join(text.lower().split())
+                if text and key not in seen[category]:
+                    seen[category].add(key)
+                    merged[category].append(text)
+    return merged
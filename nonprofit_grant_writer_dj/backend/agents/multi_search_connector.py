@@ -0,0 +1,104 @@
+import os
+import re
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from semantic_kernel.connectors.search_engine.connector import ConnectorBase
+from semantic_kernel.exceptions import ServiceInvalidRequestError
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal rank fusion constant; higher values flatten the rank weighting
+RRF_K = 60
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    """Word shingles of a snippet, used for near-duplicate detection."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _similarity(a: set, b: set) -> float:
+    """Jaccard similarity of two shingle sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MultiEngineSearchConnector(ConnectorBase):
+    """
+    A search engine connector that queries several engines concurrently and merges their results.
+    Each engine has its own deadline, near-duplicate snippets are collapsed, results are ranked
+    with reciprocal rank fusion, and the search returns as soon as enough results have arrived.
+    """
+
+    def __init__(self, connectors: Dict[str, ConnectorBase], deadline: Optional[float] = None,
+                 duplicate_threshold: float = 0.8):
+        """
+        Initialize the composite connector.
+
+        Args:
+            connectors (Dict[str, ConnectorBase]): Engine connectors by engine name
+            deadline (Optional[float]): Seconds to wait for any one engine (default SEARCH_ENGINE_DEADLINE)
+            duplicate_threshold (float): Shingle similarity at which two snippets count as duplicates
+        """
+        if not connectors:
+            raise ServiceInvalidRequestError("At least one search connector is required.")
+        self.connectors = connectors
+        self.deadline = deadline if deadline is not None else float(os.getenv("SEARCH_ENGINE_DEADLINE", "3"))
+        self.duplicate_threshold = duplicate_threshold
+
+    async def search(self, query: str, num_results: int = 3, offset: int = 0) -> list[str]:
+        """
+        Search all engines concurrently and return merged, de-duplicated snippets.
+        """
+        if not query:
+            raise ServiceInvalidRequestError("query cannot be empty.")
+
+        async def run_engine(name, connector):
+            return name, await asyncio.wait_for(connector.search(query, num_results, offset), self.deadline)
+
+        pending = {asyncio.create_task(run_engine(name, c)) for name, c in self.connectors.items()}
+        merged: List[dict] = []
+        errors = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        engine, snippets = task.result()
+                    except Exception as ex:
+                        errors.append(ex)
+                        logger.warning(f"Search engine failed or timed out for {query!r}: {ex!r}")
+                        continue
+                    self._merge(merged, snippets)
+                # Hedge: stop waiting for slower engines once there are enough results
+                if len(merged) >= num_results:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if not merged and errors:
+            raise ServiceInvalidRequestError("All search engines failed.") from errors[0]
+        merged.sort(key=lambda entry: entry["score"], reverse=True)
+        return [entry["text"] for entry in merged[:num_results]]
+
+    def _merge(self, merged: List[dict], snippets: List[str]) -> None:
+        """Fold one engine's ranked snippets into the merged list, boosting duplicates."""
+        for rank, text in enumerate(snippets):
+            if not text:
+                continue
+            score = 1.0 / (RRF_K + rank + 1)
+            shingles = _shingles(text)
+            for entry in merged:
+                if _similarity(shingles, entry["shingles"]) >= self.duplicate_threshold:
+                    # Agreement between engines raises the rank; keep the longer snippet
+                    entry["score"] += score
+                    if len(text) > len(entry["text"]):
+                        entry["text"] = text
+                    break
+            else:
+                merged.append({"text": text, "shingles": shingles, "score": score})
@@ -1,7 +1,12 @@
-import os
 import logging
 from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+from .azure_service import create_azure_chat_service
+from .chat import complete_chat, complete_json
+from .revision import (
+    REVISION_MODE_PATCH, apply_patches, build_patches, group_by_section, parse_section_output, revision_mode
+)
+from ..utils.json_stream import JSONParseError
+from ..utils.prompt_budget import PromptBudgetError, PromptBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -11,21 +16,16 @@ class NonProfitGroundingAgent:
     the nonprofit's mission, values, and goals.
     """
     
-    def __init__(self):
-        """Initialize the nonprofit grounding agent."""
-        self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        
-        if not all([self.azure_endpoint, self.azure_api_key, self.deployment_name]):
-            raise ValueError("Azure OpenAI credentials not properly configured in .env file")
-        
-        # Initialize Azure service
-        self.azure_service = AzureChatCompletion(
-            deployment_name=self.deployment_name,
-            endpoint=self.azure_endpoint,
-            api_key=self.azure_api_key
-        )
+    def __init__(self, azure_service=None):
+        """
+        Initialize the nonprofit grounding agent.
+        
+        Args:
+            azure_service (AzureChatCompletion, optional): Shared chat completion service.
+                A dedicated service is created when omitted.
+        """
+        # Use the shared Azure service if provided
+        self.azure_service = azure_service or create_azure_chat_service()
         
         # Create the nonprofit grounding agent
         self.agent = ChatCompletionAgent(
@@ -49,6 +49,7 @@ class NonProfitGroundingAgent:
             """,
             service=self.azure_service
         )
+        self.prompt_builder = PromptBuilder(self.agent.name)
     
     async def verify_alignment(self, content, nonprofit_info):
         """
@@ -61,7 +62,7 @@ class NonProfitGroundingAgent:
         Returns:
             dict: Verification results with any issues flagged
         """
-        context = f"""
+        context = self.prompt_builder.build("""
         Review the following grant application content and verify that it accurately aligns with 
         the nonprofit organization's mission, values, and capabilities:
         
@@ -80,64 +81,150 @@ class NonProfitGroundingAgent:
         
         If you identify any issues, please flag them and suggest specific revisions.
         Format your response as a JSON object with the following structure:
-        {
+        {{
             "aligned": true/false,
             "issues": [
-                {
+                {{
                     "section": "section_name",
                     "issue": "description of the issue",
                     "suggestion": "suggested revision"
-                }
+                }}
             ],
             "overall_assessment": "summary of your assessment"
-        }
-        """
-        
-        result = await self.agent.complete_chat_async(context)
+        }}
+        """, priorities={"content": 2}, content=content, nonprofit_info=nonprofit_info)
         
-        # Attempt to parse the response into a JSON structure
         try:
-            import json
-            
-            # Try to extract just the JSON part if there's surrounding text
-            content = result.content
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = content[json_start:json_end]
-                assessment = json.loads(json_str)
-                return assessment
-            else:
-                # If no JSON found, return a default structure
-                return {
-                    "aligned": False,
-                    "issues": [
-                        {
-                            "section": "general",
-                            "issue": "Could not parse assessment results",
-                            "suggestion": "Please review the content manually"
-                        }
-                    ],
-                    "overall_assessment": "Assessment parsing failed. Raw response: " + content[:100] + "..."
-                }
-        except Exception as e:
+            return await complete_json(self.agent, context, schema={"aligned": bool})
+        except JSONParseError as e:
             logger.error(f"Error parsing alignment assessment: {e}")
             return {
                 "aligned": False,
                 "issues": [
                     {
                         "section": "general",
-                        "issue": f"Error: {str(e)}",
+                        "issue": "Could not parse assessment results",
                         "suggestion": "Please review the content manually"
                     }
                 ],
-                "overall_assessment": "Assessment failed due to an error"
+                "overall_assessment": "Assessment parsing failed. Raw response: " + e.text[:100] + "..."
+            }
+    
+    async def verify_section_alignment(self, section, content, nonprofit_info):
+        """
+        Verify that a single grant section aligns with the nonprofit's mission and capabilities.
+        
+        Args:
+            section (str): Section key, e.g. "project_description"
+            content (str | list): The section content
+            nonprofit_info (dict): Information about the nonprofit
+            
+        Returns:
+            dict: Verification results with an alignment_score from 0-100 and any issues flagged
+        """
+        context = self.prompt_builder.build("""
+        Review the "{section}" section of a grant application and verify that it accurately aligns
+        with the nonprofit organization's mission, values, capabilities and target population:
+        
+        Nonprofit Information:
+        {nonprofit_info}
+        
+        Section Content:
+        {content}
+        
+        Format your response as a JSON object with the following structure:
+        {{
+            "aligned": true/false,
+            "alignment_score": 0-100,
+            "issues": [
+                {{
+                    "issue": "description of the issue",
+                    "suggestion": "suggested revision"
+                }}
+            ]
+        }}
+        """, priorities={"section": 10, "nonprofit_info": 2}, section=section, content=content,
+            nonprofit_info=nonprofit_info)
+        
+        try:
+            return await complete_json(
+                self.agent, context, schema={"aligned": bool, "alignment_score": (int, float)}
+            )
+        except JSONParseError as e:
+            logger.error(f"Error parsing alignment assessment of {section}: {e}")
+            return {
+                "aligned": False,
+                "alignment_score": 0,
+                "issues": [
+                    {
+                        "issue": "Could not parse assessment results",
+                        "suggestion": "Please review the section manually"
+                    }
+                ]
             }
     
+    async def revise_section(self, section, section_content, issues, nonprofit_info):
+        """
+        Revise a single grant section to resolve alignment issues.
+        
+        Args:
+            section (str): Section key, e.g. "project_description"
+            section_content (str | list): The current section content
+            issues (list): Alignment issues for this section
+            nonprofit_info (dict): Information about the nonprofit
+            
+        Returns:
+            str | list: The revised section content
+            
+        Raises:
+            PromptBudgetError: If the section content does not fit the prompt budget
+        """
+        context = self.prompt_builder.build("""
+        Revise the "{section}" section of a grant application so it accurately reflects the nonprofit
+        organization's mission, values, and capabilities, resolving these alignment issues:
+        {issues}
+        
+        Nonprofit Information:
+        {nonprofit_info}
+        
+        Current Section Content:
+        {section_content}
+        
+        Change only what the issues call for. Output only the revised section content,
+        without the section heading{budget_note}.
+        """, priorities={"section": 10, "budget_note": 10, "section_content": 3, "issues": 2},
+            required=("section_content",), section=section, issues=issues, nonprofit_info=nonprofit_info,
+            section_content=section_content,
+            budget_note=", as a JSON array of budget items" if section == "budget" else "")
+        
+        # Asking for the same revision again should produce a new one, not the cached reply
+        result = await complete_chat(self.agent, context, use_cache=False)
+        return parse_section_output(section, result.content)
+    
+    async def revise_sections(self, content, alignment_issues, nonprofit_info):
+        """
+        Revise only the sections named in alignment issues, in parallel.
+        
+        Args:
+            content (dict): The original grant content
+            alignment_issues (dict | list): Alignment verification results, or their list of issues
+            nonprofit_info (dict): Information about the nonprofit
+            
+        Returns:
+            dict: New content of each revised section
+        """
+        issues = alignment_issues.get("issues", []) if isinstance(alignment_issues, dict) else alignment_issues
+        
+        async def revise(section, section_content, section_issues):
+            return await self.revise_section(section, section_content, section_issues, nonprofit_info)
+        
+        return await build_patches(content, group_by_section(issues), revise)
+    
     async def revise_content(self, content, alignment_issues, nonprofit_info):
         """
         Revise grant content to better align with the nonprofit's mission and values.
+        In patch mode (REVISION_MODE=patch, the default) only the sections named in the
+        issues are rewritten and merged into the content.
         
         Args:
             content (dict): The original grant content
@@ -147,7 +234,11 @@ class NonProfitGroundingAgent:
         Returns:
             dict: Revised grant content
         """
-        context = f"""
+        if revision_mode() == REVISION_MODE_PATCH:
+            return apply_patches(content, await self.revise_sections(content, alignment_issues, nonprofit_info))
+        
+        try:
+            context = self.prompt_builder.build("""
         Revise the following grant application content to better align with the nonprofit organization's 
         mission, values, and capabilities. Address the identified alignment issues:
         
@@ -162,27 +253,15 @@ class NonProfitGroundingAgent:
         
         Please revise the content to address these issues while maintaining the overall structure.
         Return the complete revised content as a JSON object with the same structure as the original content.
-        """
-        
-        result = await self.agent.complete_chat_async(context)
+            """, priorities={"content": 3, "alignment_issues": 2},
+                required=("content",), nonprofit_info=nonprofit_info, content=content, alignment_issues=alignment_issues)
+        except PromptBudgetError as e:
+            # The whole grant does not fit, so revise it section by section instead
+            logger.warning(f"{e}; revising sections individually")
+            return apply_patches(content, await self.revise_sections(content, alignment_issues, nonprofit_info))
         
-        # Attempt to parse the response into a JSON structure
         try:
-            import json
-            
-            # Try to extract just the JSON part if there's surrounding text
-            content = result.content
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = content[json_start:json_end]
-                revised_content = json.loads(json_str)
-                return revised_content
-            else:
-                # If no JSON found, return the original content with an error
-                logger.error("Could not parse revised content")
-                return {**content, "error": "Revision failed - could not parse response"}
-        except Exception as e:
+            return await complete_json(self.agent, context, use_cache=False)
+        except JSONParseError as e:
             logger.error(f"Error parsing revised content: {e}")
-            return {**content, "error": f"Revision failed: {str(e)}"} 
\ No newline at end of file
+            return {**content, "error": f"Revision failed: {str(e)}"}
@@ -1,67 +1,85 @@
 import os
 import logging
-import asyncio
-from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
 from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
 from semantic_kernel import Kernel
 from semantic_kernel.planners.function_calling_stepwise_planner import FunctionCallingStepwisePlanner
+from semantic_kernel.filters import FilterTypes, FunctionInvocationContext
+from pydantic import ValidationError
 
+from .azure_service import create_azure_chat_service, get_azure_settings
 from .researcher import ResearcherAgent
-from .writer import WriterAgent
+from .writer import WriterAgent, GRANT_SECTIONS
 from .nonprofit_grounding import NonProfitGroundingAgent
 from .quality_checker import QualityCheckingAgent
 from .scraper import ScraperAgent
 from .web_surfer import WebSurferAgent
 from .file_surfer import FileSurferAgent
+from .pipeline import GrantPipeline
+from .revision import SectionReviser
+from .research_index import ResearchIndex
 from .duckduckgo_connector import DuckDuckGoConnector
 from .bing_search_connector import BingSearchConnector
+from .multi_search_connector import MultiEngineSearchConnector
 from semantic_kernel.core_plugins.web_search_engine_plugin import WebSearchEnginePlugin
+from ..utils.job_events import report_progress
+from ..utils.metrics import timed
+from ..utils.grant_schema import normalize_grant_content
+from ..utils.json_stream import JSONParseError, parse_json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Orchestration modes, selected with GRANT_ORCHESTRATION_MODE
+MODE_PLANNER = "planner"
+MODE_DAG = "dag"
+
 class OrchestratorAgent:
     """
     Orchestrator agent that coordinates all other agents to generate grant content.
     """
     
-    def __init__(self):
-        """Initialize the orchestrator agent."""
-        self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        
-        if not all([self.azure_endpoint, self.azure_api_key, self.deployment_name]):
-            raise ValueError("Azure OpenAI credentials not properly configured in .env file")
-        
-        # Initialize Azure service
-        self.azure_service = AzureChatCompletion(
-            deployment_name=self.deployment_name,
-            endpoint=self.azure_endpoint,
-            api_key=self.azure_api_key
-        )
+    def __init__(self, azure_service=None, planner_service=None):
+        """
+        Initialize the orchestrator agent.
+        
+        Args:
+            azure_service (AzureChatCompletion, optional): Chat completion service shared with
+                every sub-agent. A dedicated service is created when omitted.
+            planner_service (AzureChatCompletion, optional): Service for the planner's own steps and
+                for embeddings, which do not go through the rate-limit scheduler; its client should
+                retry throttled calls. Defaults to azure_service.
+        """
+        self.azure_endpoint, self.azure_api_key, self.deployment_name, _ = get_azure_settings()
+        
+        # Initialize Azure service, shared by all sub-agents
+        self.azure_service = azure_service or create_azure_chat_service()
+        self.planner_service = planner_service or self.azure_service
         
         # Setup Kernel for orchestration
         self.kernel = Kernel()
-        self.kernel.add_service(self.azure_service, self.deployment_name)
+        self.kernel.add_service(self.planner_service, self.deployment_name)
 
-        # Initialize search connectors as tools
-        duck_plugin = WebSearchEnginePlugin(DuckDuckGoConnector())
+        # Initialize search connectors as tools; with several engines configured, a single
+        # plugin fans each query out to all of them concurrently
+        duck_connector = DuckDuckGoConnector()
         bing_key = os.getenv("BING_SEARCH_API_KEY")
         if bing_key=="1234":
-            bing_plugin = WebSearchEnginePlugin(BingSearchConnector(bing_key))
-            self.search_plugins = [duck_plugin, bing_plugin]
+            search_connector = MultiEngineSearchConnector({
+                "duckduckgo": duck_connector,
+                "bing": BingSearchConnector(bing_key)
+            })
         else:
-            self.search_plugins = [duck_plugin]
+            search_connector = duck_connector
+        self.search_plugins = [WebSearchEnginePlugin(search_connector)]
 
         # Initialize all other agents, passing search tools
-        self.researcher_agent = ResearcherAgent(search_plugins=self.search_plugins)
-        self.writer_agent = WriterAgent()
-        self.nonprofit_grounding_agent = NonProfitGroundingAgent()
-        self.quality_checking_agent = QualityCheckingAgent()
-        self.scraper_agent = ScraperAgent()
-        self.web_surfer_agent = WebSurferAgent(search_plugins=self.search_plugins)
-        self.file_surfer_agent = FileSurferAgent()
+        self.researcher_agent = ResearcherAgent(search_plugins=self.search_plugins, azure_service=self.azure_service)
+        self.writer_agent = WriterAgent(azure_service=self.azure_service)
+        self.nonprofit_grounding_agent = NonProfitGroundingAgent(azure_service=self.azure_service)
+        self.quality_checking_agent = QualityCheckingAgent(azure_service=self.azure_service)
+        self.scraper_agent = ScraperAgent(azure_service=self.azure_service)
+        self.web_surfer_agent = WebSurferAgent(search_plugins=self.search_plugins, azure_service=self.azure_service)
+        self.file_surfer_agent = FileSurferAgent(azure_service=self.azure_service)
 
         # Register each agent as a plugin so the planner can invoke their functions
         self.kernel.add_plugin(self.researcher_agent.agent, "ResearcherAgent")
@@ -71,6 +89,29 @@ class OrchestratorAgent:
         self.kernel.add_plugin(self.scraper_agent.agent, "ScraperAgent")
         self.kernel.add_plugin(self.web_surfer_agent.agent, "WebSurferAgent")
         self.kernel.add_plugin(self.file_surfer_agent.agent, "FileSurferAgent")
+
+        # Retrieval-augmented drafting when an embedding deployment is configured
+        embedding_deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+        self.research_index = (
+            ResearchIndex(self.planner_service.client, embedding_deployment) if embedding_deployment else None
+        )
+
+        # Deterministic stage graph used in DAG mode
+        self.pipeline = GrantPipeline(
+            self.researcher_agent,
+            self.writer_agent,
+            self.quality_checking_agent,
+            self.nonprofit_grounding_agent,
+            self.scraper_agent,
+            self.research_index
+        )
+        self.reviser = SectionReviser(self.quality_checking_agent, self.nonprofit_grounding_agent)
+        self.mode = os.getenv("GRANT_ORCHESTRATION_MODE", MODE_PLANNER).lower()
+        if self.mode not in (MODE_PLANNER, MODE_DAG):
+            raise ValueError(f"Unknown GRANT_ORCHESTRATION_MODE: {self.mode}")
+
+        # Report each agent function the planner calls as a progress event
+        self.kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, self._report_agent_step)
         
         # Create orchestrator agent
         self.orchestrator = ChatCompletionAgent(
@@ -88,7 +129,15 @@ class OrchestratorAgent:
             """
         )
     
-    def generate_grant_content(self, nonprofit_website, grant_url, nonprofit_name, nonprofit_mission):
+    async def _report_agent_step(self, context: FunctionInvocationContext, next):
+        """Kernel filter that reports and times every agent function call."""
+        step = {"agent": context.function.plugin_name, "function": context.function.name}
+        report_progress("agent_started", **step)
+        with timed("planner_step", f"{step['agent']}.{step['function']}"):
+            await next(context)
+        report_progress("agent_finished", **step)
+
+    async def generate_grant_content(self, nonprofit_website, grant_url, nonprofit_name, nonprofit_mission, context=None):
         """
         Generate complete grant content based on the provided information.
         
@@ -97,13 +146,117 @@ class OrchestratorAgent:
             grant_url (str): URL of the grant being applied for
             nonprofit_name (str): Name of the nonprofit organization
             nonprofit_mission (str): Mission statement of the nonprofit
+            context (dict, optional): Receives the research context the sections were drafted from,
+                so single sections can be regenerated later without repeating the research
             
         Returns:
             dict: Dictionary containing all sections of the grant
         """
         # Log the start of the process
-        logger.info(f"Starting grant generation for {nonprofit_name}")
+        logger.info(f"Starting grant generation for {nonprofit_name} in {self.mode} mode")
         
+        if self.mode == MODE_DAG:
+            grant_content = await self.pipeline.run(
+                nonprofit_website, grant_url, nonprofit_name, nonprofit_mission, context
+            )
+            grant_content["title"] = f"Grant Application for {nonprofit_name}"
+            grant_content["organization_info"] = {
+                "name": nonprofit_name,
+                "mission": nonprofit_mission,
+                "website": nonprofit_website
+            }
+        else:
+            grant_content = await self._generate_with_planner(
+                nonprofit_website, grant_url, nonprofit_name, nonprofit_mission
+            )
+            # The planner's research is not kept; regeneration grounds on the other sections
+            if context is not None:
+                context["nonprofit_info"] = {
+                    "name": nonprofit_name,
+                    "mission": nonprofit_mission,
+                    "website": nonprofit_website
+                }
+        
+        if not grant_content.get("title"):
+            grant_content["title"] = f"Grant Application for {nonprofit_name}"
+        
+        logger.info(f"Completed grant generation for {nonprofit_name}")
+        # One canonical key set for the API, the review page and the DOCX export
+        try:
+            return normalize_grant_content(grant_content)
+        except ValidationError as e:
+            # Keep the generated content rather than failing the job over its shape
+            logger.error(f"Grant content does not match the schema; returning it unnormalized: {e}")
+            return grant_content
+
+    async def regenerate_section(self, section, grant_content, context, instructions=None, on_delta=None):
+        """
+        Redraft a single section of a generated grant from the job's stored research context.
+        
+        Args:
+            section (str): Section key from GRANT_SECTIONS
+            grant_content (dict): The current grant content; its other sections ground the redraft
+            context (dict): Research context stored when the grant was generated
+            instructions (str, optional): Additional instructions from the user
+            on_delta (callable, optional): Called with each piece of text as the section is streamed
+            
+        Returns:
+            str | list: The new section content
+        """
+        if section not in GRANT_SECTIONS:
+            raise ValueError(f"Unknown grant section: {section}")
+        other_sections = {
+            key: grant_content[key] for key in GRANT_SECTIONS if key != section and grant_content.get(key)
+        }
+        nonprofit_info = context.get("nonprofit_info") or grant_content.get("organization_info") or {}
+        logger.info(f"Regenerating {section} for {nonprofit_info.get('name', 'unknown nonprofit')}")
+        return await self.writer_agent.write_section(
+            section,
+            nonprofit_info,
+            context.get("grant_info"),
+            context.get("research_data"),
+            on_delta=on_delta,
+            other_sections=other_sections,
+            instructions=instructions,
+            # The same prompt must still produce a new draft
+            use_cache=False
+        )
+
+    async def revise_grant(self, grant_content, context):
+        """
+        Apply the stored review findings of a generated grant, revising only the sections they name.
+        
+        Args:
+            grant_content (dict): The current grant content with its quality and alignment reviews
+            context (dict): Research context stored when the grant was generated
+            
+        Returns:
+            dict: New content by section key, for the sections that were revised
+        """
+        quality_review = grant_content.get("quality_review") or {}
+        alignment_review = grant_content.get("alignment_review") or {}
+        nonprofit_info = context.get("nonprofit_info") or grant_content.get("organization_info") or {}
+        logger.info(f"Revising grant for {nonprofit_info.get('name', 'unknown nonprofit')} from its review findings")
+        return await self.reviser.build_patches(
+            grant_content,
+            quality_review.get("improvement_suggestions", []),
+            alignment_review.get("issues", []),
+            nonprofit_info
+        )
+
+    async def _generate_with_planner(self, nonprofit_website, grant_url, nonprofit_name, nonprofit_mission):
+        """
+        Generate grant content by letting the stepwise planner choose which agents to call.
+        
+        Args:
+            nonprofit_website (str): URL of the nonprofit's website
+            grant_url (str): URL of the grant being applied for
+            nonprofit_name (str): Name of the nonprofit organization
+            nonprofit_mission (str): Mission statement of the nonprofit
+            
+        Returns:
+            dict: Dictionary containing all sections of the grant
+        """
         # Create a list of all agents for the orchestration
         agents = [
             self.orchestrator,
@@ -121,81 +274,45 @@ class OrchestratorAgent:
         Generate a comprehensive grant application for {nonprofit_name} (website: {nonprofit_website})
         applying for the grant at {grant_url}. The nonprofit's mission is: "{nonprofit_mission}".
         
-        The grant should include the following sections:
-        - Executive Summary
-        - Problem Statement
-        - Project Description
-        - Goals and Objectives
-        - Implementation Plan
-        - Evaluation and Impact
-        - Budget
-        - Sustainability Plan
-        - Conclusion
-        
-        Format your response as a JSON object with these fields as keys.
+        The grant should include the following sections, using these JSON keys:
+        - "executive_summary": Executive Summary
+        - "problem_statement": Problem Statement
+        - "project_description": Project Description
+        - "goals_objectives": Goals and Objectives, as an array of goal statements
+        - "implementation_plan": Implementation Plan
+        - "evaluation": Evaluation and Impact
+        - "budget": Budget, as an array of objects with "item", "description" and "amount" fields
+        - "sustainability": Sustainability Plan
+        - "conclusion": Conclusion
+        
+        Format your response as a JSON object with these keys.
         Output only the JSON object, with no additional text, commentary, or markdown fences.
         """
         # Orchestrate using function-calling stepwise planner
         planner = FunctionCallingStepwisePlanner(service_id=self.deployment_name)
-        # Use asyncio to run the planner invoke function
-        result_model = asyncio.run(planner.invoke(self.kernel, task))
+        report_progress("planning_started")
+        # Run the planner on the caller's event loop so it shares the pooled client and can be cancelled
+        with timed("planner", "invoke"):
+            result_model = await planner.invoke(self.kernel, task)
         # Extract the final answer from the planner result
         response_text = result_model.final_answer
+        report_progress("planning_finished")
         
         # Log the planner output for debugging
         logger.info(f"Planner final_answer: {response_text!r}")
         if not response_text or not response_text.strip():
             logger.error("Planner returned empty final_answer. Check planner configuration and tool responses.")
         
-        # Extract the first complete JSON object using brace matching
-        text_to_parse = response_text
-        start = text_to_parse.find('{')
-        if start != -1:
-            depth = 0
-            end_idx = -1
-            # Iterate from the first '{' to find matching closing '}'
-            for i in range(start, len(text_to_parse)):
-                char = text_to_parse[i]
-                if char == '{':
-                    depth += 1
-                elif char == '}':
-                    depth -= 1
-                    if depth == 0:
-                        end_idx = i
-                        break
-            # If we found a matching end, slice out the JSON block
-            if end_idx != -1:
-                text_to_parse = text_to_parse[start:end_idx+1]
-            else:
-                # Fallback to everything after first '{'
-                text_to_parse = text_to_parse[start:]
-        
         # Parse the result into a structured format
         try:
-            # Sanitize JSON string before parsing
-            import json, re
-            # Unwrap quotes if the JSON is wrapped in single quotes
-            if text_to_parse.startswith("'") and text_to_parse.endswith("'"):
-                text_to_parse = text_to_parse[1:-1]
-            # Remove literal newlines, tabs, and carriage returns
-            text_to_parse = text_to_parse.replace('\n', ' ').replace('\r', ' ').replace('\t', ' ')
-            # Remove non-breaking space characters
-            text_to_parse = text_to_parse.replace('\xa0', ' ')
-            # Remove other control characters (except legit whitespace)
-            text_to_parse = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f]', '', text_to_parse)
-            # Load planner output JSON, allowing control characters
-            try:
-                grant_content = json.loads(text_to_parse, strict=False)
-            except TypeError:
-                # For Python versions where json.loads doesn't accept strict, fallback to JSONDecoder
-                grant_content = json.JSONDecoder(strict=False).decode(text_to_parse)
+            grant_content = parse_json(response_text, root="{")
             # Include nonprofit info for the UI overview section
             grant_content['organization_info'] = {
                 'name': nonprofit_name,
                 'mission': nonprofit_mission,
                 'website': nonprofit_website
             }
-        except Exception as e:
+        except JSONParseError as e:
             logger.error(f"Error parsing result: {e}")
             grant_content = {
                 "title": f"Grant Application for {nonprofit_name}",
@@ -207,5 +324,4 @@ class OrchestratorAgent:
                 "error": f"Error generating content: {str(e)}"
             }
         
-        logger.info(f"Completed grant generation for {nonprofit_name}")
         return grant_content 
\ No newline at end of file
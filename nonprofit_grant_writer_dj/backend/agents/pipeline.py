@@ -0,0 +1,296 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from .review import SectionReviewer
+from .revision import SectionReviser
+from .writer import GRANT_SECTIONS
+from ..utils.job_events import report_progress
+from ..utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStage:
+    """
+    A named unit of work in a pipeline that runs once all of its dependencies have finished.
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Awaitable[Any]], depends_on: Iterable[str] = ()):
+        """
+        Initialize the stage.
+
+        Args:
+            name (str): Unique stage name
+            func (Callable): Coroutine function called with the results of all finished stages
+            depends_on (Iterable[str]): Names of the stages that must finish first
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+async def _run_stage(stage: PipelineStage, results: Dict[str, Any]) -> Any:
+    with timed("stage", stage.name):
+        return await stage.func(results)
+
+
+async def run_pipeline(stages: List[PipelineStage]) -> Dict[str, Any]:
+    """
+    Run stages as a dependency graph, starting each stage as soon as its dependencies
+    have finished so that independent stages run concurrently.
+
+    Args:
+        stages (List[PipelineStage]): The stages to run
+
+    Returns:
+        Dict[str, Any]: Result of every stage by name
+    """
+    pending = {stage.name: stage for stage in stages}
+    if len(pending) != len(stages):
+        raise ValueError("Pipeline stage names must be unique")
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in pending]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {missing}")
+
+    results: Dict[str, Any] = {}
+    running: Dict[asyncio.Task, str] = {}
+    try:
+        while pending or running:
+            ready = [stage for stage in pending.values() if all(dep in results for dep in stage.depends_on)]
+            for stage in ready:
+                del pending[stage.name]
+                running[asyncio.create_task(_run_stage(stage, results))] = stage.name
+            if not running:
+                raise ValueError(f"Pipeline has a dependency cycle among: {sorted(pending)}")
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # Raises the stage's exception, which cancels the remaining stages below
+                results[running.pop(task)] = task.result()
+    finally:
+        for task in running:
+            task.cancel()
+        # Wait for cancelled stages to finish so none outlives the pipeline
+        await asyncio.gather(*running, return_exceptions=True)
+    return results
+
+
+class SectionDeltaReporter:
+    """
+    Forwards streamed section text as section_delta progress events, coalescing tokens
+    so the event stream carries a few dozen messages per section rather than one per token.
+    """
+
+    def __init__(self, section: str, min_chars: int = None, interval: float = 0.25):
+        """
+        Initialize the reporter.
+
+        Args:
+            section (str): Section key from GRANT_SECTIONS
+            min_chars (int, optional): Buffered characters that trigger an event (default SECTION_DELTA_MIN_CHARS)
+            interval (float): Seconds after which buffered text is sent regardless of size
+        """
+        self.section = section
+        self.min_chars = min_chars or int(os.getenv("SECTION_DELTA_MIN_CHARS", "80"))
+        self.interval = interval
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._last_sent = time.monotonic()
+
+    def __call__(self, text: str) -> None:
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.min_chars or time.monotonic() - self._last_sent >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send any buffered text."""
+        if not self._buffer:
+            return
+        report_progress("section_delta", section=self.section, text="".join(self._buffer))
+        self._buffer, self._buffered = [], 0
+        self._last_sent = time.monotonic()
+
+
+class GrantPipeline:
+    """
+    Deterministic grant generation pipeline: research and scraping, then every section
+    drafted concurrently, each reviewed for quality and alignment as soon as it is drafted.
+    """
+
+    def __init__(self, researcher_agent, writer_agent, quality_checking_agent, nonprofit_grounding_agent,
+                 scraper_agent, research_index=None):
+        """
+        Initialize the pipeline with the agents it coordinates.
+
+        Args:
+            researcher_agent (ResearcherAgent): Agent for grant and nonprofit research
+            writer_agent (WriterAgent): Agent that drafts each section
+            quality_checking_agent (QualityCheckingAgent): Agent that reviews content quality
+            nonprofit_grounding_agent (NonProfitGroundingAgent): Agent that verifies mission alignment
+            scraper_agent (ScraperAgent): Agent that crawls the grant and nonprofit websites
+            research_index (ResearchIndex, optional): When given, research is embedded and each section
+                is drafted from its top-k retrieved excerpts instead of the full research
+        """
+        self.researcher_agent = researcher_agent
+        self.writer_agent = writer_agent
+        self.quality_checking_agent = quality_checking_agent
+        self.nonprofit_grounding_agent = nonprofit_grounding_agent
+        self.scraper_agent = scraper_agent
+        self.research_index = research_index
+        self.reviewer = SectionReviewer(quality_checking_agent, nonprofit_grounding_agent)
+        self.reviser = SectionReviser(quality_checking_agent, nonprofit_grounding_agent)
+
+    def build_stages(self, nonprofit_info: Dict[str, str], grant_url: str,
+                     indexed: Dict[str, Any] = None) -> List[PipelineStage]:
+        """
+        Build the stage graph for one grant.
+
+        Args:
+            nonprofit_info (Dict[str, str]): Name, mission and website of the nonprofit
+            grant_url (str): URL of the grant being applied for
+            indexed (Dict[str, Any], optional): Receives the research collection name, for cleanup
+
+        Returns:
+            List[PipelineStage]: The pipeline stages
+        """
+        async def research_grant(results):
+            report_progress("research_started", topic="grant")
+            grant_info = await self.researcher_agent.research_grant(grant_url)
+            report_progress("research_finished", topic="grant")
+            return grant_info
+
+        async def research_nonprofit(results):
+            report_progress("research_started", topic="nonprofit")
+            research = await self.researcher_agent.research_nonprofit(nonprofit_info["website"], nonprofit_info["name"])
+            report_progress("research_finished", topic="nonprofit")
+            return research
+
+        def scrape(topic, url):
+            async def scrape_site(results):
+                report_progress("scrape_started", topic=topic)
+                scraped = await self.scraper_agent.scrape_website(url)
+                report_progress("scrape_finished", topic=topic, pages=len(scraped["pages"]))
+                return scraped
+            return scrape_site
+
+        async def index_research(results):
+            report_progress("indexing_started")
+            collection_name = await self.research_index.build({
+                "grant_research": results["research_grant"],
+                "grant_website": results["scrape_grant"]["content"],
+                "nonprofit_research": results["research_nonprofit"],
+                "nonprofit_website": results["scrape_nonprofit"]["content"]
+            })
+            if indexed is not None:
+                indexed["collection_name"] = collection_name
+            report_progress("indexing_finished")
+            return collection_name
+
+        async def write(section, results, **kwargs):
+            collection_name = results.get("index_research")
+            if collection_name:
+                # Draft from only the excerpts relevant to this section
+                title, guidance = GRANT_SECTIONS[section]
+                excerpts = await self.research_index.retrieve(collection_name, f"{title}: {guidance}")
+                return await self.writer_agent.write_section(section, nonprofit_info, None, None, excerpts, **kwargs)
+            grant_info, research_data = self.research_context(results)
+            return await self.writer_agent.write_section(section, nonprofit_info, grant_info, research_data, **kwargs)
+
+        def draft(section):
+            async def draft_section(results):
+                # The budget is JSON, so it is only shown once complete
+                on_delta = SectionDeltaReporter(section) if section != "budget" else None
+                content = await write(section, results, on_delta=on_delta)
+                if on_delta is not None:
+                    on_delta.flush()
+                report_progress("section_drafted", section=section, content=content)
+                return content
+            return draft_section
+
+        def review(section):
+            async def revise(section, content, quality, alignment):
+                # Patch the section with the findings of whichever review fell short
+                suggestions = [] if self.reviewer.quality_passes(quality) else (
+                    quality.get("improvement_suggestions") or
+                    [{"issue": weakness} for weakness in quality.get("weaknesses", [])]
+                )
+                issues = [] if self.reviewer.alignment_passes(alignment) else alignment.get("issues", [])
+                return await self.reviser.revise_section(section, content, suggestions, issues, nonprofit_info)
+
+            async def review_section(results):
+                return await self.reviewer.review_section(section, results[f"draft_{section}"], nonprofit_info, revise)
+            return review_section
+
+        research_stages = ("research_grant", "research_nonprofit", "scrape_grant", "scrape_nonprofit")
+        stages = [
+            PipelineStage("research_grant", research_grant),
+            PipelineStage("research_nonprofit", research_nonprofit),
+            PipelineStage("scrape_grant", scrape("grant", grant_url)),
+            PipelineStage("scrape_nonprofit", scrape("nonprofit", nonprofit_info["website"])),
+        ]
+        if self.research_index is not None:
+            stages.append(PipelineStage("index_research", index_research, research_stages))
+            research_stages = ("index_research",) + research_stages
+        return stages + [
+            *[PipelineStage(f"draft_{section}", draft(section), research_stages) for section in GRANT_SECTIONS],
+            *[PipelineStage(f"review_{section}", review(section), (f"draft_{section}",)) for section in GRANT_SECTIONS],
+        ]
+
+    @staticmethod
+    def research_context(results: Dict[str, Any]):
+        """Build the grant information and research data that sections are drafted from."""
+        grant_info = {
+            "research": results["research_grant"],
+            "website_content": results["scrape_grant"]["content"]
+        }
+        research_data = {
+            "nonprofit_research": results["research_nonprofit"],
+            "nonprofit_website_content": results["scrape_nonprofit"]["content"]
+        }
+        return grant_info, research_data
+
+    @staticmethod
+    def collect_sections(results: Dict[str, Any]) -> Dict[str, Any]:
+        """Gather the sections from stage results, keyed by section, preferring reviewed revisions."""
+        sections = {}
+        for section in GRANT_SECTIONS:
+            if f"review_{section}" in results:
+                sections[section] = results[f"review_{section}"]["content"]
+            elif f"draft_{section}" in results:
+                sections[section] = results[f"draft_{section}"]
+        return sections
+
+    async def run(self, nonprofit_website: str, grant_url: str, nonprofit_name: str, nonprofit_mission: str,
+                  context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Generate grant content by running the stage graph.
+
+        Args:
+            nonprofit_website (str): URL of the nonprofit's website
+            grant_url (str): URL of the grant being applied for
+            nonprofit_name (str): Name of the nonprofit organization
+            nonprofit_mission (str): Mission statement of the nonprofit
+            context (Dict[str, Any], optional): Receives the research context, for regenerating sections later
+
+        Returns:
+            Dict[str, Any]: Grant sections plus the aggregated quality and alignment reviews
+        """
+        nonprofit_info = {"name": nonprofit_name, "mission": nonprofit_mission, "website": nonprofit_website}
+        indexed = {}
+        try:
+            results = await run_pipeline(self.build_stages(nonprofit_info, grant_url, indexed))
+        finally:
+            if indexed.get("collection_name"):
+                await self.research_index.drop(indexed["collection_name"])
+        if context is not None:
+            grant_info, research_data = self.research_context(results)
+            context.update(nonprofit_info=nonprofit_info, grant_info=grant_info, research_data=research_data)
+        grant_content = self.collect_sections(results)
+        grant_content["quality_review"], grant_content["alignment_review"] = self.reviewer.aggregate(
+            {section: results[f"review_{section}"] for section in GRANT_SECTIONS}
+        )
+        return grant_content
@@ -1,7 +1,12 @@
-import os
 import logging
 from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+from .azure_service import create_azure_chat_service
+from .chat import complete_chat, complete_json
+from .revision import (
+    REVISION_MODE_PATCH, apply_patches, build_patches, group_by_section, parse_section_output, revision_mode
+)
+from ..utils.json_stream import JSONParseError
+from ..utils.prompt_budget import PromptBudgetError, PromptBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -10,21 +15,16 @@ class QualityCheckingAgent:
     Agent responsible for evaluating and improving the quality of grant content.
     """
     
-    def __init__(self):
-        """Initialize the quality checking agent."""
-        self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        
-        if not all([self.azure_endpoint, self.azure_api_key, self.deployment_name]):
-            raise ValueError("Azure OpenAI credentials not properly configured in .env file")
-        
-        # Initialize Azure service
-        self.azure_service = AzureChatCompletion(
-            deployment_name=self.deployment_name,
-            endpoint=self.azure_endpoint,
-            api_key=self.azure_api_key
-        )
+    def __init__(self, azure_service=None):
+        """
+        Initialize the quality checking agent.
+        
+        Args:
+            azure_service (AzureChatCompletion, optional): Shared chat completion service.
+                A dedicated service is created when omitted.
+        """
+        # Use the shared Azure service if provided
+        self.azure_service = azure_service or create_azure_chat_service()
         
         # Create the quality checking agent
         self.agent = ChatCompletionAgent(
@@ -48,6 +48,7 @@ class QualityCheckingAgent:
             """,
             service=self.azure_service
         )
+        self.prompt_builder = PromptBuilder(self.agent.name)
     
     async def evaluate_content(self, content):
         """
@@ -59,7 +60,7 @@ class QualityCheckingAgent:
         Returns:
             dict: Evaluation results with score and feedback
         """
-        context = f"""
+        context = self.prompt_builder.build("""
         Evaluate the quality of the following grant application content:
         
         {content}
@@ -105,47 +106,125 @@ class QualityCheckingAgent:
             ],
             "summary": "brief summary of evaluation"
         }}
-        """
-        
-        result = await self.agent.complete_chat_async(context)
+        """, content=content)
         
-        # Attempt to parse the response into a JSON structure
         try:
-            import json
-            
-            # Try to extract just the JSON part if there's surrounding text
-            content = result.content
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = content[json_start:json_end]
-                evaluation = json.loads(json_str)
-                return evaluation
-            else:
-                # If no JSON found, return a default structure
-                return {
-                    "overall_score": 0,
-                    "criteria_scores": {},
-                    "strengths": [],
-                    "weaknesses": ["Could not parse evaluation results"],
-                    "improvement_suggestions": [],
-                    "summary": "Evaluation parsing failed. Raw response: " + content[:100] + "..."
-                }
-        except Exception as e:
+            return await complete_json(self.agent, context, schema={"overall_score": (int, float)})
+        except JSONParseError as e:
             logger.error(f"Error parsing quality evaluation: {e}")
             return {
                 "overall_score": 0,
                 "criteria_scores": {},
                 "strengths": [],
-                "weaknesses": [f"Error: {str(e)}"],
+                "weaknesses": ["Could not parse evaluation results"],
                 "improvement_suggestions": [],
-                "summary": "Evaluation failed due to an error"
+                "summary": "Evaluation parsing failed. Raw response: " + e.text[:100] + "..."
+            }
+    
+    async def evaluate_section(self, section, content):
+        """
+        Evaluate the quality of a single grant section.
+        
+        Args:
+            section (str): Section key, e.g. "executive_summary"
+            content (str | list): The section content
+            
+        Returns:
+            dict: Evaluation results with an overall_score from 0-100 and feedback
+        """
+        context = self.prompt_builder.build("""
+        Evaluate the quality of the "{section}" section of a grant application:
+        
+        {content}
+        
+        Score the section from 1-10 on clarity, persuasiveness, organization, grammar, tone,
+        evidence and realism, and give an overall score from 0-100.
+        Format your response as a JSON object with the following structure:
+        {{
+            "overall_score": 0-100,
+            "criteria_scores": {{
+                "clarity": 1-10,
+                "persuasiveness": 1-10,
+                "organization": 1-10,
+                "grammar": 1-10,
+                "tone": 1-10,
+                "evidence": 1-10,
+                "realism": 1-10
+            }},
+            "strengths": ["strength 1"],
+            "weaknesses": ["weakness 1"],
+            "improvement_suggestions": [
+                {{
+                    "issue": "description of the issue",
+                    "suggestion": "specific suggestion for improvement"
+                }}
+            ]
+        }}
+        """, priorities={"section": 10}, section=section, content=content)
+        
+        try:
+            return await complete_json(self.agent, context, schema={"overall_score": (int, float)})
+        except JSONParseError as e:
+            logger.error(f"Error parsing quality evaluation of {section}: {e}")
+            return {
+                "overall_score": 0,
+                "criteria_scores": {},
+                "strengths": [],
+                "weaknesses": ["Could not parse evaluation results"],
+                "improvement_suggestions": []
             }
     
+    async def improve_section(self, section, section_content, suggestions):
+        """
+        Apply improvement suggestions to a single grant section.
+        
+        Args:
+            section (str): Section key, e.g. "evaluation"
+            section_content (str | list): The current section content
+            suggestions (list): Improvement suggestions for this section
+            
+        Returns:
+            str | list: The improved section content
+            
+        Raises:
+            PromptBudgetError: If the section content does not fit the prompt budget
+        """
+        context = self.prompt_builder.build("""
+        Improve the "{section}" section of a grant application by applying these suggestions:
+        {suggestions}
+        
+        Current Section Content:
+        {section_content}
+        
+        Change only what the suggestions call for. Output only the improved section content,
+        without the section heading{budget_note}.
+        """, priorities={"section": 10, "budget_note": 10, "section_content": 3, "suggestions": 2},
+            required=("section_content",), section=section, suggestions=suggestions, section_content=section_content,
+            budget_note=", as a JSON array of budget items" if section == "budget" else "")
+        
+        # Asking for the same revision again should produce a new one, not the cached reply
+        result = await complete_chat(self.agent, context, use_cache=False)
+        return parse_section_output(section, result.content)
+    
+    async def improve_sections(self, content, evaluation):
+        """
+        Improve only the sections named in an evaluation's improvement suggestions, in parallel.
+        
+        Args:
+            content (dict): The original grant content
+            evaluation (dict): Quality evaluation results
+            
+        Returns:
+            dict: New content of each improved section
+        """
+        findings = group_by_section(evaluation.get("improvement_suggestions", []))
+        return await build_patches(content, findings, self.improve_section)
+    
     async def improve_content(self, content, evaluation):
         """
         Improve grant content based on quality evaluation.
+        In patch mode (REVISION_MODE=patch, the default) only the sections named in the
+        suggestions are rewritten and merged into the content.
         
         Args:
             content (dict): The original grant content
@@ -154,7 +233,11 @@ class QualityCheckingAgent:
         Returns:
             dict: Improved grant content
         """
-        context = f"""
+        if revision_mode() == REVISION_MODE_PATCH:
+            return apply_patches(content, await self.improve_sections(content, evaluation))
+        
+        try:
+            context = self.prompt_builder.build("""
         Improve the following grant application content based on the quality evaluation:
         
         Original Content:
@@ -166,27 +249,14 @@ class QualityCheckingAgent:
         Please revise the content to address the identified weaknesses and improvement suggestions.
         Focus particularly on areas that scored below 7 in the criteria scores.
         Return the complete improved content as a JSON object with the same structure as the original content.
-        """
-        
-        result = await self.agent.complete_chat_async(context)
+            """, priorities={"content": 3}, required=("content",), content=content, evaluation=evaluation)
+        except PromptBudgetError as e:
+            # The whole grant does not fit, so improve it section by section instead
+            logger.warning(f"{e}; improving sections individually")
+            return apply_patches(content, await self.improve_sections(content, evaluation))
         
-        # Attempt to parse the response into a JSON structure
         try:
-            import json
-            
-            # Try to extract just the JSON part if there's surrounding text
-            response_content = result.content
-            json_start = response_content.find('{')
-            json_end = response_content.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_content[json_start:json_end]
-                improved_content = json.loads(json_str)
-                return improved_content
-            else:
-                # If no JSON found, return the original content with an error
-                logger.error("Could not parse improved content")
-                return {**content, "error": "Improvement failed - could not parse response"}
-        except Exception as e:
+            return await complete_json(self.agent, context, use_cache=False)
+        except JSONParseError as e:
             logger.error(f"Error parsing improved content: {e}")
-            return {**content, "error": f"Improvement failed: {str(e)}"} 
\ No newline at end of file
+            return {**content, "error": f"Improvement failed: {str(e)}"}
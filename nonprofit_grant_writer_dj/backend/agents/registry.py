@@ -0,0 +1,94 @@
+import os
+import logging
+from typing import Optional
+from openai import AsyncAzureOpenAI
+
+from .azure_service import create_azure_chat_service, get_azure_settings
+from .orchestrator import OrchestratorAgent
+from ..utils.http_client import create_pooled_client
+
+logger = logging.getLogger(__name__)
+
+
+class AgentRegistry:
+    """
+    Process-wide registry that builds the kernel, plugins and agents once.
+    Every agent and the planner share a single connection pool to Azure OpenAI.
+    """
+
+    def __init__(self):
+        """Initialize the shared client, Azure service and agents."""
+        self.azure_endpoint, azure_api_key, self.deployment_name, api_version = get_azure_settings()
+
+        # One keep-alive connection pool for every agent call
+        self.http_client = create_pooled_client("AZURE_OPENAI", timeout=120.0)
+        self.openai_client = AsyncAzureOpenAI(
+            azure_endpoint=self.azure_endpoint,
+            api_key=azure_api_key,
+            api_version=api_version,
+            http_client=self.http_client,
+            # Throttled calls are retried by the rate-limit scheduler, in coordination with every other call
+            max_retries=0
+        )
+        self.azure_service = create_azure_chat_service(async_client=self.openai_client)
+        # Planner steps and embeddings bypass the scheduler, so their client retries throttled calls itself
+        self.planner_service = create_azure_chat_service(async_client=self.openai_client.with_options(
+            max_retries=int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "4"))
+        ))
+
+        # Kernel, plugins and all sub-agents are built here, once per process
+        self.orchestrator = OrchestratorAgent(azure_service=self.azure_service, planner_service=self.planner_service)
+
+    async def warm_up(self) -> None:
+        """Open a pooled connection to the Azure OpenAI endpoint ahead of the first job."""
+        try:
+            # Any response means DNS, TCP and TLS are done and the connection is pooled
+            await self.http_client.get(self.azure_endpoint)
+            logger.info("Azure OpenAI connection pool warmed up")
+        except Exception as e:
+            logger.warning(f"Azure OpenAI warm-up failed: {e}")
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        await self.http_client.aclose()
+
+
+_registry: Optional[AgentRegistry] = None
+
+
+async def init_registry(warm_up: bool = True) -> AgentRegistry:
+    """
+    Build the process-wide registry. Must be called from the serving event loop.
+
+    Args:
+        warm_up (bool): Whether to pre-open a connection to Azure OpenAI
+
+    Returns:
+        AgentRegistry: The registry
+    """
+    global _registry
+    if _registry is None:
+        _registry = AgentRegistry()
+        if warm_up:
+            await _registry.warm_up()
+    return _registry
+
+
+def get_registry() -> AgentRegistry:
+    """
+    Get the process-wide registry.
+
+    Returns:
+        AgentRegistry: The registry built by init_registry
+    """
+    if _registry is None:
+        raise RuntimeError("Agent registry not initialized; call init_registry() at startup")
+    return _registry
+
+
+async def close_registry() -> None:
+    """Release the registry's shared resources."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
@@ -0,0 +1,114 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from ..tools.qdrant_tool import QdrantTool
+from ..utils.document_ingest import chunk_blocks, iter_string_blocks
+from ..utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchIndex:
+    """
+    Chunks and embeds research and scraped material into a vector collection,
+    so each grant section is drafted from only the excerpts relevant to it.
+    """
+
+    def __init__(self, openai_client, embedding_deployment: str, qdrant_tool: QdrantTool = None):
+        """
+        Initialize the research index.
+
+        Args:
+            openai_client (AsyncAzureOpenAI): Client used for embedding requests
+            embedding_deployment (str): Azure OpenAI embedding deployment name
+            qdrant_tool (QdrantTool, optional): Vector store; a new QdrantTool is created if omitted
+        """
+        self.openai_client = openai_client
+        self.embedding_deployment = embedding_deployment
+        self.qdrant_tool = qdrant_tool or QdrantTool()
+        self.chunk_tokens = int(os.getenv("RESEARCH_CHUNK_TOKENS", "400"))
+        self.top_k = int(os.getenv("RESEARCH_TOP_K", "6"))
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in concurrent batches.
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            np.ndarray: float32 matrix with one row per text
+        """
+        async def embed_batch(batch):
+            response = await self.openai_client.embeddings.create(model=self.embedding_deployment, input=batch)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+        batches = [texts[i:i + self.embedding_batch_size] for i in range(0, len(texts), self.embedding_batch_size)]
+        with timed("embedding", self.embedding_deployment):
+            results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return np.asarray([vector for batch in results for vector in batch], dtype=np.float32)
+
+    async def build(self, documents: Dict[str, Any]) -> Optional[str]:
+        """
+        Chunk, embed and store research documents in a new collection.
+
+        Args:
+            documents (Dict[str, Any]): Documents by source name; non-string values are serialized as JSON
+
+        Returns:
+            Optional[str]: Name of the collection holding the chunks, or None if there was nothing to index
+        """
+        chunks, payloads = [], []
+        for source, document in documents.items():
+            if not document:
+                continue
+            text = document if isinstance(document, str) else json.dumps(document, indent=1, default=str)
+            for chunk in chunk_blocks(iter_string_blocks(text), self.chunk_tokens):
+                chunks.append(chunk)
+                payloads.append({"source": source, "text": chunk})
+
+        if not chunks:
+            return None
+        collection_name = f"research_{uuid.uuid4().hex}"
+        vectors = await self.embed(chunks)
+        with timed("vector_store", "create_collection"):
+            await asyncio.to_thread(self.qdrant_tool.create_collection, collection_name, vectors.shape[1])
+        with timed("vector_store", "store"):
+            stored = await asyncio.to_thread(self.qdrant_tool.store_embeddings_bulk, collection_name, vectors, payloads)
+        if not stored:
+            raise RuntimeError(f"Could not store research chunks in {collection_name}")
+        logger.info(f"Indexed {len(chunks)} research chunks in {collection_name}")
+        return collection_name
+
+    async def retrieve(self, collection_name: str, query: str, top_k: int = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve the chunks most relevant to a query.
+
+        Args:
+            collection_name (str): Collection returned by build
+            query (str): What the excerpts should be about
+            top_k (int, optional): Number of chunks (default RESEARCH_TOP_K)
+
+        Returns:
+            List[Dict[str, Any]]: Excerpts with source, text and score, best first
+        """
+        query_vector = (await self.embed([query]))[0]
+        with timed("vector_store", "search"):
+            results = await asyncio.to_thread(
+                self.qdrant_tool.search_similar, collection_name, query_vector.tolist(), top_k or self.top_k
+            )
+        return [
+            {"source": result["metadata"]["source"], "text": result["metadata"]["text"], "score": result["score"]}
+            for result in results
+        ]
+
+    async def drop(self, collection_name: str) -> None:
+        """Delete a collection once the grant has been drafted."""
+        with timed("vector_store", "delete_collection"):
+            await asyncio.to_thread(self.qdrant_tool.delete_collection, collection_name)
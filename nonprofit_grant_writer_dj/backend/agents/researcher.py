@@ -1,7 +1,7 @@
-import os
 import logging
 from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+from .azure_service import create_azure_chat_service
+from .chat import complete_chat
 from semantic_kernel.core_plugins.web_search_engine_plugin import WebSearchEnginePlugin
 
 # Load environment variables from .env file
@@ -17,19 +17,17 @@ class ResearcherAgent:
     Agent responsible for researching grant opportunities and nonprofit information.
     Search plugins are injected by the orchestrator.
     """
-    def __init__(self, search_plugins=None):
-        """Initialize the researcher agent with injected search plugins and Azure service."""
-        # Azure Chat completion service setup
-        azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        if not all([azure_endpoint, azure_api_key, deployment_name]):
-            raise ValueError("Azure OpenAI credentials not properly configured in .env file")
-        self.azure_service = AzureChatCompletion(
-            deployment_name=deployment_name,
-            endpoint=azure_endpoint,
-            api_key=azure_api_key
-        )
+    def __init__(self, search_plugins=None, azure_service=None):
+        """
+        Initialize the researcher agent with injected search plugins and Azure service.
+        
+        Args:
+            search_plugins (list, optional): Search plugins injected by the orchestrator
+            azure_service (AzureChatCompletion, optional): Shared chat completion service.
+                A dedicated service is created when omitted.
+        """
+        # Use the shared Azure service if provided
+        self.azure_service = azure_service or create_azure_chat_service()
 
         # Use injected search plugins or none
         self.search_plugins = search_plugins or []
@@ -69,7 +67,7 @@ class ResearcherAgent:
         # Example of how to use the agent to perform a search
         context = f"I need to research the grant opportunity at {grant_url}. Please provide details about this grant including the following information:\n\n1. Grant provider/organization\n2. Application deadline\n3. Funding amount\n4. Eligibility criteria\n5. Focus areas or priorities\n6. Required application components\n7. Evaluation criteria\n\nPlease format your response as a structured JSON object."
         
-        result = await self.agent.complete_chat_async(context)
+        result = await complete_chat(self.agent, context)
         return result.content
     
     async def research_nonprofit(self, nonprofit_website, nonprofit_name):
@@ -89,5 +87,5 @@ class ResearcherAgent:
         
         context = f"I need to research the nonprofit organization '{nonprofit_name}' with website {nonprofit_website}. Please provide information about this organization including:\n\n1. Mission and vision\n2. Programs and services\n3. Target population served\n4. Impact and achievements\n5. Leadership team\n6. Funding sources\n7. Any recent news or developments\n\nPlease format your response as a structured JSON object."
         
-        result = await self.agent.complete_chat_async(context)
+        result = await complete_chat(self.agent, context)
         return result.content 
\ No newline at end of file
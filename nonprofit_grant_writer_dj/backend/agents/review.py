@@ -0,0 +1,167 @@
+import os
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..utils.job_events import report_progress
+
+logger = logging.getLogger(__name__)
+
+# Revises a section given (section, content, quality, alignment) and returns the new content
+Reviser = Callable[[str, Any, Dict[str, Any], Dict[str, Any]], Awaitable[Any]]
+
+
+def _score(review: Dict[str, Any], key: str) -> float:
+    """Read a numeric score from a review, treating missing or malformed scores as 0."""
+    try:
+        return float(review.get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SectionReviewer:
+    """
+    Reviews grant sections independently, running the quality and alignment checks of a
+    section concurrently. A section that clears both score thresholds is done after one
+    round; one that does not is revised and reviewed again, up to max_rounds.
+    """
+
+    def __init__(self, quality_checking_agent, nonprofit_grounding_agent, quality_threshold: float = None,
+                 alignment_threshold: float = None, max_rounds: int = None):
+        """
+        Initialize the reviewer.
+
+        Args:
+            quality_checking_agent (QualityCheckingAgent): Agent that scores section quality
+            nonprofit_grounding_agent (NonProfitGroundingAgent): Agent that scores mission alignment
+            quality_threshold (float, optional): Minimum overall_score (default REVIEW_QUALITY_THRESHOLD)
+            alignment_threshold (float, optional): Minimum alignment_score (default REVIEW_ALIGNMENT_THRESHOLD)
+            max_rounds (int, optional): Review rounds per section, including the first (default REVIEW_MAX_ROUNDS)
+        """
+        self.quality_checking_agent = quality_checking_agent
+        self.nonprofit_grounding_agent = nonprofit_grounding_agent
+        self.quality_threshold = (
+            quality_threshold if quality_threshold is not None
+            else float(os.getenv("REVIEW_QUALITY_THRESHOLD", "80"))
+        )
+        self.alignment_threshold = (
+            alignment_threshold if alignment_threshold is not None
+            else float(os.getenv("REVIEW_ALIGNMENT_THRESHOLD", "80"))
+        )
+        self.max_rounds = max(1, max_rounds or int(os.getenv("REVIEW_MAX_ROUNDS", "2")))
+
+    def quality_passes(self, quality: Dict[str, Any]) -> bool:
+        """Check whether a quality evaluation clears the quality threshold."""
+        return _score(quality, "overall_score") >= self.quality_threshold
+
+    def alignment_passes(self, alignment: Dict[str, Any]) -> bool:
+        """Check whether an alignment assessment clears the alignment threshold."""
+        return _score(alignment, "alignment_score") >= self.alignment_threshold and alignment.get("aligned") is not False
+
+    def passes(self, quality: Dict[str, Any], alignment: Dict[str, Any]) -> bool:
+        """Check whether a section review clears both thresholds."""
+        return self.quality_passes(quality) and self.alignment_passes(alignment)
+
+    async def review_section(self, section: str, content: Any, nonprofit_info: Dict[str, str],
+                             revise: Optional[Reviser] = None) -> Dict[str, Any]:
+        """
+        Review a section, revising it until it clears the thresholds or the rounds run out.
+
+        Args:
+            section (str): Section key
+            content (Any): The drafted section
+            nonprofit_info (Dict[str, str]): Name, mission and website of the nonprofit
+            revise (Optional[Reviser]): Produces a revised section from the review; without it
+                the section is reviewed once. If it raises, the best version so far is kept
+
+        Returns:
+            Dict[str, Any]: The best-scoring content with its quality and alignment reviews,
+                whether it passed, and the number of rounds used
+        """
+        best = None
+        for round_number in range(1, self.max_rounds + 1):
+            quality, alignment = await asyncio.gather(
+                self.quality_checking_agent.evaluate_section(section, content),
+                self.nonprofit_grounding_agent.verify_section_alignment(section, content, nonprofit_info)
+            )
+            passed = self.passes(quality, alignment)
+            score = _score(quality, "overall_score") + _score(alignment, "alignment_score")
+            if best is None or passed or score > best["score"]:
+                best = {"content": content, "quality": quality, "alignment": alignment, "passed": passed, "score": score}
+            if passed or revise is None or round_number == self.max_rounds:
+                break
+            logger.info(f"Revising {section} after review round {round_number}")
+            try:
+                revised = await revise(section, content, quality, alignment)
+            except Exception as e:
+                # A failed revision ends this section's revisions, not the whole job
+                logger.error(f"Error revising {section} in review round {round_number}: {e}")
+                break
+            if revised == content:
+                # Nothing was changed, so another review would score the same text
+                break
+            content = revised
+            report_progress("section_revised", section=section, content=content, round=round_number)
+
+        best.pop("score")
+        best["rounds"] = round_number
+        report_progress(
+            "section_reviewed",
+            section=section,
+            overall_score=best["quality"].get("overall_score"),
+            alignment_score=best["alignment"].get("alignment_score"),
+            passed=best["passed"],
+            rounds=round_number
+        )
+        return best
+
+    def aggregate(self, reviews: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Combine per-section reviews into document-level quality and alignment reviews.
+
+        Args:
+            reviews (Dict[str, Dict[str, Any]]): Results of review_section by section key
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Any]]: The quality review and the alignment review
+        """
+        quality_scores = {section: _score(review["quality"], "overall_score") for section, review in reviews.items()}
+        alignment_scores = {section: _score(review["alignment"], "alignment_score") for section, review in reviews.items()}
+        criteria: Dict[str, list] = {}
+        strengths, weaknesses, suggestions, issues = [], [], [], []
+        for section, review in reviews.items():
+            quality, alignment = review["quality"], review["alignment"]
+            for criterion, value in (quality.get("criteria_scores") or {}).items():
+                if isinstance(value, (int, float)):
+                    criteria.setdefault(criterion, []).append(value)
+            strengths += [f"{section}: {strength}" for strength in quality.get("strengths", []) if strength]
+            weaknesses += [f"{section}: {weakness}" for weakness in quality.get("weaknesses", []) if weakness]
+            suggestions += [
+                {"section": section, **finding} if isinstance(finding, dict) else {"section": section, "suggestion": finding}
+                for finding in quality.get("improvement_suggestions", [])
+            ]
+            issues += [
+                {"section": section, **finding} if isinstance(finding, dict) else {"section": section, "issue": finding}
+                for finding in alignment.get("issues", [])
+            ]
+
+        count = max(len(reviews), 1)
+        passed = sum(1 for review in reviews.values() if review["passed"])
+        quality_review = {
+            "overall_score": round(sum(quality_scores.values()) / count),
+            "criteria_scores": {criterion: round(sum(values) / len(values), 1) for criterion, values in criteria.items()},
+            "strengths": strengths,
+            "weaknesses": weaknesses,
+            "improvement_suggestions": suggestions,
+            "section_scores": quality_scores,
+            "summary": f"{passed} of {len(reviews)} sections met the quality threshold of {self.quality_threshold:g} "
+                       f"and the alignment threshold of {self.alignment_threshold:g}."
+        }
+        alignment_review = {
+            "aligned": all(review["alignment"].get("aligned") is not False for review in reviews.values()),
+            "alignment_score": round(sum(alignment_scores.values()) / count),
+            "issues": issues,
+            "section_scores": alignment_scores,
+            "overall_assessment": f"{len(issues)} alignment issues across {len(reviews)} sections."
+        }
+        return quality_review, alignment_review
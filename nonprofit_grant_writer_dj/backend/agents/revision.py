@@ -0,0 +1,187 @@
+import os
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from ..utils.grant_schema import SECTION_ALIASES
+from ..utils.job_events import report_progress
+from ..utils.json_stream import JSONParseError, parse_json
+
+logger = logging.getLogger(__name__)
+
+# Revision modes, selected with REVISION_MODE
+REVISION_MODE_PATCH = "patch"
+REVISION_MODE_FULL = "full"
+
+# Section titles and alternate keys, lower-cased, mapped to canonical section keys
+_SECTION_KEYS = {
+    name.lower(): key for key, aliases in SECTION_ALIASES.items() for name in (key, *aliases)
+}
+
+
+def revision_mode() -> str:
+    """Get the revision mode: "patch" revises only the sections named in findings, "full" rewrites the document."""
+    mode = os.getenv("REVISION_MODE", REVISION_MODE_PATCH).lower()
+    if mode not in (REVISION_MODE_PATCH, REVISION_MODE_FULL):
+        raise ValueError(f"Unknown REVISION_MODE: {mode}")
+    return mode
+
+
+def section_key(name: Any) -> Optional[str]:
+    """Map a section name from a review ("Executive Summary", "executive_summary") to its canonical key."""
+    if not isinstance(name, str):
+        return None
+    return _SECTION_KEYS.get(name.strip().lower()) or _SECTION_KEYS.get(name.strip().lower().replace(" ", "_"))
+
+
+def group_by_section(findings: Iterable[Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Group review findings by the section they name.
+    Findings without a recognizable section (e.g. "general") are left out.
+
+    Args:
+        findings (Iterable[Any]): Improvement suggestions or alignment issues with a "section" field
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Findings by canonical section key
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for finding in findings or []:
+        if not isinstance(finding, dict):
+            continue
+        key = section_key(finding.get("section"))
+        if key is not None:
+            grouped.setdefault(key, []).append(finding)
+    return grouped
+
+
+def apply_patches(content: Dict[str, Any], patches: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge section patches into grant content, leaving every other section untouched."""
+    return {**content, **patches}
+
+
+def parse_section_output(section: str, text: str) -> Any:
+    """
+    Turn a section reply into section content: the budget is a JSON array of items,
+    every other section is text.
+
+    Args:
+        section (str): Section key
+        text (str): The model's reply
+
+    Returns:
+        str | list: The section content
+    """
+    text = text.strip()
+    if section != "budget":
+        return text
+    try:
+        return parse_json(text, root="[")
+    except JSONParseError as e:
+        logger.error(f"Error parsing budget items: {e}")
+    return [{"item": "Budget", "description": text, "amount": "0"}]
+
+
+async def build_patches(content: Dict[str, Any], findings: Dict[str, List[Dict[str, Any]]],
+                        revise: Callable[[str, Any, List[Dict[str, Any]]], Awaitable[Any]]) -> Dict[str, Any]:
+    """
+    Revise the sections named in findings concurrently.
+
+    Args:
+        content (Dict[str, Any]): The grant content
+        findings (Dict[str, List[Dict[str, Any]]]): Findings by section, from group_by_section
+        revise (Callable): Coroutine function (section, section_content, section_findings) -> new content
+
+    Returns:
+        Dict[str, Any]: New content of each revised section; sections whose revision failed are left out
+    """
+    sections = [section for section in findings if content.get(section)]
+    results = await asyncio.gather(
+        *(revise(section, content[section], findings[section]) for section in sections),
+        return_exceptions=True
+    )
+    patches = {}
+    for section, result in zip(sections, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error revising {section}: {result}")
+        elif result:
+            patches[section] = result
+    return patches
+
+
+class SectionReviser:
+    """
+    Applies quality suggestions and alignment issues to individual sections, revising
+    each named section in parallel and returning section-level patches.
+    """
+
+    def __init__(self, quality_checking_agent, nonprofit_grounding_agent):
+        """
+        Initialize the reviser.
+
+        Args:
+            quality_checking_agent (QualityCheckingAgent): Agent that applies quality suggestions
+            nonprofit_grounding_agent (NonProfitGroundingAgent): Agent that fixes alignment issues
+        """
+        self.quality_checking_agent = quality_checking_agent
+        self.nonprofit_grounding_agent = nonprofit_grounding_agent
+
+    async def revise_section(self, section: str, section_content: Any, suggestions: List[Dict[str, Any]],
+                             issues: List[Dict[str, Any]], nonprofit_info: Dict[str, Any]) -> Any:
+        """
+        Revise one section for quality, then for alignment, skipping either step without findings.
+
+        Args:
+            section (str): Section key
+            section_content (Any): The current section content
+            suggestions (List[Dict[str, Any]]): Quality improvement suggestions for the section
+            issues (List[Dict[str, Any]]): Alignment issues for the section
+            nonprofit_info (Dict[str, Any]): Name, mission and website of the nonprofit
+
+        Returns:
+            Any: The revised section content
+        """
+        if suggestions:
+            section_content = await self.quality_checking_agent.improve_section(section, section_content, suggestions)
+        if issues:
+            section_content = await self.nonprofit_grounding_agent.revise_section(
+                section, section_content, issues, nonprofit_info
+            )
+        return section_content
+
+    async def build_patches(self, content: Dict[str, Any], suggestions: Iterable[Any], issues: Iterable[Any],
+                            nonprofit_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Revise every section named in the suggestions or issues, in parallel.
+
+        Args:
+            content (Dict[str, Any]): The grant content
+            suggestions (Iterable[Any]): Quality improvement suggestions naming their section
+            issues (Iterable[Any]): Alignment issues naming their section
+            nonprofit_info (Dict[str, Any]): Name, mission and website of the nonprofit
+
+        Returns:
+            Dict[str, Any]: Section-level patches to merge into the grant
+        """
+        suggestions_by_section = group_by_section(suggestions)
+        issues_by_section = group_by_section(issues)
+        findings = {
+            section: suggestions_by_section.get(section, []) + issues_by_section.get(section, [])
+            for section in SECTION_ALIASES
+            if section in suggestions_by_section or section in issues_by_section
+        }
+
+        async def revise(section, section_content, _):
+            revised = await self.revise_section(
+                section,
+                section_content,
+                suggestions_by_section.get(section, []),
+                issues_by_section.get(section, []),
+                nonprofit_info
+            )
+            report_progress("section_revised", section=section, content=revised)
+            return revised
+
+        patches = await build_patches(content, findings, revise)
+        logger.info(f"Revised {len(patches)} of {len(findings)} sections with review findings")
+        return patches
@@ -1,7 +1,8 @@
 import os
 import logging
 from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+from .azure_service import create_azure_chat_service
+from ..utils.crawler import AsyncCrawler
 
 logger = logging.getLogger(__name__)
 
@@ -10,21 +11,16 @@ class ScraperAgent:
     Agent responsible for scraping website content to gather information.
     """
     
-    def __init__(self):
-        """Initialize the scraper agent."""
-        self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        
-        if not all([self.azure_endpoint, self.azure_api_key, self.deployment_name]):
-            raise ValueError("Azure OpenAI credentials not properly configured in .env file")
+    def __init__(self, azure_service=None):
+        """
+        Initialize the scraper agent.
         
-        # Initialize Azure service
-        self.azure_service = AzureChatCompletion(
-            deployment_name=self.deployment_name,
-            endpoint=self.azure_endpoint,
-            api_key=self.azure_api_key
-        )
+        Args:
+            azure_service (AzureChatCompletion, optional): Shared chat completion service.
+                A dedicated service is created when omitted.
+        """
+        # Use the shared Azure service if provided
+        self.azure_service = azure_service or create_azure_chat_service()
         
         # Create the scraper agent
         self.agent = ChatCompletionAgent(
@@ -44,22 +40,40 @@ class ScraperAgent:
             """,
             service=self.azure_service
         )
+        
+        # Crawler shared by every scrape made through this agent
+        self.crawler = AsyncCrawler()
     
-    async def scrape_website(self, url):
+    async def scrape_website(self, url, max_pages=None):
         """
         Scrape content from a website.
         
         Args:
             url (str): URL of the website to scrape
+            max_pages (int, optional): Maximum pages to crawl (default SCRAPER_MAX_PAGES)
             
         Returns:
             dict: Extracted information from the website
         """
-        # This is a placeholder implementation
-        # In a real implementation, you would use a library like BeautifulSoup or Scrapy
-        # to extract information from the website, and then use the agent to process it
+        max_pages = max_pages or int(os.getenv("SCRAPER_MAX_PAGES", "5"))
+        pages = await self.crawler.crawl(url, max_pages=max_pages)
+        if not pages:
+            logger.warning(f"No content could be scraped from {url}")
+            return {"url": url, "error": "Website could not be scraped", "pages": [], "content": ""}
         
-        context = f"I need to extract relevant information from the website at {url}. Please describe what you would look for and how you would structure the extracted data."
-        
-        result = await self.agent.complete_chat_async(context)
-        return {"url": url, "content": result.content} 
\ No newline at end of file
+        home = pages[0]
+        content = "\n\n".join(
+            f"# {page['title'] or page['url']}\n{page['text']}" for page in pages if page["text"]
+        )
+        # Keep the combined text within a size that fits downstream prompts
+        content = content[:int(os.getenv("SCRAPER_MAX_CHARS", "20000"))]
+        return {
+            "url": url,
+            "title": home["title"],
+            "description": home["description"],
+            "pages": [
+                {"url": page["url"], "title": page["title"], "headings": page["headings"], "text": page["text"]}
+                for page in pages
+            ],
+            "content": content
+        }
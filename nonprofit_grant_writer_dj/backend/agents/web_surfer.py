@@ -1,7 +1,7 @@
-import os
 import logging
 from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+from .azure_service import create_azure_chat_service
+from .chat import complete_chat
 from semantic_kernel.core_plugins.web_search_engine_plugin import WebSearchEnginePlugin
 from dotenv import load_dotenv
 from pathlib import Path
@@ -17,19 +17,17 @@ class WebSurferAgent:
     Agent responsible for browsing the web to find relevant information.
     """
     
-    def __init__(self, search_plugins=None):
-        """Initialize the web surfer agent."""
-        # Setup Azure service
-        azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        if not all([azure_endpoint, azure_api_key, deployment_name]):
-            raise ValueError("Azure OpenAI credentials not properly configured in .env file")
-        self.azure_service = AzureChatCompletion(
-            deployment_name=deployment_name,
-            endpoint=azure_endpoint,
-            api_key=azure_api_key
-        )
+    def __init__(self, search_plugins=None, azure_service=None):
+        """
+        Initialize the web surfer agent.
+        
+        Args:
+            search_plugins (list, optional): Search plugins injected by the orchestrator
+            azure_service (AzureChatCompletion, optional): Shared chat completion service.
+                A dedicated service is created when omitted.
+        """
+        # Use the shared Azure service if provided
+        self.azure_service = azure_service or create_azure_chat_service()
 
         # Use injected search plugins or none
         self.search_plugins = search_plugins or []
@@ -67,5 +65,5 @@ class WebSurferAgent:
         
         context = f"I need to search for information about: {query}. Please provide a comprehensive summary of the most relevant information, and include 3-5 key facts or statistics that would be useful for a grant application. Please cite your sources."
         
-        result = await self.agent.complete_chat_async(context)
+        result = await complete_chat(self.agent, context)
         return {"query": query, "results": result.content} 
\ No newline at end of file
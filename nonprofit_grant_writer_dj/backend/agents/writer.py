@@ -1,30 +1,43 @@
-import os
 import logging
 from semantic_kernel.agents.chat_completion.chat_completion_agent import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
+from .azure_service import create_azure_chat_service
+from .chat import complete_chat, complete_json
+from .revision import parse_section_output
+from ..utils.job_events import report_progress
+from ..utils.grant_schema import normalize_grant_content, structured_output_settings
+from ..utils.json_stream import JSONParseError
+from ..utils.prompt_budget import PromptBuilder
 
 logger = logging.getLogger(__name__)
 
+# Grant sections in document order: key -> (title, drafting guidance)
+GRANT_SECTIONS = {
+    "executive_summary": ("Executive Summary", "1-2 paragraphs explaining who the nonprofit is, the problem, the approach, the funding requested and the expected impact."),
+    "problem_statement": ("Problem Statement", "2-3 paragraphs defining the issue with relevant statistics, why it matters and the current gaps."),
+    "project_description": ("Project Description", "A detailed description of the proposed project, its activities and the population served."),
+    "goals_objectives": ("Goals and Objectives", "A list of 3-5 specific, measurable goals, one per line."),
+    "implementation_plan": ("Implementation Plan", "The timeline, key activities and responsible staff for the project."),
+    "evaluation": ("Evaluation and Impact", "How success will be measured, including metrics, data collection and expected impact."),
+    "budget": ("Budget", "A reasonable, itemized budget as a JSON array of objects with \"item\", \"description\" and \"amount\" fields. Output only the JSON array."),
+    "sustainability": ("Sustainability Plan", "How the project will continue after grant funding ends."),
+    "conclusion": ("Conclusion", "A short, persuasive closing paragraph."),
+}
+
 class WriterAgent:
     """
     Agent responsible for writing high-quality grant content based on research.
     """
     
-    def __init__(self):
-        """Initialize the writer agent."""
-        self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        
-        if not all([self.azure_endpoint, self.azure_api_key, self.deployment_name]):
-            raise ValueError("Azure OpenAI credentials not properly configured in .env file")
-        
-        # Initialize Azure service
-        self.azure_service = AzureChatCompletion(
-            deployment_name=self.deployment_name,
-            endpoint=self.azure_endpoint,
-            api_key=self.azure_api_key
-        )
+    def __init__(self, azure_service=None):
+        """
+        Initialize the writer agent.
+        
+        Args:
+            azure_service (AzureChatCompletion, optional): Shared chat completion service.
+                A dedicated service is created when omitted.
+        """
+        # Use the shared Azure service if provided
+        self.azure_service = azure_service or create_azure_chat_service()
         
         # Create the writer agent
         self.agent = ChatCompletionAgent(
@@ -48,6 +61,7 @@ class WriterAgent:
             """,
             service=self.azure_service
         )
+        self.prompt_builder = PromptBuilder(self.agent.name)
     
     async def write_executive_summary(self, nonprofit_info, grant_info):
         """
@@ -60,7 +74,7 @@ class WriterAgent:
         Returns:
             str: Executive summary
         """
-        context = f"""
+        context = self.prompt_builder.build("""
         Write a compelling executive summary for a grant application with the following information:
         
         Nonprofit Information:
@@ -78,9 +92,9 @@ class WriterAgent:
         6. What impact the funding will have
         
         Keep the tone professional and persuasive.
-        """
+        """, priorities={"nonprofit_info": 2}, nonprofit_info=nonprofit_info, grant_info=grant_info)
         
-        result = await self.agent.complete_chat_async(context)
+        result = await complete_chat(self.agent, context)
         return result.content
     
     async def write_problem_statement(self, research_data):
@@ -93,7 +107,7 @@ class WriterAgent:
         Returns:
             str: Problem statement
         """
-        context = f"""
+        context = self.prompt_builder.build("""
         Write a compelling problem statement for a grant application based on the following research:
         
         {research_data}
@@ -106,11 +120,79 @@ class WriterAgent:
         5. Set the stage for why your nonprofit's solution is needed
         
         Keep the statement to 2-3 paragraphs, and ensure it's backed by evidence.
-        """
+        """, research_data=research_data)
         
-        result = await self.agent.complete_chat_async(context)
+        result = await complete_chat(self.agent, context)
         return result.content
     
+    async def write_section(self, section, nonprofit_info, grant_info, research_data, excerpts=None, on_delta=None,
+                            other_sections=None, instructions=None, use_cache=True):
+        """
+        Write a single section of the grant application.
+        
+        Args:
+            section (str): Section key from GRANT_SECTIONS
+            nonprofit_info (dict): Information about the nonprofit
+            grant_info (dict): Information about the grant
+            research_data (dict): Research data for the application
+            excerpts (list, optional): Retrieved research excerpts relevant to this section.
+                When given, they replace grant_info and research_data in the prompt.
+            on_delta (callable, optional): Called with each piece of text as the section is streamed
+            other_sections (dict, optional): The rest of the application, so a regenerated section stays consistent
+            instructions (str, optional): Additional instructions from the user for this section
+            use_cache (bool): Whether a cached draft may be returned; False when regenerating
+            
+        Returns:
+            str | list: Section text, or a list of budget items for the budget section
+        """
+        title, guidance = GRANT_SECTIONS[section]
+        if excerpts is not None:
+            numbered = "\n\n".join(
+                f"[{i}] ({excerpt['source']}) {excerpt['text']}" for i, excerpt in enumerate(excerpts, 1)
+            )
+            background = """
+        Relevant Research Excerpts:
+        {excerpts}
+        """
+            fields = {"excerpts": numbered or "No research excerpts were found; rely on the nonprofit information."}
+        else:
+            background = """
+        Grant Information:
+        {grant_info}
+        
+        Research Data:
+        {research_data}
+        """
+            fields = {"grant_info": grant_info, "research_data": research_data}
+        if other_sections:
+            background += """
+        Other Sections of the Application (stay consistent with them):
+        {other_sections}
+        """
+            fields["other_sections"] = other_sections
+        if instructions:
+            background += """
+        Additional Instructions:
+        {instructions}
+        """
+            fields["instructions"] = instructions
+        context = self.prompt_builder.build("""
+        Write the "{title}" section of a grant application for the following nonprofit and grant opportunity:
+        
+        Nonprofit Information:
+        {nonprofit_info}
+        """ + background + """
+        Section requirements: {guidance}
+        
+        Keep the writing professional, clear, and persuasive. Output only the section content,
+        without the section heading.
+        """, priorities={"title": 10, "guidance": 10, "instructions": 10, "nonprofit_info": 3, "excerpts": 2, "grant_info": 2},
+            title=title, guidance=guidance, nonprofit_info=nonprofit_info, **fields)
+        
+        result = await complete_chat(self.agent, context, on_delta=on_delta, use_cache=use_cache)
+        # The budget is requested as a JSON array of items
+        return parse_section_output(section, result.content)
+    
     async def write_full_grant(self, nonprofit_info, grant_info, research_data):
         """
         Write a complete grant application.
@@ -123,7 +205,7 @@ class WriterAgent:
         Returns:
             dict: Complete grant application as a structured object
         """
-        context = f"""
+        context = self.prompt_builder.build("""
         Write a comprehensive grant application for the following nonprofit and grant opportunity:
         
         Nonprofit Information:
@@ -146,32 +228,30 @@ class WriterAgent:
         8. Sustainability Plan (how the project will continue after grant funding)
         9. Conclusion
         
-        Format your response as a JSON object with these sections as keys. For the budget, 
-        create an array of budget items, each with "item", "description", and "amount" fields.
+        Format your response as a JSON object with these keys, in this order: "executive_summary",
+        "problem_statement", "project_description", "goals_objectives", "implementation_plan",
+        "evaluation", "budget", "sustainability", "conclusion". For the budget, create an array of
+        budget items, each with "item", "description", and "amount" fields.
         For goals and objectives, create an array of specific goal statements.
         
         Keep the writing professional, clear, and persuasive. Use concrete examples and data to
         strengthen your case.
-        """
+        """, priorities={"nonprofit_info": 3, "grant_info": 2},
+            nonprofit_info=nonprofit_info, grant_info=grant_info, research_data=research_data)
         
-        result = await self.agent.complete_chat_async(context)
+        # Report each section as soon as its JSON field is complete
+        def section_written(section, content):
+            report_progress("section_drafted", section=section, content=content)
         
-        # Attempt to parse the response into a JSON structure
         try:
-            import json
-            
-            # Try to extract just the JSON part if there's surrounding text
-            content = result.content
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = content[json_start:json_end]
-                grant_content = json.loads(json_str)
-                return grant_content
-            else:
-                # If no JSON found, return the raw content
-                return {"error": "Could not parse JSON", "raw_content": content}
-        except Exception as e:
+            grant_content = await complete_json(
+                self.agent, context, on_field=section_written, **structured_output_settings()
+            )
+            return normalize_grant_content(grant_content)
+        except JSONParseError as e:
             logger.error(f"Error parsing grant content: {e}")
-            return {"error": str(e), "raw_content": result.content} 
\ No newline at end of file
+            return {"error": str(e), "raw_content": e.text}
+        except ValueError as e:
+            # The JSON was valid but could not be coerced into the grant schema
+            logger.error(f"Invalid grant content: {e}")
+            return {"error": str(e)}
@@ -0,0 +1,220 @@
+import json
+import shutil
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows allocated when a collection is created
+INITIAL_CAPACITY = 1024
+
+# Append-only log of ids and payloads, one JSON object per line
+PAYLOAD_LOG = "payloads.jsonl"
+
+
+class _Collection:
+    """
+    A single collection: a memory-mapped float32 matrix of unit vectors plus ids and payloads.
+    meta.json only holds the matrix shape; ids and payloads are appended to payloads.jsonl
+    one row per line, so an upsert writes just its own batch. Later lines for an id replace
+    earlier ones when the log is replayed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with (path / "meta.json").open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.capacity = meta["capacity"]
+        self.ids: List[Any] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        if "ids" in meta:
+            # Collections written before the payload log kept everything in meta.json
+            self._apply(zip(meta["ids"], meta["payloads"]))
+            self._rewrite_log()
+            self._save_meta()
+        log_lines = self._load_log()
+        if log_lines > 2 * len(self.ids) + INITIAL_CAPACITY:
+            # Mostly superseded rows; rewrite the log with one line per id
+            self._rewrite_log()
+        self.matrix = np.memmap(path / "vectors.f32", dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    @staticmethod
+    def _key(id_):
+        return str(id_)
+
+    @classmethod
+    def create(cls, path: Path, dim: int) -> "_Collection":
+        path.mkdir(parents=True, exist_ok=True)
+        np.memmap(path / "vectors.f32", dtype=np.float32, mode="w+", shape=(INITIAL_CAPACITY, dim)).flush()
+        (path / PAYLOAD_LOG).touch()
+        with (path / "meta.json").open("w", encoding="utf-8") as f:
+            json.dump({"dim": dim, "capacity": INITIAL_CAPACITY}, f)
+        return cls(path)
+
+    def _apply(self, entries) -> List[int]:
+        """Assign rows to (id, payload) pairs in order and return the rows."""
+        rows = []
+        for id_, payload in entries:
+            row = self.rows.get(self._key(id_))
+            if row is None:
+                row = len(self.ids)
+                self.rows[self._key(id_)] = row
+                self.ids.append(id_)
+                self.payloads.append(payload)
+            else:
+                self.payloads[row] = payload
+            rows.append(row)
+        return rows
+
+    def _load_log(self) -> int:
+        """Replay the payload log and return the number of lines read."""
+        log_path = self.path / PAYLOAD_LOG
+        if not log_path.exists():
+            return 0
+        entries = []
+        with log_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash mid-append; its vector row was never counted
+                    logger.warning(f"Skipping unreadable line in {log_path}")
+                    continue
+                entries.append((entry["id"], entry["payload"]))
+        self._apply(entries)
+        return len(entries)
+
+    def _rewrite_log(self) -> None:
+        tmp_path = self.path / (PAYLOAD_LOG + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for id_, payload in zip(self.ids, self.payloads):
+                f.write(json.dumps({"id": id_, "payload": payload}) + "\n")
+        tmp_path.replace(self.path / PAYLOAD_LOG)
+
+    def _save_meta(self) -> None:
+        tmp_path = self.path / "meta.json.tmp"
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "capacity": self.capacity}, f)
+        tmp_path.replace(self.path / "meta.json")
+
+    def _grow(self, required: int) -> None:
+        """Reallocate the matrix file with at least the required number of rows."""
+        capacity = max(self.capacity * 2, required)
+        count = len(self.ids)
+        new_path = self.path / "vectors.f32.new"
+        grown = np.memmap(new_path, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        grown[:count] = self.matrix[:count]
+        grown.flush()
+        del self.matrix, grown
+        new_path.replace(self.path / "vectors.f32")
+        self.capacity = capacity
+        self.matrix = np.memmap(self.path / "vectors.f32", dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._save_meta()
+
+    def upsert(self, vectors: np.ndarray, ids: Sequence[Any], payloads: Sequence[Dict[str, Any]]) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim}), got {vectors.shape}")
+        # Store unit vectors so cosine similarity is a single matrix-vector product
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        new_count = len(self.ids) + len({self._key(id_) for id_ in ids if self._key(id_) not in self.rows})
+        if new_count > self.capacity:
+            self._grow(new_count)
+        rows = self._apply(zip(ids, payloads))
+        for row, vector in zip(rows, vectors):
+            self.matrix[row] = vector
+        # Vectors are on disk before the log lines that make their rows visible
+        self.matrix.flush()
+        with (self.path / PAYLOAD_LOG).open("a", encoding="utf-8") as f:
+            f.writelines(json.dumps({"id": id_, "payload": payload}) + "\n" for id_, payload in zip(ids, payloads))
+
+    def search(self, query: np.ndarray, limit: int, filter_condition: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        count = len(self.ids)
+        if count == 0 or limit <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        scores = self.matrix[:count] @ (query / norm if norm else query)
+        if filter_condition:
+            mask = np.fromiter(
+                (all((payload or {}).get(k) == v for k, v in filter_condition.items()) for payload in self.payloads),
+                dtype=bool, count=count
+            )
+            scores = np.where(mask, scores, -np.inf)
+        limit = min(limit, count)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"id": self.ids[row], "score": float(scores[row]), "metadata": self.payloads[row]}
+            for row in top if np.isfinite(scores[row])
+        ]
+
+
+class LocalVectorIndex:
+    """
+    Embedded vector index used when Qdrant is not configured.
+    Vectors live in contiguous float32 memory-mapped files and are searched with
+    vectorized cosine similarity; payloads support exact-match filtering.
+    """
+
+    def __init__(self, root_dir):
+        """
+        Initialize the local index.
+
+        Args:
+            root_dir (str | Path): Directory holding one subdirectory per collection
+        """
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self._collections: Dict[str, _Collection] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, name: str) -> _Collection:
+        collection = self._collections.get(name)
+        if collection is None:
+            path = self.root_dir / name
+            if not (path / "meta.json").exists():
+                raise KeyError(f"Collection {name} does not exist")
+            collection = self._collections[name] = _Collection(path)
+        return collection
+
+    def create_collection(self, name: str, vector_size: int) -> None:
+        """Create a collection, replacing any existing one with the same name."""
+        with self._lock:
+            self._collections.pop(name, None)
+            shutil.rmtree(self.root_dir / name, ignore_errors=True)
+            self._collections[name] = _Collection.create(self.root_dir / name, vector_size)
+
+    def delete_collection(self, name: str) -> None:
+        """Delete a collection and its files."""
+        with self._lock:
+            self._collections.pop(name, None)
+            shutil.rmtree(self.root_dir / name, ignore_errors=True)
+
+    def upsert(self, name: str, vectors: np.ndarray, ids: Sequence[Any], payloads: Sequence[Dict[str, Any]]) -> None:
+        """Insert or replace vectors by ID."""
+        with self._lock:
+            self._collection(name).upsert(vectors, ids, payloads)
+
+    def search(self, name: str, query_vector, limit: int = 5,
+               filter_condition: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Return the most similar vectors by cosine similarity.
+
+        Args:
+            name (str): Collection name
+            query_vector (Sequence[float]): Query vector
+            limit (int): Maximum number of results
+            filter_condition (Optional[Dict[str, Any]]): Payload fields that must match exactly
+
+        Returns:
+            List[Dict[str, Any]]: Results with id, score and metadata, best first
+        """
+        with self._lock:
+            return self._collection(name).search(query_vector, limit, filter_condition)
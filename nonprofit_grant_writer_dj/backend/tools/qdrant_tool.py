@@ -1,10 +1,13 @@
 import os
+import time
+import uuid
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Sequence, Iterator, Callable
 import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import (
-    PointStruct,
+    Batch,
     VectorParams,
     Distance,
     CollectionStatus,
@@ -13,12 +16,18 @@ from qdrant_client.http.models import (
     MatchValue,
 )
 
+from .local_vector_index import LocalVectorIndex
+
 logger = logging.getLogger(__name__)
 
+# Default directory of the embedded index used without Qdrant
+DEFAULT_LOCAL_VECTOR_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "vectors")
+
 class QdrantTool:
     """
     Tool for storing and retrieving vector data from Qdrant.
     Used for semantic search and retrieval of grant-related information.
+    Falls back to an embedded, memory-mapped local index when Qdrant is not configured.
     """
     
     def __init__(self):
@@ -26,14 +35,22 @@ class QdrantTool:
         self.qdrant_url = os.getenv("QDRANT_URL")
         self.qdrant_api_key = os.getenv("QDRANT_API_KEY")
         
+        self.local_index = None
         if not all([self.qdrant_url, self.qdrant_api_key]):
-            logger.warning("Qdrant credentials not properly configured. Vector operations will be unavailable.")
+            local_dir = os.getenv("LOCAL_VECTOR_DIR", DEFAULT_LOCAL_VECTOR_DIR)
+            logger.info(f"Qdrant credentials not configured. Using the local vector index in {local_dir}.")
             self.client = None
+            self.local_index = LocalVectorIndex(local_dir)
         else:
             self.client = QdrantClient(
                 url=self.qdrant_url,
                 api_key=self.qdrant_api_key
             )
+        
+        # Bulk ingestion settings
+        self.batch_size = int(os.getenv("QDRANT_BATCH_SIZE", "256"))
+        self.parallel_uploads = int(os.getenv("QDRANT_PARALLEL_UPLOADS", "4"))
+        self.max_retries = int(os.getenv("QDRANT_MAX_RETRIES", "3"))
     
     def create_collection(self, collection_name: str, vector_size: int = 1536) -> bool:
         """
@@ -46,11 +63,10 @@ class QdrantTool:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.client:
-            logger.error("Qdrant client not initialized")
-            return False
-        
         try:
+            if not self.client:
+                self.local_index.create_collection(collection_name, vector_size)
+                return True
             self.client.create_collection(
                 collection_name=collection_name,
                 vectors_config=VectorParams(
@@ -79,36 +95,111 @@ class QdrantTool:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.client:
-            logger.error("Qdrant client not initialized")
-            return False
+        return self.store_embeddings_bulk(
+            collection_name, np.asarray(vectors, dtype=np.float32), metadata, ids
+        )
+    
+    def store_embeddings_bulk(
+        self, collection_name: str, vectors: np.ndarray,
+        metadata: Optional[Sequence[Dict[str, Any]]] = None, ids: Optional[Sequence[Any]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
+        """
+        Store a large array of embeddings in batches uploaded in parallel.
         
-        try:
-            # Generate IDs if not provided
-            if ids is None:
-                import uuid
-                ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
-            
-            # Create points
-            points = [
-                PointStruct(
-                    id=id_,
-                    vector=vector,
-                    payload=metadata_
-                )
-                for id_, vector, metadata_ in zip(ids, vectors, metadata)
-            ]
+        Args:
+            collection_name (str): Name of the collection
+            vectors (np.ndarray): 2-D array of vectors (a memory-mapped array works without loading it)
+            metadata (Optional[Sequence[Dict[str, Any]]]): Optional payload for each vector
+            ids (Optional[Sequence[Any]]): Optional IDs for the vectors; UUIDs are generated if omitted
+            progress_callback (Optional[Callable[[int, int], None]]): Called with (stored, total) after each batch
             
-            # Upsert points
-            self.client.upsert(
-                collection_name=collection_name,
-                points=points
-            )
+        Returns:
+            bool: True if every batch was stored, False otherwise
+        """
+        try:
+            for stored, total in self.iter_store_embeddings(collection_name, vectors, metadata, ids):
+                if progress_callback:
+                    progress_callback(stored, total)
             return True
         except Exception as e:
             logger.error(f"Error storing embeddings: {e}")
             return False
     
+    def iter_store_embeddings(
+        self, collection_name: str, vectors: np.ndarray,
+        metadata: Optional[Sequence[Dict[str, Any]]] = None, ids: Optional[Sequence[Any]] = None
+    ) -> Iterator[tuple]:
+        """
+        Upload embeddings batch by batch, yielding progress as batches complete.
+        At most QDRANT_PARALLEL_UPLOADS batches are converted and in flight at any time,
+        so memory use does not grow with the number of points.
+        
+        Args:
+            collection_name (str): Name of the collection
+            vectors (np.ndarray): 2-D array of vectors
+            metadata (Optional[Sequence[Dict[str, Any]]]): Optional payload for each vector
+            ids (Optional[Sequence[Any]]): Optional IDs for the vectors
+            
+        Yields:
+            tuple: (points stored so far, total points)
+        """
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be a 2-D array")
+        total = vectors.shape[0]
+        if metadata is not None and len(metadata) != total:
+            raise ValueError("metadata must have one entry per vector")
+        if ids is not None and len(ids) != total:
+            raise ValueError("ids must have one entry per vector")
+        
+        stored = 0
+        starts = iter(range(0, total, self.batch_size))
+        with ThreadPoolExecutor(max_workers=self.parallel_uploads) as executor:
+            in_flight = {}
+            while True:
+                # Keep the pool full without materializing more batches than can be sent
+                while len(in_flight) < self.parallel_uploads:
+                    start = next(starts, None)
+                    if start is None:
+                        break
+                    end = min(start + self.batch_size, total)
+                    future = executor.submit(self._upsert_batch, collection_name, vectors, metadata, ids, start, end)
+                    in_flight[future] = end - start
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    count = in_flight.pop(future)
+                    future.result()
+                    stored += count
+                    yield stored, total
+    
+    def _upsert_batch(self, collection_name, vectors, metadata, ids, start, end):
+        """Convert one slice to a Qdrant batch and upsert it, retrying with exponential backoff."""
+        if not self.client:
+            self.local_index.upsert(
+                collection_name,
+                vectors[start:end],
+                list(ids[start:end]) if ids is not None else [str(uuid.uuid4()) for _ in range(end - start)],
+                list(metadata[start:end]) if metadata is not None else [{}] * (end - start)
+            )
+            return
+        batch = Batch(
+            ids=list(ids[start:end]) if ids is not None else [str(uuid.uuid4()) for _ in range(end - start)],
+            vectors=np.asarray(vectors[start:end], dtype=np.float32).tolist(),
+            payloads=list(metadata[start:end]) if metadata is not None else None
+        )
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client.upsert(collection_name=collection_name, points=batch, wait=True)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                logger.warning(f"Upsert of points {start}-{end} failed ({e}); retrying in {delay}s")
+                time.sleep(delay)
+    
     def search_similar(
         self, collection_name: str, query_vector: List[float], 
         limit: int = 5, filter_condition: Optional[Dict[str, Any]] = None
@@ -125,11 +216,10 @@ class QdrantTool:
         Returns:
             List[Dict[str, Any]]: List of search results with metadata
         """
-        if not self.client:
-            logger.error("Qdrant client not initialized")
-            return []
-        
         try:
+            if not self.client:
+                return self.local_index.search(collection_name, query_vector, limit, filter_condition)
+            
             # Convert the filter condition to a Qdrant filter if provided
             filter_obj = None
             if filter_condition:
@@ -175,11 +265,10 @@ class QdrantTool:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.client:
-            logger.error("Qdrant client not initialized")
-            return False
-        
         try:
+            if not self.client:
+                self.local_index.delete_collection(collection_name)
+                return True
             self.client.delete_collection(collection_name=collection_name)
             return True
         except Exception as e:
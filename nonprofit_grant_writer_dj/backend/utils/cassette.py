@@ -0,0 +1,180 @@
+import os
+import gzip
+import json
+import asyncio
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cassette modes, selected with CASSETTE_MODE
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+# Replay timing, selected with CASSETTE_TIMING
+TIMING_ZERO = "zero"
+TIMING_ORIGINAL = "original"
+
+# Default cassette file, next to the job store
+DEFAULT_CASSETTE_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "cassettes" / "cassette.jsonl.gz"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when the cassette holds no response for a request."""
+
+
+class Cassette:
+    """
+    Recording of the chat completions, searches and page fetches of one or more generations.
+    Each interaction is one JSON line keyed by kind and request key; files ending in .gz are
+    gzip-compressed. Repeated identical requests are replayed in the order they were recorded,
+    and the last response is reused once a key's recordings run out.
+    """
+
+    def __init__(self, path, mode: str, timing: str = TIMING_ZERO):
+        """
+        Initialize the cassette.
+
+        Args:
+            path (str | Path): Cassette file
+            mode (str): "record" appends to the file, "replay" serves responses from it
+            timing (str): "zero" replays instantly, "original" waits as long as the recorded call took
+        """
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown CASSETTE_MODE: {mode}")
+        if timing not in (TIMING_ZERO, TIMING_ORIGINAL):
+            raise ValueError(f"Unknown CASSETTE_TIMING: {timing}")
+        self.path = Path(path)
+        self.mode = mode
+        self.timing = timing
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = {}
+        self._last: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if mode == MODE_REPLAY:
+            self._load()
+        logger.info(f"Cassette {self.path} opened for {mode}")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    def _open(self, mode: str):
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self) -> None:
+        count = 0
+        try:
+            with self._open("rt") as cassette:
+                for line in cassette:
+                    entry = json.loads(line)
+                    self._entries.setdefault((entry["kind"], entry["key"]), deque()).append(entry)
+                    count += 1
+        except FileNotFoundError:
+            raise ValueError(f"Cassette not found: {self.path}")
+        except EOFError:
+            # A recording cut off by a crash keeps every entry flushed before it
+            logger.warning(f"Cassette {self.path} ends early; replaying the {count} complete entries")
+        logger.info(f"Loaded {count} recorded interactions from {self.path}")
+
+    def record(self, kind: str, key: str, response: Any, seconds: float, **extra) -> None:
+        """
+        Append an interaction to the cassette.
+
+        Args:
+            kind (str): Interaction kind: "chat", "search" or "page"
+            key (str): Request key, e.g. the completion cache key
+            response (Any): JSON-serializable response
+            seconds (float): How long the original call took
+            **extra: Additional JSON-serializable timing data
+        """
+        entry = {"kind": kind, "key": key, "seconds": round(seconds, 4), **extra, "response": response}
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self._open("at")
+            self._file.write(line)
+            self._file.flush()
+
+    def lookup(self, kind: str, key: str) -> Dict[str, Any]:
+        """
+        Take the next recorded interaction for a request.
+
+        Args:
+            kind (str): Interaction kind
+            key (str): Request key
+
+        Returns:
+            Dict[str, Any]: The recorded entry, with its "response" and timing
+
+        Raises:
+            CassetteMissError: If the request was never recorded
+        """
+        with self._lock:
+            queue = self._entries.get((kind, key))
+            if queue:
+                entry = self._last[(kind, key)] = queue.popleft()
+                return entry
+            entry = self._last.get((kind, key))
+        if entry is None:
+            raise CassetteMissError(f"No recorded {kind} response for key {key[:80]}")
+        return entry
+
+    async def wait(self, seconds: Optional[float]) -> None:
+        """Sleep for a recorded duration when replaying with original timing."""
+        if self.timing == TIMING_ORIGINAL and seconds:
+            await asyncio.sleep(seconds)
+
+    def close(self) -> None:
+        """Flush and close the recording."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Get the process-wide cassette configured from the environment.
+    CASSETTE_MODE is "off" (default), "record" or "replay"; CASSETTE_PATH is the file;
+    CASSETTE_TIMING is "zero" (default) or "original" for replays.
+
+    Returns:
+        Optional[Cassette]: The cassette, or None when recording and replay are off
+    """
+    global _cassette
+    mode = os.getenv("CASSETTE_MODE", MODE_OFF).lower()
+    if mode == MODE_OFF:
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(
+                os.getenv("CASSETTE_PATH", str(DEFAULT_CASSETTE_PATH)),
+                mode,
+                os.getenv("CASSETTE_TIMING", TIMING_ZERO).lower()
+            )
+        return _cassette
+
+
+def close_cassette() -> None:
+    """Close the process-wide cassette, if one is open."""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+            _cassette = None
@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urldefrag, urlparse
+from urllib.robotparser import RobotFileParser
+from bs4 import BeautifulSoup
+
+from .cassette import get_cassette
+from .http_client import get_shared_client
+
+logger = logging.getLogger(__name__)
+
+# Default on-disk page cache, next to the job store
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "page_cache"
+
+# Link text and paths that usually lead to grant- or mission-relevant pages
+PRIORITY_KEYWORDS = (
+    "about", "mission", "program", "impact", "eligib", "guideline", "apply",
+    "application", "requirement", "criteria", "deadline", "funding", "grant", "faq",
+)
+
+# Seconds before an unreachable robots.txt is requested again
+ROBOTS_RETRY_SECONDS = 300
+
+
+def extract_page(html: str, url: str) -> Dict[str, Any]:
+    """
+    Extract structured text from an HTML page.
+
+    Args:
+        html (str): Page HTML
+        url (str): Page URL, used to resolve links
+
+    Returns:
+        Dict[str, Any]: Title, description, headings, body text and links of the page
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "svg", "iframe", "nav", "footer", "form"]):
+        tag.decompose()
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    description_tag = soup.find("meta", attrs={"name": "description"})
+    description = description_tag.get("content", "").strip() if description_tag else ""
+    headings = [h.get_text(" ", strip=True) for h in soup.find_all(["h1", "h2", "h3"]) if h.get_text(strip=True)]
+    blocks = [el.get_text(" ", strip=True) for el in soup.find_all(["p", "li", "td"]) if el.get_text(strip=True)]
+    links = []
+    for anchor in soup.find_all("a", href=True):
+        link = urldefrag(urljoin(url, anchor["href"]))[0]
+        if link.startswith(("http://", "https://")):
+            links.append({"url": link, "text": anchor.get_text(" ", strip=True)})
+    return {
+        "url": url,
+        "title": title,
+        "description": description,
+        "headings": headings,
+        "text": "\n".join(blocks),
+        "links": links,
+    }
+
+
+class AsyncCrawler:
+    """
+    Polite async web crawler with a bounded concurrency pool, per-host limits,
+    robots.txt support, conditional GET and an on-disk page cache.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_concurrency: Optional[int] = None,
+                 per_host_concurrency: Optional[int] = None, per_host_delay: Optional[float] = None,
+                 cache_ttl: Optional[float] = None, user_agent: Optional[str] = None,
+                 robots_ttl: Optional[float] = None):
+        """
+        Initialize the crawler. Unset arguments are read from CRAWLER_* environment variables.
+
+        Args:
+            cache_dir (str | Path): Directory of the page cache
+            max_concurrency (Optional[int]): Maximum requests in flight overall
+            per_host_concurrency (Optional[int]): Maximum requests in flight per host
+            per_host_delay (Optional[float]): Minimum seconds between requests to the same host
+            cache_ttl (Optional[float]): Seconds a cached page is used without revalidation
+            user_agent (Optional[str]): User-Agent header and robots.txt agent name
+            robots_ttl (Optional[float]): Seconds a fetched robots.txt is used before it is fetched again
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_concurrency = max_concurrency or int(os.getenv("CRAWLER_MAX_CONCURRENCY", "8"))
+        self.per_host_concurrency = per_host_concurrency or int(os.getenv("CRAWLER_PER_HOST_CONCURRENCY", "2"))
+        self.per_host_delay = per_host_delay if per_host_delay is not None else float(os.getenv("CRAWLER_PER_HOST_DELAY", "0.5"))
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("CRAWLER_CACHE_TTL", "3600"))
+        self.user_agent = user_agent or os.getenv("CRAWLER_USER_AGENT", "NonprofitGrantWriterBot/1.0")
+        self.robots_ttl = robots_ttl if robots_ttl is not None else float(os.getenv("CRAWLER_ROBOTS_TTL", "86400"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_last_request: Dict[str, float] = {}
+        # Expiry and fetch of each origin's robots.txt; concurrent requests share one fetch
+        self._robots: Dict[str, Tuple[float, asyncio.Future]] = {}
+
+    @property
+    def client(self):
+        """The shared, pooled HTTP client for crawling."""
+        return get_shared_client("CRAWLER", timeout=10.0)
+
+    def _cache_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _load_cached(self, url: str) -> Optional[Dict[str, Any]]:
+        path = self._cache_path(url)
+        if not path.exists():
+            return None
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable page cache entry for {url}: {e}")
+            return None
+
+    def _store_cached(self, url: str, entry: Dict[str, Any]) -> None:
+        path = self._cache_path(url)
+        # A unique temporary name, since crawlers in other worker processes may write the same page
+        tmp = tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.cache_dir, suffix=".tmp", delete=False)
+        try:
+            with tmp as f:
+                json.dump(entry, f)
+            Path(tmp.name).replace(path)
+        except Exception:
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+
+    async def _allowed(self, url: str) -> bool:
+        """Check robots.txt for a URL, fetching it once per origin and again after robots_ttl."""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        entry = self._robots.get(origin)
+        if entry is None or entry[0] <= time.monotonic():
+            entry = self._robots[origin] = (time.monotonic() + self.robots_ttl,
+                                            asyncio.ensure_future(self._fetch_robots(origin)))
+        # Shielded so a cancelled page fetch does not cancel the fetch other pages wait for
+        parser = await asyncio.shield(entry[1])
+        return parser.can_fetch(self.user_agent, url)
+
+    async def _fetch_robots(self, origin: str) -> RobotFileParser:
+        """Fetch and parse an origin's robots.txt, allowing everything if it is unreachable."""
+        parser = RobotFileParser()
+        try:
+            response = await self.client.get(f"{origin}/robots.txt", headers={"User-Agent": self.user_agent})
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(response.text.splitlines())
+        except Exception as e:
+            logger.warning(f"Could not fetch robots.txt for {origin}: {e}")
+            parser.allow_all = True
+            # Ask again sooner than for a robots.txt that was actually read
+            expires, fetch = self._robots.get(origin, (0.0, None))
+            if fetch is not None:
+                self._robots[origin] = (min(expires, time.monotonic() + ROBOTS_RETRY_SECONDS), fetch)
+        return parser
+
+    async def _wait_for_host(self, host: str) -> None:
+        """Space out requests to the same host by the politeness delay."""
+        elapsed = time.monotonic() - self._host_last_request.get(host, 0.0)
+        if elapsed < self.per_host_delay:
+            await asyncio.sleep(self.per_host_delay - elapsed)
+        self._host_last_request[host] = time.monotonic()
+
+    async def fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch and parse a single page.
+        With a cassette configured, fetched pages are recorded to or replayed from it.
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted page content, or None if blocked or unavailable
+        """
+        cassette = get_cassette()
+        if cassette is None:
+            return await self._fetch(url)
+        if cassette.replaying:
+            entry = cassette.lookup("page", url)
+            await cassette.wait(entry["seconds"])
+            return entry["response"]
+        start = time.monotonic()
+        page = await self._fetch(url)
+        cassette.record("page", url, page, time.monotonic() - start)
+        return page
+
+    async def _fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fetch and parse a single page through the page cache."""
+        cached = self._load_cached(url)
+        if cached and time.time() - cached["fetched_at"] < self.cache_ttl:
+            return await asyncio.to_thread(extract_page, cached["html"], url)
+
+        if not await self._allowed(url):
+            logger.info(f"robots.txt disallows {url}")
+            return None
+
+        headers = {"User-Agent": self.user_agent}
+        if cached:
+            # Conditional GET: the server answers 304 if our copy is still current
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        host = urlparse(url).netloc
+        host_semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+        try:
+            async with self._semaphore, host_semaphore:
+                await self._wait_for_host(host)
+                response = await self.client.get(url, headers=headers, follow_redirects=True)
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return await asyncio.to_thread(extract_page, cached["html"], url) if cached else None
+
+        if response.status_code == 304 and cached:
+            cached["fetched_at"] = time.time()
+            self._store_cached(url, cached)
+            return await asyncio.to_thread(extract_page, cached["html"], url)
+        if response.status_code >= 400 or "html" not in response.headers.get("content-type", "html"):
+            logger.warning(f"Skipping {url}: status {response.status_code}, type {response.headers.get('content-type')}")
+            return None
+
+        self._store_cached(url, {
+            "url": url,
+            "html": response.text,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fetched_at": time.time(),
+        })
+        return await asyncio.to_thread(extract_page, response.text, url)
+
+    async def crawl(self, start_url: str, max_pages: int = 5) -> List[Dict[str, Any]]:
+        """
+        Crawl a site starting from a URL, preferring links that look relevant to grants.
+        Pages of each link level are fetched concurrently within the pool limits.
+
+        Args:
+            start_url (str): URL to start from
+            max_pages (int): Maximum number of pages to return
+
+        Returns:
+            List[Dict[str, Any]]: Extracted content of the crawled pages
+        """
+        host = urlparse(start_url).netloc
+        seen = {start_url}
+        frontier = [start_url]
+        pages: List[Dict[str, Any]] = []
+        while frontier and len(pages) < max_pages:
+            batch = frontier[:max_pages - len(pages)]
+            frontier = frontier[len(batch):]
+            results = await asyncio.gather(*(self.fetch(url) for url in batch))
+            candidates = []
+            for page in results:
+                if page is None:
+                    continue
+                pages.append(page)
+                for link in page["links"]:
+                    if urlparse(link["url"]).netloc == host and link["url"] not in seen:
+                        seen.add(link["url"])
+                        label = f"{link['text']} {link['url']}".lower()
+                        candidates.append((sum(k in label for k in PRIORITY_KEYWORDS), link["url"]))
+            candidates.sort(key=lambda c: c[0], reverse=True)
+            frontier.extend(url for score, url in candidates if score > 0)
+        return pages[:max_pages]
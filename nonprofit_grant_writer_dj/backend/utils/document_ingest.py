@@ -0,0 +1,137 @@
+import re
+import zipfile
+import logging
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+from xml.etree import ElementTree
+
+from .tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per block from plain text files
+READ_BLOCK_SIZE = 64 * 1024
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def detect_file_type(path) -> str:
+    """Return the lower-case file type of a path from its extension, e.g. "pdf"."""
+    return Path(path).suffix.lstrip(".").lower() or "txt"
+
+
+def iter_text_blocks(path, file_type: Optional[str] = None) -> Iterator[str]:
+    """
+    Stream the text of a document as paragraphs (or pages for PDFs) without loading
+    the whole file into memory.
+
+    Args:
+        path (str | Path): Path of the document
+        file_type (Optional[str]): "pdf", "docx" or a text type; detected from the extension if omitted
+
+    Yields:
+        str: Text blocks in document order
+    """
+    file_type = (file_type or detect_file_type(path)).lower()
+    if file_type == "pdf":
+        yield from _iter_pdf_pages(path)
+    elif file_type == "docx":
+        yield from _iter_docx_paragraphs(path)
+    else:
+        yield from _iter_text_paragraphs(path)
+
+
+def _iter_text_paragraphs(path) -> Iterator[str]:
+    """Read a text file in blocks and yield blank-line separated paragraphs."""
+    remainder = ""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            paragraphs = re.split(r"\n\s*\n", remainder + block)
+            # The last paragraph may continue in the next block
+            remainder = paragraphs.pop()
+            for paragraph in paragraphs:
+                if paragraph.strip():
+                    yield paragraph.strip()
+    if remainder.strip():
+        yield remainder.strip()
+
+
+def _iter_docx_paragraphs(path) -> Iterator[str]:
+    """Stream paragraphs from the document XML of a DOCX file with an incremental parser."""
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as xml_file:
+        for _, element in ElementTree.iterparse(xml_file, events=("end",)):
+            if element.tag == f"{_WORD_NS}p":
+                text = "".join(node.text or "" for node in element.iter(f"{_WORD_NS}t"))
+                if text.strip():
+                    yield text.strip()
+                # Free the parsed paragraph so memory stays flat on long documents
+                element.clear()
+
+
+def _iter_pdf_pages(path) -> Iterator[str]:
+    """Yield the text of a PDF one page at a time."""
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError("PDF ingestion requires pypdf; install it with 'pip install pypdf'") from e
+    reader = PdfReader(str(path))
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        if text.strip():
+            yield text.strip()
+
+
+def iter_string_blocks(text: str) -> Iterator[str]:
+    """Yield blank-line separated paragraphs of an in-memory string."""
+    for paragraph in re.split(r"\n\s*\n", text):
+        if paragraph.strip():
+            yield paragraph.strip()
+
+
+def _split_oversized(block: str, max_tokens: int) -> Iterator[str]:
+    """Split a block that exceeds the token limit at sentence, then word boundaries."""
+    pieces = re.split(r"(?<=[.!?])\s+", block)
+    if len(pieces) == 1:
+        pieces = block.split()
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece) + 1
+        if current and current_tokens + piece_tokens > max_tokens:
+            yield " ".join(current)
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        yield " ".join(current)
+
+
+def chunk_blocks(blocks: Iterable[str], max_tokens: int = 1500) -> Iterator[str]:
+    """
+    Group text blocks into chunks of at most max_tokens tokens, preserving block boundaries
+    where possible.
+
+    Args:
+        blocks (Iterable[str]): Text blocks, e.g. from iter_text_blocks
+        max_tokens (int): Token limit per chunk
+
+    Yields:
+        str: Token-bounded chunks
+    """
+    current = []
+    current_tokens = 0
+    for block in blocks:
+        block_tokens = count_tokens(block)
+        parts = [block] if block_tokens <= max_tokens else list(_split_oversized(block, max_tokens))
+        for part in parts:
+            part_tokens = block_tokens if len(parts) == 1 else count_tokens(part)
+            if current and current_tokens + part_tokens > max_tokens:
+                yield "\n\n".join(current)
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+    if current:
+        yield "\n\n".join(current)
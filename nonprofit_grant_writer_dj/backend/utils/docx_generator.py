@@ -2,22 +2,24 @@ from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 import io
-import re
+
+from .grant_schema import normalize_grant_content
 
 def generate_docx(content):
     """
     Generate a DOCX file from the grant content
     
     Args:
-        content (dict): A dictionary containing sections of the grant
+        content (dict): A dictionary containing sections of the grant, validated against GrantContent
         
     Returns:
         bytes: The DOCX file as bytes
     """
+    content = normalize_grant_content(content)
     doc = Document()
     
     # Add title
-    title = doc.add_heading(content.get('title', 'Grant Application'), 0)
+    title = doc.add_heading(content.get('title') or 'Grant Application', 0)
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
     # Add organization information
@@ -41,13 +43,8 @@ def generate_docx(content):
     
     # Add goals and objectives
     doc.add_heading('Goals and Objectives', level=1)
-    # Handle string input and strip HTML tags, splitting on newlines to avoid iterating characters
-    raw_goals = content.get('goals_objectives', [])
-    if isinstance(raw_goals, str):
-        clean_text = re.sub(r'<[^>]+>', '', raw_goals)
-        goals_list = [line.strip() for line in clean_text.split('\n') if line.strip()]
-    else:
-        goals_list = raw_goals
+    # Goals arrive as a list; editor HTML is split into one goal per paragraph by the schema
+    goals_list = content.get('goals_objectives', [])
 
     # Add each goal as a bulleted, bold run
     for goal in goals_list:
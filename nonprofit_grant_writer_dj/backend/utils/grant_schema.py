@@ -0,0 +1,175 @@
+import os
+import re
+import logging
+from typing import Any, Dict, List, Optional
+
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, field_validator
+
+logger = logging.getLogger(__name__)
+
+# Structured output modes, selected with GRANT_STRUCTURED_OUTPUT
+OUTPUT_JSON_SCHEMA = "json_schema"
+OUTPUT_JSON_OBJECT = "json_object"
+OUTPUT_OFF = "off"
+
+# Canonical section keys in document order, with the titles models and older clients use for them
+SECTION_ALIASES = {
+    "executive_summary": ("Executive Summary",),
+    "problem_statement": ("Problem Statement",),
+    "project_description": ("Project Description",),
+    "goals_objectives": ("Goals and Objectives", "goals_and_objectives"),
+    "implementation_plan": ("Implementation Plan",),
+    "evaluation": ("Evaluation and Impact", "evaluation_and_impact"),
+    "budget": ("Budget",),
+    "sustainability": ("Sustainability Plan", "sustainability_plan"),
+    "conclusion": ("Conclusion",),
+}
+
+
+def _section(key: str, default_factory=str) -> Any:
+    """Field accepting its canonical key, its title or an alternate key."""
+    return Field(default_factory=default_factory, validation_alias=AliasChoices(key, *SECTION_ALIASES[key]))
+
+
+def _text(value: Any) -> str:
+    """Flatten list or object output into paragraphs of text."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "\n".join(_text(item) for item in value)
+    if isinstance(value, dict):
+        return "\n".join(f"{key}: {_text(item)}" for key, item in value.items())
+    return str(value)
+
+
+class BudgetItem(BaseModel):
+    """A single line of the grant budget; accepts the alternate field names models use."""
+
+    item: str = Field(default="", validation_alias=AliasChoices("item", "category", "name"))
+    description: str = ""
+    amount: str = Field(default="0", validation_alias=AliasChoices("amount", "cost", "total"))
+
+    @field_validator("item", "description", "amount", mode="before")
+    @classmethod
+    def _as_text(cls, value):
+        return _text(value)
+
+
+class OrganizationInfo(BaseModel):
+    """The nonprofit the grant is written for."""
+
+    name: str = ""
+    mission: str = ""
+    website: str = ""
+
+
+class GrantContent(BaseModel):
+    """
+    Canonical grant content shared by the API, the review page and the DOCX export.
+    Validation accepts section titles ("Executive Summary") as well as canonical keys and
+    coerces loosely shaped model output, so every consumer reads the same key set.
+    """
+
+    model_config = ConfigDict(populate_by_name=True, extra="ignore")
+
+    title: str = ""
+    organization_info: OrganizationInfo = Field(default_factory=OrganizationInfo)
+    executive_summary: str = _section("executive_summary")
+    problem_statement: str = _section("problem_statement")
+    project_description: str = _section("project_description")
+    goals_objectives: List[str] = _section("goals_objectives", list)
+    implementation_plan: str = _section("implementation_plan")
+    evaluation: str = _section("evaluation")
+    budget: List[BudgetItem] = _section("budget", list)
+    sustainability: str = _section("sustainability")
+    conclusion: str = _section("conclusion")
+    quality_review: Optional[Dict[str, Any]] = None
+    alignment_review: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @field_validator("executive_summary", "problem_statement", "project_description", "implementation_plan",
+                     "evaluation", "sustainability", "conclusion", mode="before")
+    @classmethod
+    def _as_text(cls, value):
+        return _text(value)
+
+    @field_validator("goals_objectives", mode="before")
+    @classmethod
+    def _as_goal_list(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            # Edited content arrives as editor HTML; one goal per paragraph or line
+            text = re.sub(r"</p>|<br\s*/?>|</li>", "\n", value)
+            text = re.sub(r"<[^>]+>", "", text)
+            return [line.strip() for line in text.split("\n") if line.strip()]
+        if isinstance(value, dict):
+            return [_text(item) for item in value.values()]
+        return [_text(item) for item in value]
+
+    @field_validator("budget", mode="before")
+    @classmethod
+    def _as_budget_items(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [{"item": "Budget", "description": value, "amount": "0"}]
+        if isinstance(value, dict):
+            # An object of {item: amount}
+            return [{"item": item, "description": "", "amount": amount} for item, amount in value.items()]
+        # Lines written as plain text, e.g. "Staff: $5000"
+        return [{"item": item, "description": item} if isinstance(item, str) else item for item in value]
+
+
+class GrantDraft(BaseModel):
+    """Response schema for models asked to write every section at once in structured output mode."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    executive_summary: str
+    problem_statement: str
+    project_description: str
+    goals_objectives: List[str]
+    implementation_plan: str
+    evaluation: str
+    budget: List[BudgetItem]
+    sustainability: str
+    conclusion: str
+
+
+def normalize_grant_content(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate grant content from any source and return it with canonical keys.
+
+    Args:
+        data (Dict[str, Any]): Grant content, possibly keyed by section titles
+
+    Returns:
+        Dict[str, Any]: The content with canonical keys; unset reviews and errors are omitted
+
+    Raises:
+        pydantic.ValidationError: If the content cannot be coerced into the schema
+    """
+    return GrantContent.model_validate(data or {}).model_dump(exclude_none=True)
+
+
+def structured_output_settings(schema=GrantDraft) -> Dict[str, Any]:
+    """
+    Chat settings that ask the model for JSON output, per GRANT_STRUCTURED_OUTPUT.
+    "json_object" (the default) guarantees syntactically valid JSON; "json_schema" also constrains
+    the reply to the schema but needs API version 2024-08-01-preview or later; "off" sends neither.
+
+    Args:
+        schema (type[BaseModel]): Response schema used in json_schema mode
+
+    Returns:
+        Dict[str, Any]: Settings to pass to complete_chat or complete_json
+    """
+    mode = os.getenv("GRANT_STRUCTURED_OUTPUT", OUTPUT_JSON_OBJECT).lower()
+    if mode == OUTPUT_JSON_SCHEMA:
+        return {"response_format": schema}
+    if mode == OUTPUT_JSON_OBJECT:
+        return {"response_format": {"type": "json_object"}}
+    if mode != OUTPUT_OFF:
+        logger.warning(f"Unknown GRANT_STRUCTURED_OUTPUT mode {mode}; sending no response format")
+    return {}
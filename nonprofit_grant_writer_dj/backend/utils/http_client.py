@@ -0,0 +1,60 @@
+import os
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def create_pooled_client(prefix: str, timeout: float = 60.0, **kwargs) -> httpx.AsyncClient:
+    """
+    Create a keep-alive, connection-pooled async HTTP client.
+
+    Pool limits are read from environment variables named after the prefix:
+    <PREFIX>_MAX_CONNECTIONS, <PREFIX>_MAX_KEEPALIVE_CONNECTIONS,
+    <PREFIX>_KEEPALIVE_EXPIRY and <PREFIX>_TIMEOUT.
+
+    Args:
+        prefix (str): Environment variable prefix, e.g. "AZURE_OPENAI"
+        timeout (float): Default request timeout in seconds
+        **kwargs: Extra arguments passed to httpx.AsyncClient
+
+    Returns:
+        httpx.AsyncClient: The pooled client
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.getenv(f"{prefix}_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv(f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv(f"{prefix}_KEEPALIVE_EXPIRY", "30")),
+    )
+    timeout = float(os.getenv(f"{prefix}_TIMEOUT", str(timeout)))
+    logger.info(f"Creating pooled HTTP client for {prefix}: {limits}, timeout={timeout}s")
+    return httpx.AsyncClient(limits=limits, timeout=timeout, **kwargs)
+
+
+_shared_clients = {}
+
+
+def get_shared_client(prefix: str, timeout: float = 60.0) -> httpx.AsyncClient:
+    """
+    Get the process-wide pooled client for a prefix, creating it on first use.
+
+    Args:
+        prefix (str): Environment variable prefix, e.g. "SEARCH"
+        timeout (float): Default request timeout in seconds
+
+    Returns:
+        httpx.AsyncClient: The shared pooled client
+    """
+    client = _shared_clients.get(prefix)
+    if client is None or client.is_closed:
+        client = create_pooled_client(prefix, timeout=timeout)
+        _shared_clients[prefix] = client
+    return client
+
+
+async def close_shared_clients() -> None:
+    """Close every shared client."""
+    clients = list(_shared_clients.values())
+    _shared_clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+# Events after which a job stream is closed
+TERMINAL_EVENTS = ("completed", "failed", "cancelled")
+
+# Reporter for the job running in the current context, if any
+_current_reporter: ContextVar[Optional[Callable[[str, Dict[str, Any]], None]]] = ContextVar(
+    "current_progress_reporter", default=None
+)
+
+
+def report_progress(event: str, **data) -> None:
+    """
+    Report a progress event for the job running in the current context.
+    Does nothing when called outside of a job.
+
+    Args:
+        event (str): Event name, e.g. "research_started"
+        **data: JSON-serializable event payload
+    """
+    reporter = _current_reporter.get()
+    if reporter is None:
+        return
+    try:
+        reporter(event, data)
+    except Exception as e:
+        logger.error(f"Error reporting progress event {event}: {e}")
+
+
+@contextmanager
+def reporting_to(reporter: Callable[[str, Dict[str, Any]], None]):
+    """Route report_progress calls made in this context to the given reporter."""
+    token = _current_reporter.set(reporter)
+    try:
+        yield
+    finally:
+        _current_reporter.reset(token)
+
+
+class _Subscription:
+    """Events of one job queued for one subscriber, on the subscriber's event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def push(self, message: Dict[str, Any]) -> None:
+        """Queue an event for the subscriber; safe to call from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            # The subscriber's loop has closed
+            pass
+
+
+class JobEventBus:
+    """
+    Publish/subscribe hub for job progress events, stored in the job database.
+    Events published in this process are pushed to its subscribers at once. Events published
+    by worker processes are read from the database by one poller per subscribed job, off the
+    event loop, and fanned out to that job's subscribers. Subscribers start from the stored
+    history, so late subscribers receive every event. A "completed" event is stored without
+    the job's result, which is read from the job store when the event is delivered.
+    """
+
+    def __init__(self, store: JobStore, poll_interval: float = 1.0):
+        """
+        Initialize the event bus.
+
+        Args:
+            store (JobStore): Job store holding the event history
+            poll_interval (float): Seconds between checks of a subscribed job for events from other processes
+        """
+        self.store = store
+        self.poll_interval = poll_interval
+        self._subscriptions: Dict[str, List[_Subscription]] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, job_id: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Publish an event for a job. Safe to call from any thread.
+
+        Args:
+            job_id (str): The job ID
+            event (str): Event name
+            data (Optional[Dict[str, Any]]): Event payload
+        """
+        data = data or {}
+        # The result is already stored with the job; keep only a pointer to it in the history
+        stored = {k: v for k, v in data.items() if k != "data"} if event == "completed" else data
+        try:
+            message = self.store.add_event(job_id, event, stored)
+        except Exception as e:
+            logger.error(f"Error storing event {event} for job {job_id}: {e}")
+            return
+        self._dispatch(job_id, {**message, "data": data})
+
+    def _dispatch(self, job_id: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(job_id, ()))
+        for subscription in subscriptions:
+            subscription.push(message)
+
+    def has_history(self, job_id: str) -> bool:
+        """Check whether any events are known for a job."""
+        return self.store.has_events(job_id)
+
+    async def _load(self, job_id: str, after_id: int) -> List[Dict[str, Any]]:
+        """Read stored events off the event loop, filling in the result of a completed job."""
+        messages = await asyncio.to_thread(self.store.get_events, job_id, after_id)
+        for message in messages:
+            if message["event"] == "completed" and "data" not in message["data"]:
+                message["data"]["data"] = await asyncio.to_thread(self.store.get_result, job_id)
+        return messages
+
+    async def _poll(self, job_id: str, after_id: int) -> None:
+        """Fan events stored by other processes out to a job's subscribers until none remain."""
+        try:
+            while True:
+                await asyncio.sleep(self.poll_interval)
+                with self._lock:
+                    if not self._subscriptions.get(job_id):
+                        return
+                for message in await self._load(job_id, after_id):
+                    after_id = message["id"]
+                    self._dispatch(job_id, message)
+                    if message["event"] in TERMINAL_EVENTS:
+                        return
+        except Exception as e:
+            logger.error(f"Error polling events of job {job_id}: {e}")
+        finally:
+            with self._lock:
+                if self._pollers.get(job_id) is asyncio.current_task():
+                    del self._pollers[job_id]
+
+    async def subscribe(self, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Stream the events of a job, starting with its history.
+        Yields None as a heartbeat when no event arrives within the interval,
+        and stops after a terminal event.
+
+        Args:
+            job_id (str): The job ID
+            heartbeat (float): Seconds between heartbeats
+
+        Yields:
+            Optional[Dict[str, Any]]: Event messages, or None for heartbeats
+        """
+        subscription = _Subscription(asyncio.get_running_loop())
+        # Subscribe before reading the history so no event falls between the two
+        with self._lock:
+            self._subscriptions.setdefault(job_id, []).append(subscription)
+        seen = set()
+        try:
+            history = await self._load(job_id, 0)
+            for message in history:
+                seen.add(message["id"])
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+            with self._lock:
+                poller = self._pollers.get(job_id)
+                if poller is None or poller.done():
+                    after_id = history[-1]["id"] if history else 0
+                    self._pollers[job_id] = asyncio.create_task(self._poll(job_id, after_id))
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                # Events published here arrive both directly and from the poller
+                if message["id"] in seen:
+                    continue
+                seen.add(message["id"])
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                subscriptions = self._subscriptions.get(job_id, [])
+                if subscription in subscriptions:
+                    subscriptions.remove(subscription)
+                if not subscriptions:
+                    self._subscriptions.pop(job_id, None)
@@ -0,0 +1,465 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle states
+STATUS_QUEUED = "queued"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    request TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS idx_jobs_expires_at ON jobs (expires_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_events_job_id ON job_events (job_id, id);
+"""
+
+# Columns added after the initial schema, applied to existing databases on startup
+_MIGRATIONS = {
+    "context": "ALTER TABLE jobs ADD COLUMN context TEXT",
+    "priority": "ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0",
+    "worker_id": "ALTER TABLE jobs ADD COLUMN worker_id TEXT",
+    "heartbeat_at": "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL",
+    "attempts": "ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+    "cancel_requested": "ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class JobStore:
+    """
+    SQLite-backed store and queue for grant generation jobs.
+    Each job tracks its status, timestamps, request and result independently,
+    so concurrent generations never overwrite each other. The web app enqueues jobs
+    and worker processes claim them, heartbeating while they run; progress events
+    are stored alongside so any process can stream them.
+    """
+
+    def __init__(self, db_path, ttl_seconds: int = 86400, event_retention_seconds: int = 300):
+        """
+        Initialize the job store.
+
+        Args:
+            db_path (str | Path): Path of the SQLite database file
+            ttl_seconds (int): How long a job is kept after its last update
+            event_retention_seconds (int): How long a finished job's progress events are kept
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.event_retention_seconds = event_retention_seconds
+        self._lock = threading.Lock()
+        # The web app and every worker process write to the same database
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # WAL lets status reads proceed while a job result is being written
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+
+    def create_job(self, request_data: Dict[str, Any], priority: int = 0) -> str:
+        """
+        Enqueue a new job for a worker to claim.
+
+        Args:
+            request_data (Dict[str, Any]): The generation request payload
+            priority (int): Queue priority; lower values are claimed first
+
+        Returns:
+            str: The new job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at, expires_at, request, priority) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, STATUS_QUEUED, now, now, now + self.ttl_seconds, json.dumps(request_data), priority),
+            )
+        return job_id
+
+    def claim_job(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim the next queued job, by priority and then age, and mark it as processing.
+
+        Args:
+            worker_id (str): ID of the claiming worker
+
+        Returns:
+            Optional[Dict[str, Any]]: The job's ID, request and attempt number, or None if the queue is empty
+        """
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two workers never claim the same job
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, request, attempts FROM jobs WHERE status = ? AND expires_at > ? "
+                    "ORDER BY priority, created_at LIMIT 1",
+                    (STATUS_QUEUED, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker_id = ?, heartbeat_at = ?, attempts = attempts + 1, "
+                        "updated_at = ?, expires_at = ? WHERE id = ?",
+                        (STATUS_PROCESSING, worker_id, now, now, now + self.ttl_seconds, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"job_id": row["id"], "request": json.loads(row["request"]), "attempt": row["attempts"] + 1}
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """
+        Record that a worker is still running a job.
+
+        Args:
+            job_id (str): The job ID
+            worker_id (str): ID of the worker running it
+
+        Returns:
+            bool: False if the job is no longer held by the worker, e.g. it was reclaimed as stale
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+                (time.time(), job_id, worker_id, STATUS_PROCESSING),
+            )
+        return cursor.rowcount > 0
+
+    def release_job(self, job_id: str, worker_id: str) -> None:
+        """Return a job a worker is shutting down with to the queue, without counting the attempt."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = NULL, heartbeat_at = NULL, attempts = MAX(attempts - 1, 0), "
+                "updated_at = ?, expires_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+                (STATUS_QUEUED, now, now + self.ttl_seconds, job_id, worker_id, STATUS_PROCESSING),
+            )
+
+    def reclaim_stale(self, stale_seconds: float, max_attempts: int) -> Dict[str, List[str]]:
+        """
+        Requeue processing jobs whose worker stopped heartbeating, e.g. because it crashed.
+        Jobs that already used every attempt are failed, and jobs whose cancellation was
+        requested are cancelled, instead.
+
+        Args:
+            stale_seconds (float): Heartbeat age after which a worker is presumed dead
+            max_attempts (int): Attempts a job gets before it is failed
+
+        Returns:
+            Dict[str, List[str]]: IDs of the reclaimed jobs by their new status
+        """
+        now = time.time()
+        reclaimed = {STATUS_QUEUED: [], STATUS_FAILED: [], STATUS_CANCELLED: []}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs left processing by a web process from before the queue have no heartbeat
+                rows = self._conn.execute(
+                    "SELECT id, attempts, cancel_requested FROM jobs "
+                    "WHERE status = ? AND COALESCE(heartbeat_at, updated_at) < ?",
+                    (STATUS_PROCESSING, now - stale_seconds),
+                ).fetchall()
+                for row in rows:
+                    if row["cancel_requested"]:
+                        status, error = STATUS_CANCELLED, "Cancelled by user"
+                    elif row["attempts"] >= max_attempts:
+                        status, error = STATUS_FAILED, f"Worker stopped responding after {row['attempts']} attempts"
+                    else:
+                        status, error = STATUS_QUEUED, None
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, worker_id = NULL, heartbeat_at = NULL, "
+                        "updated_at = ?, expires_at = ? WHERE id = ?",
+                        (status, error, now, now + self.ttl_seconds, row["id"]),
+                    )
+                    reclaimed[status].append(row["id"])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if rows:
+            logger.warning(f"Reclaimed {len(rows)} jobs from unresponsive workers: "
+                           f"{len(reclaimed[STATUS_QUEUED])} requeued, {len(reclaimed[STATUS_FAILED])} failed")
+        return reclaimed
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a queued job, or flag a processing one for its worker to stop.
+
+        Args:
+            job_id (str): The job ID
+
+        Returns:
+            Optional[str]: STATUS_CANCELLED if the job was still queued, STATUS_PROCESSING if its
+                worker will stop it, or None if the job is not active
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, expires_at = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, "Cancelled by user", now, now + self.ttl_seconds, job_id, STATUS_QUEUED),
+            )
+            if cursor.rowcount:
+                return STATUS_CANCELLED
+            cursor = self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, STATUS_PROCESSING)
+            )
+        return STATUS_PROCESSING if cursor.rowcount else None
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """Check whether cancellation of a job was requested."""
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def complete_job(self, job_id: str, result: Dict[str, Any], worker_id: Optional[str] = None) -> bool:
+        """
+        Store the result of a finished job.
+
+        Args:
+            job_id (str): The job ID
+            result (Dict[str, Any]): The job result
+            worker_id (Optional[str]): Worker that ran the job; its result is dropped if the job
+                was reclaimed from it in the meantime
+
+        Returns:
+            bool: False if the job is no longer held by the worker
+        """
+        return self._update(job_id, STATUS_COMPLETED, result=json.dumps(result), worker_id=worker_id)
+
+    def save_context(self, job_id: str, context: Dict[str, Any], worker_id: Optional[str] = None) -> bool:
+        """
+        Store the research context a job's sections were drafted from, for later regeneration.
+
+        Args:
+            job_id (str): The job ID
+            context (Dict[str, Any]): The research context
+            worker_id (Optional[str]): Worker running the job; nothing is stored if the job was reclaimed from it
+
+        Returns:
+            bool: False if the job is no longer held by the worker
+        """
+        query, params = "UPDATE jobs SET context = ? WHERE id = ?", [json.dumps(context), job_id]
+        if worker_id is not None:
+            query += " AND worker_id = ? AND status = ?"
+            params += [worker_id, STATUS_PROCESSING]
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        return cursor.rowcount > 0
+
+    def get_context(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored research context of a job.
+
+        Args:
+            job_id (str): The job ID
+
+        Returns:
+            Optional[Dict[str, Any]]: The research context, or None if none was stored
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT context FROM jobs WHERE id = ? AND expires_at > ?",
+                (job_id, time.time()),
+            ).fetchone()
+        if row is None or row["context"] is None:
+            return None
+        return json.loads(row["context"])
+
+    def update_section(self, job_id: str, section: str, content: Any) -> Optional[Dict[str, Any]]:
+        """
+        Replace one section of a completed job's result.
+
+        Args:
+            job_id (str): The job ID
+            section (str): Section key
+            content (Any): The new section content
+
+        Returns:
+            Optional[Dict[str, Any]]: The updated result, or None if the job has no result
+        """
+        now = time.time()
+        # Read and write under one lock so concurrent section updates are not lost
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND expires_at > ?", (job_id, now)
+            ).fetchone()
+            if row is None or row["result"] is None:
+                return None
+            result = json.loads(row["result"])
+            result[section] = content
+            self._conn.execute(
+                "UPDATE jobs SET result = ?, updated_at = ?, expires_at = ? WHERE id = ?",
+                (json.dumps(result), now, now + self.ttl_seconds, job_id),
+            )
+        return result
+
+    def fail_job(self, job_id: str, error: str, worker_id: Optional[str] = None) -> bool:
+        """Mark a job as failed with an error message; see complete_job for worker_id."""
+        return self._update(job_id, STATUS_FAILED, error=error, worker_id=worker_id)
+
+    def cancel_job(self, job_id: str, worker_id: Optional[str] = None) -> bool:
+        """Mark a job as cancelled; see complete_job for worker_id."""
+        return self._update(job_id, STATUS_CANCELLED, error="Cancelled by user", worker_id=worker_id)
+
+    def _update(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None,
+                worker_id: Optional[str] = None) -> bool:
+        now = time.time()
+        query = ("UPDATE jobs SET status = ?, result = COALESCE(?, result), error = COALESCE(?, error), "
+                 "updated_at = ?, expires_at = ? WHERE id = ?")
+        params = [status, result, error, now, now + self.ttl_seconds, job_id]
+        if worker_id is not None:
+            # A worker only finishes jobs it still holds, not ones requeued for another worker
+            query += " AND worker_id = ? AND status = ?"
+            params += [worker_id, STATUS_PROCESSING]
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        return cursor.rowcount > 0
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a job without loading its result.
+
+        Args:
+            job_id (str): The job ID
+
+        Returns:
+            Optional[Dict[str, Any]]: Job status and timestamps, or None if unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, created_at, updated_at, error FROM jobs WHERE id = ? AND expires_at > ?",
+                (job_id, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "error": row["error"],
+        }
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored result of a completed job.
+
+        Args:
+            job_id (str): The job ID
+
+        Returns:
+            Optional[Dict[str, Any]]: The job result, or None if not available
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND expires_at > ?",
+                (job_id, time.time()),
+            ).fetchone()
+        if row is None or row["result"] is None:
+            return None
+        return json.loads(row["result"])
+
+    def add_event(self, job_id: str, event: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Append a progress event to a job's history.
+
+        Args:
+            job_id (str): The job ID
+            event (str): Event name
+            data (Dict[str, Any]): Event payload
+
+        Returns:
+            Dict[str, Any]: The stored event, as returned by get_events
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO job_events (job_id, event, data, timestamp) VALUES (?, ?, ?, ?)",
+                (job_id, event, json.dumps(data), now),
+            )
+        return {"id": cursor.lastrowid, "event": event, "data": data, "timestamp": now}
+
+    def get_events(self, job_id: str, after_id: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get a job's progress events in the order they were added.
+
+        Args:
+            job_id (str): The job ID
+            after_id (int): Only return events added after the event with this ID
+
+        Returns:
+            List[Dict[str, Any]]: Events with their ID, name, payload and timestamp
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, event, data, timestamp FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, after_id),
+            ).fetchall()
+        return [
+            {"id": row["id"], "event": row["event"], "data": json.loads(row["data"]), "timestamp": row["timestamp"]}
+            for row in rows
+        ]
+
+    def has_events(self, job_id: str) -> bool:
+        """Check whether any progress events are stored for a job."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM job_events WHERE job_id = ? LIMIT 1", (job_id,)).fetchone()
+        return row is not None
+
+    def evict_expired(self) -> int:
+        """
+        Delete jobs whose TTL has elapsed, and the progress events of jobs that finished
+        more than the event retention ago.
+
+        Returns:
+            int: Number of jobs removed
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM job_events WHERE job_id NOT IN "
+                "(SELECT id FROM jobs WHERE status IN (?, ?) OR updated_at > ?)",
+                (STATUS_QUEUED, STATUS_PROCESSING, now - self.event_retention_seconds),
+            )
+        if cursor.rowcount:
+            logger.info(f"Evicted {cursor.rowcount} expired jobs")
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
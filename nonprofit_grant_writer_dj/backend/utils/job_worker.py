@@ -0,0 +1,163 @@
+import os
+import socket
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from .job_events import JobEventBus, reporting_to
+from .job_store import JobStore, STATUS_CANCELLED, STATUS_FAILED, STATUS_QUEUED
+from .metrics import REGISTRY, collecting_timings, timed
+from .rate_limiter import PRIORITIES, PRIORITY_BATCH, scheduling_priority
+
+logger = logging.getLogger(__name__)
+
+# Finished generation jobs by outcome
+JOBS_FINISHED = REGISTRY.counter("grant_jobs_total", "Generation jobs by final status")
+
+# Why a worker stopped one of its jobs
+_STOP_CANCEL = "cancel"
+_STOP_RELEASE = "release"
+_STOP_LOST = "lost"
+
+
+class JobWorker:
+    """
+    Runs queued generation jobs from the job store on the current event loop.
+    Claims up to `concurrency` jobs at a time, heartbeats each while it runs, stops jobs
+    whose cancellation was requested, and requeues the jobs of workers that stopped
+    heartbeating. On shutdown, unfinished jobs go back to the queue for another worker.
+    """
+
+    def __init__(self, store: JobStore, events: JobEventBus, orchestrator: Any, concurrency: Optional[int] = None,
+                 worker_id: Optional[str] = None):
+        """
+        Initialize the worker.
+
+        Args:
+            store (JobStore): Job store to claim jobs from
+            events (JobEventBus): Event bus the jobs' progress is published to
+            orchestrator (Any): Orchestrator that generates grant content
+            concurrency (Optional[int]): Jobs run at once; defaults to WORKER_CONCURRENCY
+            worker_id (Optional[str]): ID recorded on claimed jobs; defaults to host and process ID
+        """
+        self.store = store
+        self.events = events
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency or int(os.getenv("WORKER_CONCURRENCY", "4"))
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = float(os.getenv("WORKER_POLL_SECONDS", "1.0"))
+        self.heartbeat_interval = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "10"))
+        self.stale_seconds = float(os.getenv("JOB_STALE_SECONDS", "60"))
+        self.max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stop_reasons: Dict[str, str] = {}
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def run(self) -> None:
+        """Claim and run jobs until stop() is called."""
+        logger.info(f"Worker {self.worker_id} running up to {self.concurrency} jobs")
+        # Created here so the event belongs to the loop the worker runs on
+        self._stopping = asyncio.Event()
+        heartbeats = asyncio.create_task(self._heartbeat())
+        try:
+            while not self._stopping.is_set():
+                while len(self._running) < self.concurrency and not self._stopping.is_set():
+                    job = self.store.claim_job(self.worker_id)
+                    if job is None:
+                        break
+                    self._running[job["job_id"]] = asyncio.create_task(self._run_job(job))
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            heartbeats.cancel()
+            # Hand unfinished jobs back to the queue rather than losing them
+            for job_id, task in list(self._running.items()):
+                self._stop_reasons.setdefault(job_id, _STOP_RELEASE)
+                task.cancel()
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def stop(self) -> None:
+        """Stop claiming jobs and requeue the ones still running."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def _heartbeat(self) -> None:
+        """Keep this worker's claims alive, stop cancelled jobs and reclaim jobs from dead workers."""
+        while True:
+            try:
+                for job_id, task in list(self._running.items()):
+                    if not self.store.heartbeat(job_id, self.worker_id):
+                        logger.warning(f"Job {job_id} was reclaimed from worker {self.worker_id}; abandoning it")
+                        self._stop_reasons[job_id] = _STOP_LOST
+                        task.cancel()
+                    elif self.store.cancel_requested(job_id):
+                        self._stop_reasons[job_id] = _STOP_CANCEL
+                        task.cancel()
+                reclaimed = self.store.reclaim_stale(self.stale_seconds, self.max_attempts)
+                for job_id in reclaimed[STATUS_QUEUED]:
+                    self.events.publish(job_id, "requeued", {"job_id": job_id, "message": "Restarting on another worker"})
+                for job_id in reclaimed[STATUS_FAILED]:
+                    self.events.publish(job_id, "failed", {"job_id": job_id, "message": "Worker stopped responding"})
+                    JOBS_FINISHED.inc(status="failed")
+                for job_id in reclaimed[STATUS_CANCELLED]:
+                    self.events.publish(job_id, "cancelled", {"job_id": job_id, "message": "Cancelled by user"})
+                    JOBS_FINISHED.inc(status="cancelled")
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} heartbeat error: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        """Generate the grant for one claimed job and store its outcome."""
+        job_id = job["job_id"]
+        request = job["request"]
+        self.events.publish(job_id, "started", {"attempt": job["attempt"]})
+        try:
+            # Agent progress is reported to this job's event history
+            context = {}
+            with reporting_to(lambda event, payload: self.events.publish(job_id, event, payload)), \
+                    scheduling_priority(PRIORITIES.get(request.get("priority"), PRIORITY_BATCH)), \
+                    collecting_timings() as timings, timed("job", "generate"):
+                result = await self.orchestrator.generate_grant_content(
+                    request.get("nonprofit_website", ""),
+                    request.get("grant_url", ""),
+                    request.get("nonprofit_name", ""),
+                    request.get("nonprofit_mission", ""),
+                    context
+                )
+            # Where the job spent its time, by agent, stage and external call
+            result["timings"] = timings.summary()
+            # Keep the research so single sections can be regenerated without repeating it
+            if self.store.save_context(job_id, context, self.worker_id) and \
+                    self.store.complete_job(job_id, result, self.worker_id):
+                self.events.publish(job_id, "completed", {"job_id": job_id, "data": result})
+                JOBS_FINISHED.inc(status="completed")
+            else:
+                self._reclaimed(job_id)
+        except asyncio.CancelledError:
+            reason = self._stop_reasons.pop(job_id, _STOP_CANCEL)
+            if reason == _STOP_RELEASE:
+                logger.info(f"Returning job {job_id} to the queue")
+                self.store.release_job(job_id, self.worker_id)
+                self.events.publish(job_id, "requeued", {"job_id": job_id, "message": "Restarting on another worker"})
+            elif reason == _STOP_CANCEL:
+                logger.info(f"Generation cancelled for job {job_id}")
+                if self.store.cancel_job(job_id, self.worker_id):
+                    self.events.publish(job_id, "cancelled", {"job_id": job_id, "message": "Cancelled by user"})
+                    JOBS_FINISHED.inc(status="cancelled")
+                else:
+                    self._reclaimed(job_id)
+        except Exception as e:
+            logger.error(f"Generation error for job {job_id}: {e}")
+            if self.store.fail_job(job_id, str(e), self.worker_id):
+                self.events.publish(job_id, "failed", {"job_id": job_id, "message": str(e)})
+                JOBS_FINISHED.inc(status="failed")
+            else:
+                self._reclaimed(job_id)
+        finally:
+            self._running.pop(job_id, None)
+
+    def _reclaimed(self, job_id: str) -> None:
+        """Drop the outcome of a job that was requeued for another worker while this one ran it."""
+        logger.warning(f"Job {job_id} was reclaimed from worker {self.worker_id}; dropping its outcome")
@@ -0,0 +1,264 @@
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bare words models emit in place of JSON literals
+_LITERALS = {"True": "true", "False": "false", "None": "null", "true": "true", "false": "false", "null": "null"}
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Control characters escaped inside strings; others are dropped
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+
+class JSONParseError(ValueError):
+    """Raised when no valid JSON value can be recovered from model output."""
+
+    def __init__(self, message: str, text: str = ""):
+        super().__init__(message)
+        self.text = text
+
+
+class StreamingJSONParser:
+    """
+    Single-pass, string-aware extractor for the first JSON object or array in model output.
+    Text can be fed as it streams in; surrounding prose and markdown fences are skipped,
+    and common model defects are repaired on the fly: raw control characters in strings,
+    single-quoted strings, Python literals, trailing commas and output cut off mid-value.
+    Top-level fields are reported through on_field as soon as each one closes.
+    """
+
+    def __init__(self, root: Optional[str] = None, on_field: Optional[Callable[[Any, Any], None]] = None):
+        """
+        Initialize the parser.
+
+        Args:
+            root (Optional[str]): "{" or "[" to extract only an object or array; either when omitted
+            on_field (Optional[Callable[[Any, Any], None]]): Called with (key, value) for each top-level
+                object member, or (index, item) for each top-level array item, once it is complete
+        """
+        if root not in (None, "{", "["):
+            raise ValueError(f"root must be '{{', '[' or None, not {root!r}")
+        self.root = root
+        self.on_field = on_field
+        self.done = False
+        self._raw: List[str] = []
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._word: List[str] = []
+        self._member_start = 0
+        self._member_index = 0
+        # Output length and open containers after the last complete member, for truncated output
+        self._safe_point: Optional[Tuple[int, List[str]]] = None
+
+    def feed(self, text: str) -> None:
+        """
+        Consume the next piece of model output.
+
+        Args:
+            text (str): Text as it arrives from the model
+        """
+        self._raw.append(text)
+        for char in text:
+            if self.done:
+                return
+            if not self._stack:
+                if char in (self.root or "{["):
+                    self._open(char)
+            elif self._quote is not None:
+                self._string_char(char)
+            else:
+                self._structural_char(char)
+
+    def _open(self, char: str) -> None:
+        self._out.append(char)
+        self._stack.append(char)
+        if len(self._stack) == 1:
+            self._member_start = len(self._out)
+
+    def _string_char(self, char: str) -> None:
+        out = self._out
+        if self._escape:
+            self._escape = False
+            # \' is only meaningful inside single-quoted strings
+            out.append("'" if char == "'" else "\\" + char)
+        elif char == "\\":
+            self._escape = True
+        elif char == self._quote:
+            out.append('"')
+            self._quote = None
+        elif char == '"':
+            out.append('\\"')
+        elif char < " ":
+            escaped = _STRING_ESCAPES.get(char)
+            if escaped:
+                out.append(escaped)
+        else:
+            out.append(char)
+
+    def _structural_char(self, char: str) -> None:
+        if char.isalnum() or char in "+-._":
+            self._word.append(char)
+            return
+        self._flush_word()
+        if char in ('"', "'"):
+            self._quote = char
+            self._out.append('"')
+        elif char in "{[":
+            self._open(char)
+        elif char in "}]":
+            self._strip_trailing_comma()
+            depth = len(self._stack)
+            self._stack.pop()
+            self._out.append(char)
+            if depth == 1:
+                self._member_done(len(self._out) - 1)
+                self.done = True
+        elif char == ",":
+            if len(self._stack) == 1:
+                self._member_done(len(self._out))
+            self._safe_point = (len(self._out), list(self._stack))
+            self._out.append(",")
+            if len(self._stack) == 1:
+                self._member_start = len(self._out)
+        elif char == ":" or char.isspace():
+            self._out.append(char)
+
+    def _flush_word(self) -> None:
+        if not self._word:
+            return
+        word = "".join(self._word)
+        self._word = []
+        self._out.append(_LITERALS.get(word, word))
+
+    def _strip_trailing_comma(self) -> None:
+        out = self._out
+        i = len(out)
+        while i > 0 and out[i - 1].isspace():
+            i -= 1
+        if i > 0 and out[i - 1] == ",":
+            del out[i - 1:]
+
+    def _member_done(self, end: int) -> None:
+        """Report a complete top-level member given where it ends in the output."""
+        if self.on_field is None:
+            return
+        member = "".join(self._out[self._member_start:end]).strip()
+        if not member:
+            return
+        try:
+            if self._out[0] == "[":
+                key, value = self._member_index, json.loads(member)
+            else:
+                key, value = next(iter(json.loads("{" + member + "}").items()))
+        except (ValueError, StopIteration):
+            return
+        self._member_index += 1
+        try:
+            self.on_field(key, value)
+        except Exception as e:
+            logger.error(f"Error handling JSON field {key}: {e}")
+
+    def close(self) -> Any:
+        """
+        Finish parsing and return the extracted value.
+        Output that stopped mid-value is closed at the last complete member.
+
+        Returns:
+            Any: The parsed JSON object or array
+
+        Raises:
+            JSONParseError: If no JSON value can be recovered
+        """
+        raw = "".join(self._raw)
+        if not self._out:
+            raise JSONParseError("No JSON value found in model output", raw)
+        if self.done:
+            return self._loads("".join(self._out), raw)
+
+        # Truncated output: close the open string and containers
+        self._flush_word()
+        completed = list(self._out)
+        if self._quote is not None:
+            completed.append('"')
+        text = "".join(completed).rstrip().rstrip(",")
+        if text.endswith(":"):
+            text += " null"
+        text += "".join(_CLOSERS[c] for c in reversed(self._stack))
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+        if self._safe_point is None:
+            raise JSONParseError("Model output ended before any complete JSON value", raw)
+        end, stack = self._safe_point
+        text = "".join(self._out[:end]) + "".join(_CLOSERS[c] for c in reversed(stack))
+        logger.warning("Model output was truncated; keeping the complete part of the JSON value")
+        return self._loads(text, raw)
+
+    @staticmethod
+    def _loads(text: str, raw: str) -> Any:
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            raise JSONParseError(f"Invalid JSON in model output: {e}", raw) from e
+
+
+def validate_json(value: Any, schema: Optional[Any]) -> Any:
+    """
+    Check that a parsed object has the required fields with the expected types.
+
+    Args:
+        value (Any): The parsed value
+        schema (Optional[Any]): Field name to type (or tuple of types), or a pydantic model class;
+            None skips validation
+
+    Returns:
+        Any: The value, unchanged, or the validated model instance for a pydantic schema
+
+    Raises:
+        JSONParseError: If the value does not match the schema
+    """
+    if schema is None:
+        return value
+    if hasattr(schema, "model_validate"):
+        try:
+            return schema.model_validate(value)
+        except ValueError as e:
+            raise JSONParseError(f"Model output does not match {schema.__name__}: {e}") from e
+    if not isinstance(value, dict):
+        raise JSONParseError(f"Expected a JSON object, got {type(value).__name__}")
+    for field, expected in schema.items():
+        if field not in value:
+            raise JSONParseError(f"Missing field: {field}")
+        if not isinstance(value[field], expected):
+            raise JSONParseError(f"Field {field} has type {type(value[field]).__name__}")
+    return value
+
+
+def parse_json(text: str, root: Optional[str] = None, schema: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Extract, repair and validate the first JSON object or array in model output.
+
+    Args:
+        text (str): The complete model output
+        root (Optional[str]): "{" or "[" to extract only an object or array
+        schema (Optional[Dict[str, Any]]): Required fields and types, see validate_json
+
+    Returns:
+        Any: The parsed value
+
+    Raises:
+        JSONParseError: If no valid value can be recovered
+    """
+    parser = StreamingJSONParser(root)
+    parser.feed(text or "")
+    try:
+        return validate_json(parser.close(), schema)
+    except JSONParseError as e:
+        e.text = e.text or text
+        raise
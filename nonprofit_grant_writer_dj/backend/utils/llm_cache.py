@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Default on-disk location, next to the job store
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "llm_cache.db"
+
+# Disk hits whose access times are buffered before they are written in one batch
+TOUCH_BATCH_SIZE = 64
+
+
+def make_cache_key(deployment: str, instructions: str, prompt: str, settings: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build a content-addressed key for a chat completion.
+
+    Args:
+        deployment (str): Model deployment name
+        instructions (str): Agent system instructions
+        prompt (str): User prompt
+        settings (Optional[Dict[str, Any]]): Sampling and tool settings
+
+    Returns:
+        str: SHA-256 hex digest identifying the completion
+    """
+    payload = json.dumps(
+        {"deployment": deployment, "instructions": instructions, "prompt": prompt, "settings": settings or {}},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Two-tier cache for chat completions: an in-memory LRU in front of a SQLite store.
+    Both tiers expire entries after a TTL; the disk tier is bounded by entry count.
+    The disk tier is shared by every app and worker process, so its errors are logged
+    and treated as misses rather than failing the agent call.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, ttl_seconds: int = 604800,
+                 memory_size: int = 512, max_disk_entries: int = 10000):
+        """
+        Initialize the completion cache.
+
+        Args:
+            db_path (str | Path | None): SQLite file for the disk tier; None disables it
+            ttl_seconds (int): Time-to-live of a cached completion
+            memory_size (int): Maximum number of completions kept in memory
+            max_disk_entries (int): Maximum number of completions kept on disk
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl_seconds)
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        # Access times of disk hits not yet written, by key
+        self._touched: Dict[str, float] = {}
+        self._disk_entries = 0
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_accessed_at ON completions (accessed_at)")
+            self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a completion, promoting disk hits into memory.
+
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            Optional[str]: The cached completion text, or None on a miss
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self._conn is not None:
+            now = time.time()
+            try:
+                with self._lock:
+                    row = self._conn.execute(
+                        "SELECT value FROM completions WHERE key = ? AND created_at > ?",
+                        (key, now - self.ttl_seconds),
+                    ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Error reading completion cache, treating as a miss: {e}")
+                row = None
+            if row is not None:
+                # Hits take no write lock; their access times are written in batches
+                self._touch(key, now)
+                self.disk_hits += 1
+                self.memory.set(key, row[0])
+                return row[0]
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a completion in both tiers.
+
+        Args:
+            key (str): Cache key from make_cache_key
+            value (str): Completion text
+        """
+        self.memory.set(key, value)
+        if self._conn is None:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._disk_entries += 1
+                self._flush_touches()
+                if self._disk_entries > self.max_disk_entries:
+                    self._evict(now)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing completion cache: {e}")
+
+    def _touch(self, key: str, now: float) -> None:
+        """Buffer the access time of a disk hit, writing the buffer once it is full."""
+        try:
+            with self._lock:
+                self._touched[key] = now
+                if len(self._touched) >= TOUCH_BATCH_SIZE:
+                    self._flush_touches()
+        except sqlite3.Error as e:
+            # Only the LRU order of the disk tier suffers
+            logger.debug(f"Could not record completion cache access times: {e}")
+
+    def _flush_touches(self) -> None:
+        """Write the buffered access times of disk hits. Called with the lock held."""
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._conn.executemany(
+            "UPDATE completions SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in touched.items()],
+        )
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries and the least recently used ones beyond the size bound."""
+        self._conn.execute("DELETE FROM completions WHERE created_at <= ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM completions WHERE key IN ("
+            "SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        # Other processes write to the same table, so recount rather than track
+        self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters for both tiers."""
+        memory = self.memory.stats()
+        return {
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_size": memory["size"],
+        }
+
+
+_cache: Optional[CompletionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """
+    Get the process-wide completion cache configured from the environment.
+
+    Returns:
+        Optional[CompletionCache]: The cache, or None if LLM_CACHE_ENABLED is false
+    """
+    global _cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            disk_path = os.getenv("LLM_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+            _cache = CompletionCache(
+                db_path=disk_path or None,
+                ttl_seconds=int(os.getenv("LLM_CACHE_TTL", "604800")),
+                memory_size=int(os.getenv("LLM_CACHE_MEMORY_SIZE", "512")),
+                max_disk_entries=int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "10000")),
+            )
+        return _cache
@@ -0,0 +1,289 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets in seconds, from a cached search to a full-document rewrite
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Add to the counter of a label set."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(key)} {_format_number(value)}" for key, value in sorted(values.items())]
+
+
+class Histogram:
+    """Observations bucketed by size per label set, with their count and sum."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """Record an observation for a label set."""
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # Per-bucket counts, then count and sum
+            counts = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        lines = []
+        for key, counts in sorted(values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_number(bound)))} "
+                             f"{_format_number(cumulative)}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {_format_number(counts[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_number(counts[-2])}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_number(round(counts[-1], 6))}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Get or create a counter."""
+        return self._get(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DURATION_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        return self._get(name, lambda: Histogram(name, help_text, buckets))
+
+    def _get(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+OPERATION_SECONDS = REGISTRY.histogram(
+    "grant_operation_duration_seconds", "Wall time of instrumented operations by kind and name"
+)
+OPERATION_ERRORS = REGISTRY.counter("grant_operation_errors_total", "Instrumented operations that raised")
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "grant_llm_time_to_first_token_seconds", "Time until the first streamed token of an agent completion"
+)
+LLM_TOKENS = REGISTRY.counter("grant_llm_tokens_total", "Prompt and completion tokens by agent")
+LLM_CACHE = REGISTRY.counter("grant_llm_cache_total", "Agent completions served from the cache or the model")
+LLM_COST = REGISTRY.counter("grant_llm_cost_usd_total", "Estimated model cost by agent, per LLM_*_COST_PER_1K")
+
+
+class JobTimings:
+    """
+    Timing and token breakdown of a single job.
+    Shared by every task the job starts, so updates are locked.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._operations: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._agents: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add_operation(self, kind: str, name: str, seconds: float) -> None:
+        """Record one operation."""
+        with self._lock:
+            entry = self._operations.setdefault((kind, name), {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    def add_completion(self, agent: str, prompt_tokens: int, completion_tokens: int, cached: bool,
+                       first_token_seconds: Optional[float], cost: float) -> None:
+        """Record the tokens of one agent completion."""
+        with self._lock:
+            entry = self._agents.setdefault(agent, {
+                "calls": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cost_usd": 0.0, "max_time_to_first_token": 0.0
+            })
+            entry["calls"] += 1
+            entry["cache_hits"] += int(cached)
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["cost_usd"] += cost
+            if first_token_seconds is not None:
+                entry["max_time_to_first_token"] = max(entry["max_time_to_first_token"], first_token_seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the job's timings.
+        Operations overlap when they run concurrently, so their seconds can add up to more than total_seconds.
+
+        Returns:
+            Dict[str, Any]: Total wall time, operations by kind and name, and token use by agent
+        """
+        with self._lock:
+            operations: Dict[str, Dict[str, Any]] = {}
+            for (kind, name), entry in sorted(self._operations.items()):
+                operations.setdefault(kind, {})[name] = {
+                    "calls": entry["calls"],
+                    "seconds": round(entry["seconds"], 3),
+                    "max_seconds": round(entry["max_seconds"], 3)
+                }
+            agents = {
+                agent: {**entry, "cost_usd": round(entry["cost_usd"], 6),
+                        "max_time_to_first_token": round(entry["max_time_to_first_token"], 3)}
+                for agent, entry in sorted(self._agents.items())
+            }
+        return {"total_seconds": round(time.monotonic() - self.started, 3), "operations": operations, "agents": agents}
+
+
+# Timings of the job running in the current context, if any
+_current_timings: ContextVar[Optional[JobTimings]] = ContextVar("current_job_timings", default=None)
+
+
+@contextmanager
+def collecting_timings():
+    """
+    Collect the timings of operations run in this context, including tasks and threads it starts.
+
+    Yields:
+        JobTimings: The job's timings
+    """
+    timings = JobTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def timed(kind: str, name: str):
+    """
+    Time an operation into grant_operation_duration_seconds and the current job's timings.
+
+    Args:
+        kind (str): Operation kind, e.g. "llm", "search", "vector_store"
+        name (str): Operation name within its kind, e.g. the agent or engine
+    """
+    start = time.monotonic()
+    try:
+        yield
+    except BaseException:
+        OPERATION_ERRORS.inc(kind=kind, name=name)
+        raise
+    finally:
+        seconds = time.monotonic() - start
+        OPERATION_SECONDS.observe(seconds, kind=kind, name=name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add_operation(kind, name, seconds)
+
+
+def _cost_per_1k(kind: str) -> float:
+    try:
+        return float(os.getenv(f"LLM_{kind}_COST_PER_1K", "0"))
+    except ValueError:
+        logger.warning(f"Invalid LLM_{kind}_COST_PER_1K; not estimating cost")
+        return 0.0
+
+
+def record_completion(agent: str, prompt_tokens: int, completion_tokens: int, cached: bool = False,
+                      first_token_seconds: Optional[float] = None) -> None:
+    """
+    Record the tokens, cache use and time to first token of an agent completion.
+
+    Args:
+        agent (str): Agent name
+        prompt_tokens (int): Prompt tokens sent to the model (0 for cache hits)
+        completion_tokens (int): Completion tokens received
+        cached (bool): Whether the completion was served from the cache
+        first_token_seconds (Optional[float]): Seconds until the first streamed token, if streamed
+    """
+    LLM_TOKENS.inc(prompt_tokens, agent=agent, type="prompt")
+    LLM_TOKENS.inc(completion_tokens, agent=agent, type="completion")
+    LLM_CACHE.inc(agent=agent, result="hit" if cached else "miss")
+    cost = (prompt_tokens * _cost_per_1k("PROMPT") + completion_tokens * _cost_per_1k("COMPLETION")) / 1000
+    if cost:
+        LLM_COST.inc(cost, agent=agent)
+    if first_token_seconds is not None:
+        LLM_FIRST_TOKEN_SECONDS.observe(first_token_seconds, agent=agent)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_completion(agent, prompt_tokens, completion_tokens, cached, first_token_seconds, cost)
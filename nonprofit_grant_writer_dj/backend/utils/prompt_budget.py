@@ -0,0 +1,143 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from .tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Default prompt budget in tokens when no per-agent budget is configured
+DEFAULT_PROMPT_BUDGET = 6000
+
+# Fields that add little to a prompt and are pruned from structured inputs
+LOW_RELEVANCE_KEYS = {"raw_content", "links", "error"}
+
+# Fields allotted fewer tokens than this are dropped rather than truncated
+MIN_FIELD_TOKENS = 48
+
+
+class PromptBudgetError(ValueError):
+    """Raised when the fields a prompt cannot do without do not fit its token budget."""
+
+
+def get_prompt_budget(agent_name: str) -> int:
+    """
+    Get the prompt token budget of an agent.
+    Reads PROMPT_BUDGET_<AGENT_NAME> (e.g. PROMPT_BUDGET_WRITERAGENT), then PROMPT_TOKEN_BUDGET.
+
+    Args:
+        agent_name (str): Agent name, e.g. "WriterAgent"
+
+    Returns:
+        int: Maximum prompt size in tokens
+    """
+    budget = os.getenv(f"PROMPT_BUDGET_{agent_name.upper()}") or os.getenv("PROMPT_TOKEN_BUDGET")
+    return int(budget) if budget else DEFAULT_PROMPT_BUDGET
+
+
+def prune(value: Any) -> Any:
+    """Recursively drop empty values and low-relevance keys from structured input."""
+    if isinstance(value, dict):
+        pruned = {k: prune(v) for k, v in value.items() if k not in LOW_RELEVANCE_KEYS}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        return [item for item in (prune(v) for v in value) if item not in (None, "", [], {})]
+    return value
+
+
+def format_value(value: Any) -> str:
+    """Render a prompt field as text; structured values become compact JSON."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, indent=1, ensure_ascii=False, default=str)
+
+
+class PromptBuilder:
+    """
+    Builds agent prompts within a token budget.
+    Fields are measured after formatting; when the prompt is too large they are compacted:
+    empty and low-relevance data is pruned, fields are truncated in proportion to their
+    priority, and the lowest-priority fields are dropped if they no longer fit.
+    Required fields, such as the text an agent is asked to rewrite, are never shortened.
+    """
+
+    def __init__(self, agent_name: str, budget: Optional[int] = None):
+        """
+        Initialize the prompt builder.
+
+        Args:
+            agent_name (str): Agent name used for the budget lookup and logging
+            budget (Optional[int]): Prompt budget in tokens; read from the environment if omitted
+        """
+        self.agent_name = agent_name
+        self.budget = budget or get_prompt_budget(agent_name)
+
+    def build(self, template: str, priorities: Optional[Dict[str, int]] = None,
+              required: Iterable[str] = (), **fields) -> str:
+        """
+        Fill a str.format template with fields, compacting them to fit the budget.
+
+        Args:
+            template (str): Prompt template with {field} placeholders (literal braces doubled)
+            priorities (Optional[Dict[str, int]]): Relative importance of each field (default 1)
+            required (Iterable[str]): Fields passed through whole; only the others are compacted
+            **fields: Values for the placeholders
+
+        Returns:
+            str: The prompt
+
+        Raises:
+            PromptBudgetError: If the template and required fields together exceed the budget
+        """
+        priorities = priorities or {}
+        required = set(required)
+        texts = {name: format_value(prune(value)) for name, value in fields.items()}
+        overhead = count_tokens(template.format(**{name: "" for name in fields}))
+        sizes = {name: count_tokens(text) for name, text in texts.items()}
+        total = overhead + sum(sizes.values())
+        if total > self.budget:
+            fixed = overhead + sum(sizes[name] for name in required)
+            if required and fixed > self.budget:
+                raise PromptBudgetError(
+                    f"{self.agent_name} prompt needs {fixed} tokens for {', '.join(sorted(required))}"
+                    f" (budget {self.budget})"
+                )
+            compactable = [name for name in texts if name not in required]
+            texts.update(self._compact(
+                {name: texts[name] for name in compactable}, {name: sizes[name] for name in compactable},
+                max(self.budget - fixed, 0), priorities
+            ))
+            compacted = overhead + sum(count_tokens(text) for text in texts.values())
+            logger.info(f"{self.agent_name} prompt compacted from {total} to {compacted} tokens (budget {self.budget})")
+        return template.format(**texts)
+
+    def _compact(self, texts: Dict[str, str], sizes: Dict[str, int], available: int,
+                 priorities: Dict[str, int]) -> Dict[str, str]:
+        """Allot the available tokens across fields by priority and shrink each field to its share."""
+        allotments = {}
+        remaining = dict(sizes)
+        # Water-filling: fields smaller than their share keep everything, the rest split what is left
+        while remaining:
+            weight = sum(priorities.get(name, 1) for name in remaining)
+            budget_left = available - sum(allotments.values())
+            share = {name: budget_left * priorities.get(name, 1) / weight for name in remaining}
+            fitting = [name for name in remaining if remaining[name] <= share[name]]
+            if not fitting:
+                allotments.update({name: int(share[name]) for name in remaining})
+                break
+            for name in fitting:
+                allotments[name] = remaining.pop(name)
+
+        compacted = {}
+        for name, text in texts.items():
+            allotment = allotments[name]
+            if allotment >= sizes[name]:
+                compacted[name] = text
+            elif allotment < MIN_FIELD_TOKENS:
+                compacted[name] = "[omitted to fit the prompt budget]"
+            else:
+                compacted[name] = truncate_tokens(text, allotment)
+        return compacted
@@ -0,0 +1,274 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import logging
+import threading
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Scheduling priorities; lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITIES = {"interactive": PRIORITY_INTERACTIVE, "batch": PRIORITY_BATCH}
+
+# Bounds of the adaptive rate factor applied to the configured quotas after throttling
+MIN_RATE_FACTOR = 0.1
+RATE_FACTOR_STEP = 0.05
+
+# Longest wait applied for a single throttled request
+MAX_BACKOFF_SECONDS = 60.0
+
+QUEUE_SECONDS = REGISTRY.histogram(
+    "grant_llm_queue_seconds", "Time agent completions waited for rate-limit capacity, by priority"
+)
+THROTTLED = REGISTRY.counter("grant_llm_throttled_total", "Agent completions rejected with 429 by the service")
+
+# Priority of model calls made in the current context
+_current_priority: ContextVar[int] = ContextVar("current_llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def scheduling_priority(priority: int):
+    """Schedule the model calls made in this context, including tasks it starts, at the given priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Get the wait requested by a rate-limit (429) error.
+    Follows the exception chain, since the service wraps the OpenAI client's errors.
+
+    Args:
+        error (BaseException): The exception raised by a model call
+
+    Returns:
+        Optional[float]: Seconds to wait (0 when the service gave no Retry-After), or None if the
+            error is not a rate-limit error
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        if status == 429:
+            headers = getattr(response, "headers", None) or {}
+            if headers.get("retry-after-ms"):
+                try:
+                    return float(headers["retry-after-ms"]) / 1000
+                except ValueError:
+                    pass
+            retry_after = headers.get("retry-after")
+            if retry_after:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    try:
+                        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+                    except (TypeError, ValueError):
+                        pass
+            return 0.0
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Check whether a model call failed with a server error, timeout or dropped connection worth retrying."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int) and status >= 500:
+            return True
+        if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for a zero-based retry attempt."""
+    return min(2 ** attempt, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+
+
+class TokenBucket:
+    """A quota per minute that refills continuously and may be overdrawn by underestimates."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float, factor: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60 * factor)
+        self.updated = now
+
+    def wait_time(self, amount: float, factor: float) -> float:
+        """Seconds until the amount (capped at capacity) is available at the current refill rate."""
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) / (self.capacity / 60 * factor)
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+
+class RateLimitScheduler:
+    """
+    Process-wide gate for Azure OpenAI calls, admitting them against this process's share
+    of the deployment quota.
+    Calls wait in a priority queue until the request (RPM) and token (TPM) buckets have
+    capacity, so interactive calls are admitted ahead of queued batch calls. A 429 pauses
+    every caller for its Retry-After (or an exponential backoff) and halves the admission
+    rate, which then recovers additively with each successful call.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, max_retries: int = 4):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_minute (float): Deployment RPM quota; 0 for no request limit
+            tokens_per_minute (float): Deployment TPM quota; 0 for no token limit
+            max_retries (int): Retries of a throttled or transiently failing call before its error is raised
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.rate_factor = 1.0
+        self.paused_until = 0.0
+        self._queue: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def acquire(self, tokens: int, priority: Optional[int] = None) -> None:
+        """
+        Wait until a call estimated at the given number of tokens may be sent.
+
+        Args:
+            tokens (int): Estimated prompt plus completion tokens
+            priority (Optional[int]): PRIORITY_INTERACTIVE or PRIORITY_BATCH; defaults to the context's priority
+        """
+        priority = _current_priority.get() if priority is None else priority
+        if self.requests is None and self.tokens is None and time.monotonic() >= self.paused_until:
+            return
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+        start = time.monotonic()
+        future = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), tokens, future))
+        self._wakeup.set()
+        try:
+            await future
+        finally:
+            if not future.done():
+                # Cancelled while queued; the dispatcher skips it
+                future.cancel()
+        QUEUE_SECONDS.observe(time.monotonic() - start, priority=priority)
+
+    async def _dispatch(self) -> None:
+        """Admit queued calls in priority order as capacity becomes available."""
+        while True:
+            while self._queue and self._queue[0][3].done():
+                heapq.heappop(self._queue)
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            _, _, tokens, future = self._queue[0]
+            now = time.monotonic()
+            wait = self.paused_until - now
+            if self.requests is not None:
+                self.requests.refill(now, self.rate_factor)
+                wait = max(wait, self.requests.wait_time(1, self.rate_factor))
+            if self.tokens is not None:
+                self.tokens.refill(now, self.rate_factor)
+                wait = max(wait, self.tokens.wait_time(tokens, self.rate_factor))
+            if wait > 0:
+                # Re-evaluate early if a higher-priority call arrives
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._queue)
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            future.set_result(None)
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """
+        Correct the token bucket once a call's real usage is known, and count the success.
+
+        Args:
+            estimated (int): Tokens taken when the call was admitted
+            actual (int): Prompt plus completion tokens the call used
+        """
+        if self.tokens is not None:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated - actual)
+        self.rate_factor = min(1.0, self.rate_factor + RATE_FACTOR_STEP)
+
+    def throttled(self, retry_after: Optional[float], attempt: int) -> float:
+        """
+        Record a 429 and pause every caller.
+
+        Args:
+            retry_after (Optional[float]): Wait requested by the service, if any
+            attempt (int): Zero-based retry attempt of the throttled call
+
+        Returns:
+            float: Seconds until calls are admitted again
+        """
+        THROTTLED.inc()
+        delay = min(retry_after or backoff_delay(attempt), MAX_BACKOFF_SECONDS)
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor / 2)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.warning(f"Azure OpenAI throttled the deployment; pausing calls for {delay:.1f}s "
+                       f"and admitting at {self.rate_factor:.0%} of quota")
+        return delay
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """
+    Get the process-wide scheduler configured from the environment:
+    AZURE_OPENAI_RPM and AZURE_OPENAI_TPM quotas (0 or unset for none), divided evenly
+    between the AZURE_OPENAI_QUOTA_SHARES processes calling the deployment (default 1),
+    and AZURE_OPENAI_MAX_RETRIES for throttled calls.
+
+    Returns:
+        RateLimitScheduler: The scheduler
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            # Each process only sees its own calls, so it admits its share of the deployment quota
+            shares = max(int(os.getenv("AZURE_OPENAI_QUOTA_SHARES", "1")), 1)
+            _scheduler = RateLimitScheduler(
+                requests_per_minute=float(os.getenv("AZURE_OPENAI_RPM", "0")) / shares,
+                tokens_per_minute=float(os.getenv("AZURE_OPENAI_TPM", "0")) / shares,
+                max_retries=int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "4"))
+            )
+        return _scheduler
@@ -0,0 +1,74 @@
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; fall back to a character heuristic
+    tiktoken = None
+
+# Average characters per token for English text, used without tiktoken
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in a piece of text.
+    Uses tiktoken when installed, otherwise estimates from the character count.
+
+    Args:
+        text (str): The text to measure
+
+    Returns:
+        int: Number of tokens
+    """
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_tokens(text: str, max_tokens: int, head_ratio: float = 0.75) -> str:
+    """
+    Shorten text to about max_tokens tokens, keeping its beginning and end.
+
+    Args:
+        text (str): The text to shorten
+        max_tokens (int): Token limit
+        head_ratio (float): Share of the limit kept from the beginning of the text
+
+    Returns:
+        str: The text, with an omission marker where content was cut
+    """
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    # Leave room for the omission marker
+    keep = max(max_tokens - 12, 1)
+    head = max(int(keep * head_ratio), 1)
+    tail = keep - head
+    encoding = _encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        head_text = encoding.decode(tokens[:head])
+        tail_text = encoding.decode(tokens[-tail:]) if tail else ""
+    else:
+        head_text = text[:head * CHARS_PER_TOKEN]
+        tail_text = text[-tail * CHARS_PER_TOKEN:] if tail else ""
+    return f"{head_text}\n[... {total - keep} tokens omitted ...]\n{tail_text}"
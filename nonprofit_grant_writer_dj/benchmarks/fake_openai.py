@@ -0,0 +1,259 @@
+"""
+Local stand-in for the Azure OpenAI chat completions and embeddings APIs.
+
+Replies are synthetic but shaped like what each agent asks for: a JSON array when the
+prompt asks for one (the budget), a JSON object satisfying every agent's schema when the
+prompt mentions JSON, a search tool call the first time tools are offered, and filler prose
+otherwise. Latency, token rate and error rate are configurable, so the app's own overhead
+can be measured without a live deployment.
+
+    python -m benchmarks.fake_openai --port 8001 --latency 0.5 --tokens-per-second 50
+"""
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import hashlib
+import logging
+from typing import Any, Dict, List
+
+from quart import Quart, Response, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+_WORDS = (
+    "our program serves families across the region with mentoring tutoring and meals "
+    "measurable outcomes include attendance graduation and employment rates for participants "
+    "the grant will expand staff capacity partnerships and evaluation over two years"
+).split()
+
+_SECTION_KEYS = (
+    "executive_summary", "problem_statement", "project_description", "implementation_plan",
+    "evaluation", "sustainability", "conclusion"
+)
+
+_BUDGET = [
+    {"item": "Program staff", "description": "Two part-time coordinators", "amount": "48000"},
+    {"item": "Materials", "description": "Curriculum and supplies", "amount": "6500"},
+    {"item": "Evaluation", "description": "External evaluator", "amount": "8000"},
+]
+
+
+def filler_text(tokens: int, seed: str = "") -> str:
+    """Deterministic prose of roughly the given number of tokens."""
+    rng = random.Random(seed)
+    # About four words for every three tokens
+    words = [rng.choice(_WORDS) for _ in range(max(tokens * 3 // 4, 1))]
+    sentences = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(0, len(words), 12)]
+    return " ".join(sentences)
+
+
+def json_reply(tokens: int, seed: str = "") -> Dict[str, Any]:
+    """A JSON object with the fields every agent's schema requires."""
+    section_tokens = max(tokens // len(_SECTION_KEYS), 8)
+    reply = {key: filler_text(section_tokens, seed + key) for key in _SECTION_KEYS}
+    reply.update({
+        "goals_objectives": [filler_text(10, seed + str(i)) for i in range(3)],
+        "budget": _BUDGET,
+        "overall_score": 88,
+        "criteria_scores": {"clarity": 88, "specificity": 86, "alignment": 90},
+        "strengths": ["Clear need statement"],
+        "weaknesses": [],
+        "improvement_suggestions": [],
+        "aligned": True,
+        "alignment_score": 90,
+        "issues": [],
+        "overall_assessment": "Well aligned with the mission.",
+    })
+    return reply
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(str(content or ""))
+    return "\n".join(parts)
+
+
+def _split_tokens(text: str) -> List[str]:
+    """Split text into pieces of about one token (four characters) each."""
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+def create_app(latency: float = 0.5, tokens_per_second: float = 50.0, error_rate: float = 0.0,
+               error_status: int = 429, completion_tokens: int = 300, embedding_size: int = 256) -> Quart:
+    """
+    Create the stand-in server.
+
+    Args:
+        latency (float): Seconds before the first token
+        tokens_per_second (float): Streaming rate after the first token; 0 sends everything at once
+        error_rate (float): Fraction of requests answered with error_status
+        error_status (int): Status of injected errors; 429 responses carry Retry-After
+        completion_tokens (int): Length of prose replies in tokens
+        embedding_size (int): Dimension of the returned embeddings
+
+    Returns:
+        Quart: The app
+    """
+    app = Quart(__name__)
+    stats = {"requests": 0, "errors": 0, "streamed": 0, "tool_calls": 0}
+
+    def reply_for(body: Dict[str, Any]) -> Dict[str, Any]:
+        messages = body.get("messages", [])
+        prompt = _prompt_text(messages)
+        seed = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        tools = body.get("tools") or []
+        if tools and not any(message.get("role") == "tool" for message in messages):
+            search_tools = [tool["function"]["name"] for tool in tools if "search" in tool["function"]["name"].lower()]
+            if search_tools:
+                stats["tool_calls"] += 1
+                query = " ".join(prompt.split()[-12:])[:120]
+                return {"tool_call": {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "name": search_tools[0],
+                    "arguments": json.dumps({"query": query, "num_results": 3}),
+                }}
+        # Agents state the reply format in the user prompt, not in their instructions
+        user_prompt = _prompt_text([message for message in messages if message.get("role") == "user"][-1:])
+        if "JSON array" in user_prompt:
+            return {"content": json.dumps(_BUDGET)}
+        if "JSON" in user_prompt or body.get("response_format"):
+            return {"content": json.dumps(json_reply(completion_tokens, seed))}
+        return {"content": filler_text(completion_tokens, seed)}
+
+    def usage(body: Dict[str, Any], content: str) -> Dict[str, int]:
+        prompt_tokens = len(_prompt_text(body.get("messages", []))) // 4
+        completion = len(content) // 4
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion,
+                "total_tokens": prompt_tokens + completion}
+
+    def injected_error():
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            response = jsonify({"error": {"code": str(error_status), "message": "Injected error"}})
+            response.status_code = error_status
+            if error_status == 429:
+                response.headers["Retry-After"] = "1"
+            return response
+        return None
+
+    @app.route("/health")
+    async def health():
+        return jsonify({"status": "ok", **stats})
+
+    @app.route("/openai/deployments/<deployment>/chat/completions", methods=["POST"])
+    async def chat_completions(deployment):
+        stats["requests"] += 1
+        body = await request.get_json()
+        error = injected_error()
+        if error is not None:
+            return error
+        reply = reply_for(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        content = reply.get("content", "")
+        if reply.get("tool_call"):
+            call = reply["tool_call"]
+            tool_calls = [{"id": call["id"], "type": "function",
+                           "function": {"name": call["name"], "arguments": call["arguments"]}}]
+        else:
+            tool_calls = None
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency + (len(content) / 4 / tokens_per_second if tokens_per_second else 0))
+            message = {"role": "assistant", "content": content or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return jsonify({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": deployment,
+                "choices": [{"index": 0, "message": message,
+                             "finish_reason": "tool_calls" if tool_calls else "stop"}],
+                "usage": usage(body, content),
+            })
+
+        stats["streamed"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        def chunk(delta, finish_reason=None, **extra):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": deployment,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        async def stream():
+            await asyncio.sleep(latency)
+            if tool_calls:
+                yield chunk({"role": "assistant", "tool_calls": [{"index": 0, **tool_calls[0]}]})
+                yield chunk({}, "tool_calls")
+            else:
+                yield chunk({"role": "assistant", "content": ""})
+                # Send a few tokens per chunk, paced at the configured rate
+                tokens = _split_tokens(content)
+                for i in range(0, len(tokens), 5):
+                    piece = tokens[i:i + 5]
+                    if tokens_per_second:
+                        await asyncio.sleep(len(piece) / tokens_per_second)
+                    yield chunk({"content": "".join(piece)})
+                yield chunk({}, "stop")
+            if include_usage:
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                           "model": deployment, "choices": [], "usage": usage(body, content)}
+                yield f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+            yield b"data: [DONE]\n\n"
+
+        return Response(stream(), mimetype="text/event-stream")
+
+    @app.route("/openai/deployments/<deployment>/embeddings", methods=["POST"])
+    async def embeddings(deployment):
+        stats["requests"] += 1
+        body = await request.get_json()
+        error = injected_error()
+        if error is not None:
+            return error
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        await asyncio.sleep(latency / 4)
+        data = []
+        for index, text in enumerate(inputs):
+            rng = random.Random(hashlib.sha256(str(text).encode("utf-8")).hexdigest())
+            data.append({"object": "embedding", "index": index,
+                         "embedding": [rng.uniform(-1, 1) for _ in range(embedding_size)]})
+        tokens = sum(len(str(text)) // 4 for text in inputs)
+        return jsonify({"object": "list", "data": data, "model": deployment,
+                        "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Azure OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Streaming rate; 0 for no pacing")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=429, help="HTTP status of injected errors")
+    parser.add_argument("--completion-tokens", type=int, default=300, help="Length of prose replies")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    app = create_app(args.latency, args.tokens_per_second, args.error_rate, args.error_status, args.completion_tokens)
+    app.run(host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Local stand-in for the DuckDuckGo and Bing search APIs and for the websites being scraped.
+
+Point DUCKDUCKGO_API_URL at /duckduckgo and BING_SEARCH_ENDPOINT at /bing/v7.0/search;
+nonprofit and grant URLs under /pages/ return a small HTML page.
+
+    python -m benchmarks.fake_search --port 8002 --latency 0.2
+"""
+import random
+import asyncio
+import argparse
+import logging
+
+from quart import Quart, jsonify, request
+
+from .fake_openai import filler_text
+
+logger = logging.getLogger(__name__)
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>{title}</title></head>
+<body>
+<h1>{title}</h1>
+<h2>Mission</h2>
+<p>{mission}</p>
+<h2>Programs</h2>
+<p>{programs}</p>
+<h2>Eligibility and Deadlines</h2>
+<p>{eligibility}</p>
+</body>
+</html>
+"""
+
+
+def create_app(latency: float = 0.2, error_rate: float = 0.0) -> Quart:
+    """
+    Create the stand-in server.
+
+    Args:
+        latency (float): Seconds before each response
+        error_rate (float): Fraction of search requests answered with 503
+
+    Returns:
+        Quart: The app
+    """
+    app = Quart(__name__)
+    stats = {"searches": 0, "pages": 0, "errors": 0}
+
+    async def respond_after_latency():
+        await asyncio.sleep(latency)
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            return True
+        return False
+
+    @app.route("/health")
+    async def health():
+        return jsonify({"status": "ok", **stats})
+
+    @app.route("/duckduckgo")
+    async def duckduckgo():
+        stats["searches"] += 1
+        if await respond_after_latency():
+            return jsonify({"error": "Injected error"}), 503
+        query = request.args.get("q", "")
+        return jsonify({
+            "AbstractText": filler_text(40, query),
+            "RelatedTopics": [{"Text": filler_text(25, f"{query}{i}")} for i in range(5)],
+        })
+
+    @app.route("/bing/v7.0/search")
+    async def bing():
+        stats["searches"] += 1
+        if await respond_after_latency():
+            return jsonify({"error": "Injected error"}), 503
+        query = request.args.get("q", "")
+        count = int(request.args.get("count", "3"))
+        return jsonify({"webPages": {"value": [
+            {"name": f"Result {i + 1} for {query}", "snippet": filler_text(30, f"{query}{i}")}
+            for i in range(count)
+        ]}})
+
+    @app.route("/robots.txt")
+    async def robots():
+        return "User-agent: *\nAllow: /\n", 200, {"Content-Type": "text/plain"}
+
+    @app.route("/pages/<path:path>")
+    async def page(path):
+        stats["pages"] += 1
+        await asyncio.sleep(latency)
+        html = _PAGE.format(
+            title=path.replace("-", " ").title(),
+            mission=filler_text(60, path + "mission"),
+            programs=filler_text(120, path + "programs"),
+            eligibility=filler_text(80, path + "eligibility"),
+        )
+        return html, 200, {"Content-Type": "text/html; charset=utf-8"}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for search APIs and scraped websites")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of searches that fail")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    create_app(args.latency, args.error_rate).run(host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
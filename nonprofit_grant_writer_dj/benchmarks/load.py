@@ -0,0 +1,334 @@
+"""
+End-to-end load benchmark for /api/generate-grant.
+
+Starts the stand-in OpenAI and search servers, the backend API (through hypercorn) and
+the generation worker pool, all pointed at them, then submits generation jobs at increasing concurrency. For each level
+it reports jobs per minute, p50/p95/p99 job latency, and the API process's peak memory
+and thread count. Results can be saved as a named baseline and later runs compared to it.
+
+    python -m benchmarks.load --levels 1,4,16 --save local
+    python -m benchmarks.load --levels 1,4,16 --compare local
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import asyncio
+import argparse
+import datetime
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+# Job statuses after which a job is done
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile, or None without values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def read_process_stats(pid: int) -> Optional[Dict[str, float]]:
+    """Resident memory in MB and thread count of a process, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+    except OSError:
+        return None
+    return {
+        "rss_mb": int(fields["VmRSS"].split()[0]) / 1024,
+        "threads": int(fields["Threads"]),
+    }
+
+
+class ProcessSampler:
+    """Samples a process's memory and threads in the background, keeping the peaks."""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss_mb: Optional[float] = None
+        self.peak_threads: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _sample(self) -> None:
+        stats = read_process_stats(self.pid) if self.pid else None
+        if stats is None:
+            return
+        self.peak_rss_mb = max(self.peak_rss_mb or 0, stats["rss_mb"])
+        self.peak_threads = max(self.peak_threads or 0, stats["threads"])
+
+    async def _run(self) -> None:
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._sample()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+async def run_job(client: httpx.AsyncClient, api_url: str, search_url: str, label: str,
+                  timeout: float, poll_interval: float) -> Dict[str, Any]:
+    """Submit one generation job and wait for it to finish."""
+    start = time.monotonic()
+    # Unique names and URLs keep the search and page caches from serving earlier jobs
+    response = await client.post(f"{api_url}/api/generate-grant", json={
+        "nonprofit_name": f"Benchmark Nonprofit {label}",
+        "nonprofit_mission": "Helping families in our region thrive through mentoring and education.",
+        "nonprofit_website": f"{search_url}/pages/nonprofit-{label}",
+        "grant_url": f"{search_url}/pages/grant-{label}",
+    })
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while time.monotonic() - start < timeout:
+        await asyncio.sleep(poll_interval)
+        status = (await client.get(f"{api_url}/api/jobs/{job_id}")).json().get("status")
+        if status in TERMINAL_STATUSES:
+            return {"job_id": job_id, "status": status, "seconds": time.monotonic() - start}
+    await client.post(f"{api_url}/api/jobs/{job_id}/cancel")
+    return {"job_id": job_id, "status": "timeout", "seconds": time.monotonic() - start}
+
+
+async def run_level(api_url: str, search_url: str, concurrency: int, jobs: int, pid: Optional[int],
+                    timeout: float, poll_interval: float) -> Dict[str, Any]:
+    """Run jobs with a fixed number in flight and summarize them."""
+    sampler = ProcessSampler(pid)
+    sampler.start()
+    counter = iter(range(jobs))
+    run_id = uuid.uuid4().hex[:8]
+    results = []
+
+    async def worker(client):
+        for index in counter:
+            label = f"{run_id}-{concurrency}-{index}"
+            try:
+                results.append(await run_job(client, api_url, search_url, label, timeout, poll_interval))
+            except httpx.HTTPError as e:
+                results.append({"status": "error", "error": str(e), "seconds": None})
+
+    start = time.monotonic()
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    wall_seconds = time.monotonic() - start
+    await sampler.stop()
+
+    latencies = [result["seconds"] for result in results if result["status"] == "completed"]
+    return {
+        "concurrency": concurrency,
+        "jobs": jobs,
+        "completed": len(latencies),
+        "failed": len(results) - len(latencies),
+        "wall_seconds": round(wall_seconds, 2),
+        "jobs_per_minute": round(len(latencies) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "latency_p50": _round(percentile(latencies, 50)),
+        "latency_p95": _round(percentile(latencies, 95)),
+        "latency_p99": _round(percentile(latencies, 99)),
+        "peak_rss_mb": _round(sampler.peak_rss_mb),
+        "peak_threads": sampler.peak_threads,
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def start_process(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], cwd=BASE_DIR, env=env)
+
+
+async def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    """Poll a URL until it answers, failing early if its process exits."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Process for {url} exited with code {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not start within {timeout:g}s")
+
+
+def app_environment(args: argparse.Namespace) -> Dict[str, str]:
+    """Environment for the API process, pointing every external service at the stand-ins."""
+    openai_url = f"http://127.0.0.1:{args.openai_port}"
+    search_url = f"http://127.0.0.1:{args.search_port}"
+    env = {
+        **os.environ,
+        "AZURE_OPENAI_ENDPOINT": openai_url,
+        "AZURE_OPENAI_API_KEY": "benchmark",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "benchmark",
+        "GRANT_ORCHESTRATION_MODE": args.mode,
+        "DUCKDUCKGO_API_URL": f"{search_url}/duckduckgo",
+        "BING_SEARCH_ENDPOINT": f"{search_url}/bing/v7.0/search",
+        # The orchestrator fans searches out to Bing only with this key
+        "BING_SEARCH_API_KEY": "1234",
+        # Every job should reach the model and the crawler rather than a cache
+        "LLM_CACHE_ENABLED": "false",
+        "CRAWLER_PER_HOST_DELAY": "0",
+        # The API and the pool split the deployment quota by the pool size
+        "WORKER_PROCESSES": str(args.worker_processes),
+    }
+    if args.with_index:
+        env["AZURE_OPENAI_EMBEDDING_DEPLOYMENT"] = "benchmark-embeddings"
+    else:
+        env.pop("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", None)
+    return env
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare a run to a baseline level by level.
+
+    Returns:
+        List[str]: One message per regression beyond the tolerance
+    """
+    regressions = []
+    base_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in results["levels"]:
+        base = base_levels.get(level["concurrency"])
+        if base is None:
+            continue
+        name = f"concurrency {level['concurrency']}"
+        if base["jobs_per_minute"] and level["jobs_per_minute"] < base["jobs_per_minute"] * (1 - tolerance):
+            regressions.append(f"{name}: {level['jobs_per_minute']} jobs/min vs {base['jobs_per_minute']}")
+        for key in ("latency_p50", "latency_p95", "latency_p99"):
+            if base.get(key) and level.get(key) and level[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {level[key]}s vs {base[key]}s")
+        if level["failed"] > base["failed"]:
+            regressions.append(f"{name}: {level['failed']} failed jobs vs {base['failed']}")
+    return regressions
+
+
+def print_table(levels: List[Dict[str, Any]]) -> None:
+    columns = ("concurrency", "completed", "failed", "jobs_per_minute", "latency_p50", "latency_p95",
+               "latency_p99", "peak_rss_mb", "peak_threads")
+    print(" | ".join(columns))
+    for level in levels:
+        print(" | ".join("-" if level[column] is None else str(level[column]) for column in columns))
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    openai_url = f"http://127.0.0.1:{args.openai_port}"
+    search_url = f"http://127.0.0.1:{args.search_port}"
+    api_url = f"http://127.0.0.1:{args.app_port}"
+    processes = []
+    try:
+        fake_openai = start_process([
+            "-m", "benchmarks.fake_openai", "--port", str(args.openai_port),
+            "--latency", str(args.llm_latency), "--tokens-per-second", str(args.tokens_per_second),
+            "--error-rate", str(args.llm_error_rate), "--completion-tokens", str(args.completion_tokens),
+        ], dict(os.environ))
+        processes.append(fake_openai)
+        fake_search = start_process([
+            "-m", "benchmarks.fake_search", "--port", str(args.search_port),
+            "--latency", str(args.search_latency), "--error-rate", str(args.search_error_rate),
+        ], dict(os.environ))
+        processes.append(fake_search)
+        await wait_until_ready(f"{openai_url}/health", fake_openai)
+        await wait_until_ready(f"{search_url}/health", fake_search)
+
+        api = start_process(["-m", "hypercorn", "app:app", "--bind", f"127.0.0.1:{args.app_port}"],
+                            app_environment(args))
+        processes.append(api)
+        await wait_until_ready(f"{api_url}/api/metrics", api)
+        # Enough job slots that jobs never wait in the queue at the highest level
+        concurrency = args.worker_concurrency or -(-max(args.levels) // args.worker_processes)
+        processes.append(start_process(["worker.py", "--processes", str(args.worker_processes),
+                                        "--concurrency", str(concurrency)], app_environment(args)))
+
+        levels = []
+        for concurrency in args.levels:
+            jobs = concurrency * args.jobs_per_worker
+            print(f"Running {jobs} jobs at concurrency {concurrency}...", flush=True)
+            levels.append(await run_level(api_url, search_url, concurrency, jobs, api.pid,
+                                          args.timeout, args.poll_interval))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    results = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("save", "compare")},
+        "levels": levels,
+    }
+    print_table(levels)
+
+    if args.save:
+        BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+        path = BASELINE_DIR / f"{args.save}.json"
+        path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved baseline {path}")
+
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        if baseline["config"] != results["config"]:
+            print("Warning: the baseline was recorded with a different configuration")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against baseline {args.compare}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for /api/generate-grant")
+    parser.add_argument("--levels", type=lambda value: [int(level) for level in value.split(",")],
+                        default=[1, 2, 4, 8], help="Comma-separated concurrency levels")
+    parser.add_argument("--jobs-per-worker", type=int, default=2, help="Jobs run by each concurrent client")
+    parser.add_argument("--mode", default="dag", choices=("dag", "planner"),
+                        help="Orchestration mode; the stand-in model never finishes a planner run, so use dag")
+    parser.add_argument("--with-index", action="store_true", help="Embed research into the local vector index")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Model streaming rate")
+    parser.add_argument("--completion-tokens", type=int, default=300, help="Length of prose replies")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of model calls that fail")
+    parser.add_argument("--search-latency", type=float, default=0.2, help="Seconds per search or page")
+    parser.add_argument("--search-error-rate", type=float, default=0.0, help="Fraction of searches that fail")
+    parser.add_argument("--worker-processes", type=int, default=1, help="Generation worker processes")
+    parser.add_argument("--worker-concurrency", type=int, default=0,
+                        help="Jobs run at once by each worker process; 0 fits the highest level")
+    parser.add_argument("--app-port", type=int, default=5000)
+    parser.add_argument("--openai-port", type=int, default=8001)
+    parser.add_argument("--search-port", type=int, default=8002)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds before a job counts as timed out")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="Seconds between job status polls")
+    parser.add_argument("--save", metavar="NAME", help="Store the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare the results to a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
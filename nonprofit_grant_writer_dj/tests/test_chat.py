@@ -0,0 +1,50 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("semantic_kernel")
+
+from backend.agents import chat
+from backend.utils.llm_cache import CompletionCache
+from backend.utils.rate_limiter import RateLimitScheduler
+
+
+@pytest.fixture
+def model(monkeypatch):
+    replies = iter(["First draft", "Second draft"])
+    calls = []
+
+    async def call_model(agent, history, execution_settings, on_delta):
+        calls.append(history)
+        return next(replies), None, None
+
+    monkeypatch.setattr(chat, "_call_model", call_model)
+    monkeypatch.setattr(chat, "get_completion_cache", lambda cache=CompletionCache(None): cache)
+    monkeypatch.setattr(chat, "get_cassette", lambda: None)
+    monkeypatch.setattr(chat, "get_scheduler", lambda scheduler=RateLimitScheduler(): scheduler)
+    return calls
+
+
+def agent():
+    return SimpleNamespace(name="WriterAgent", instructions="Write grants.", kernel=None,
+                           service=SimpleNamespace(ai_model_id="gpt"))
+
+
+def test_repeated_prompts_are_served_from_the_cache(model):
+    first = asyncio.run(chat.complete_chat(agent(), "Write the summary"))
+    second = asyncio.run(chat.complete_chat(agent(), "Write the summary"))
+
+    assert (first.content, first.cached) == ("First draft", False)
+    assert (second.content, second.cached) == ("First draft", True)
+    assert len(model) == 1
+
+
+def test_uncached_calls_get_a_new_reply_that_replaces_the_cached_one(model):
+    asyncio.run(chat.complete_chat(agent(), "Write the summary"))
+    regenerated = asyncio.run(chat.complete_chat(agent(), "Write the summary", use_cache=False))
+    cached = asyncio.run(chat.complete_chat(agent(), "Write the summary"))
+
+    assert (regenerated.content, regenerated.cached) == ("Second draft", False)
+    assert cached.content == "Second draft"
+    assert len(model) == 2
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("httpx")
+
+from backend.utils.crawler import AsyncCrawler, extract_page
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+
+class FakeClient:
+    def __init__(self, robots="User-agent: *\nDisallow: /private\n", delay=0.01):
+        self.robots = robots
+        self.delay = delay
+        self.requests = []
+
+    async def get(self, url, headers=None, **kwargs):
+        self.requests.append(url)
+        await asyncio.sleep(self.delay)
+        return FakeResponse(text=self.robots)
+
+
+class FakeClientCrawler(AsyncCrawler):
+    def __init__(self, client, **kwargs):
+        super().__init__(**kwargs)
+        self.fake_client = client
+
+    @property
+    def client(self):
+        return self.fake_client
+
+
+def test_extract_page_keeps_text_and_absolute_links():
+    page = extract_page(
+        "<html><head><title>Fund</title><script>x()</script></head>"
+        "<body><h1>Eligibility</h1><p>Nonprofits may apply.</p><a href='/apply#form'>Apply</a></body></html>",
+        "https://fund.example/grants/",
+    )
+
+    assert page["title"] == "Fund"
+    assert page["headings"] == ["Eligibility"]
+    assert page["text"] == "Nonprofits may apply."
+    assert page["links"] == [{"url": "https://fund.example/apply", "text": "Apply"}]
+
+
+def test_robots_txt_is_fetched_once_for_concurrent_requests(tmp_path):
+    client = FakeClient()
+    crawler = FakeClientCrawler(client, cache_dir=tmp_path)
+
+    async def check():
+        return await asyncio.gather(
+            crawler._allowed("https://fund.example/about"),
+            crawler._allowed("https://fund.example/private/page"),
+            crawler._allowed("https://fund.example/apply"),
+        )
+
+    assert asyncio.run(check()) == [True, False, True]
+    assert client.requests == ["https://fund.example/robots.txt"]
+
+
+def test_robots_txt_is_refreshed_after_its_ttl(tmp_path):
+    client = FakeClient()
+    crawler = FakeClientCrawler(client, cache_dir=tmp_path, robots_ttl=0)
+
+    async def check_twice():
+        await crawler._allowed("https://fund.example/about")
+        client.robots = "User-agent: *\nDisallow: /\n"
+        return await crawler._allowed("https://fund.example/about")
+
+    assert asyncio.run(check_twice()) is False
+    assert len(client.requests) == 2
+
+
+def test_concurrent_cache_writes_of_one_page_do_not_collide(tmp_path):
+    crawler = AsyncCrawler(cache_dir=tmp_path)
+    errors = []
+
+    def write(i):
+        try:
+            for _ in range(20):
+                crawler._store_cached("https://fund.example/", {"html": f"<p>{i}</p>", "fetched_at": 0})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert crawler._load_cached("https://fund.example/")["fetched_at"] == 0
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("semantic_kernel")
+
+from backend.agents.file_surfer import FileSurferAgent, merge_findings
+
+
+def make_agent(extract_chunk, max_workers=2):
+    # Skips __init__, which builds a chat service
+    agent = FileSurferAgent.__new__(FileSurferAgent)
+    agent.max_workers = max_workers
+    agent._extract_chunk = extract_chunk
+    return agent
+
+
+def test_findings_are_merged_in_chunk_order():
+    async def extract_chunk(chunk, file_type):
+        await asyncio.sleep(0.01 if chunk == "first" else 0)
+        return {"requirements": [f"{chunk} requirement"]}
+
+    result = asyncio.run(make_agent(extract_chunk)._extract(iter(["first", "second", "third"]), "pdf"))
+
+    assert result["chunks_processed"] == 3
+    assert result["extracted_info"]["requirements"] == [
+        "first requirement", "second requirement", "third requirement"
+    ]
+
+
+def test_a_failed_chunk_stops_the_extraction():
+    extracted = []
+
+    async def extract_chunk(chunk, file_type):
+        if chunk == 1:
+            raise RuntimeError("429 Too Many Requests")
+        await asyncio.sleep(0.01)
+        extracted.append(chunk)
+        return {}
+
+    async def main():
+        agent = make_agent(extract_chunk)
+        with pytest.raises(RuntimeError, match="429"):
+            # More chunks than the queue holds, so the producer would block if left running
+            await asyncio.wait_for(agent._extract(iter(range(100)), "pdf"), timeout=5)
+        await asyncio.sleep(0.05)
+        return len(extracted)
+
+    processed = asyncio.run(main())
+    assert processed < 100
+
+
+def test_a_parsing_error_stops_the_extraction():
+    def chunks():
+        yield "first"
+        raise ValueError("corrupt PDF")
+
+    async def extract_chunk(chunk, file_type):
+        return {}
+
+    with pytest.raises(ValueError, match="corrupt PDF"):
+        asyncio.run(asyncio.wait_for(make_agent(extract_chunk)._extract(chunks(), "pdf"), timeout=5))
+
+
+def test_merge_findings_removes_duplicates():
+    merged = merge_findings([
+        {"deadlines": ["Apply by March 1"]},
+        {"deadlines": ["apply by march 1", "Reports due in June"]},
+    ])
+
+    assert merged["deadlines"] == ["Apply by March 1", "Reports due in June"]
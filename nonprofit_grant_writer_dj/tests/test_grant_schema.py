@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from backend.utils.grant_schema import GrantContent, GrantDraft, normalize_grant_content, structured_output_settings
+
+
+def test_section_titles_become_canonical_keys():
+    content = normalize_grant_content({
+        "Executive Summary": "We feed families.",
+        "Goals and Objectives": ["Serve 500 families"],
+        "sustainability_plan": "Diversified funding.",
+    })
+
+    assert content["executive_summary"] == "We feed families."
+    assert content["goals_objectives"] == ["Serve 500 families"]
+    assert content["sustainability"] == "Diversified funding."
+    assert "Executive Summary" not in content
+
+
+def test_every_section_is_present_and_unset_reviews_are_omitted():
+    content = normalize_grant_content({})
+
+    assert set(content) == set(GrantContent.model_fields) - {"quality_review", "alignment_review", "error"}
+    assert content["budget"] == [] and content["conclusion"] == ""
+
+
+def test_loosely_shaped_sections_are_coerced():
+    content = normalize_grant_content({
+        "problem_statement": ["First paragraph.", "Second paragraph."],
+        "implementation_plan": {"Phase 1": "Hire staff", "Phase 2": ["Open", "Expand"]},
+        "goals_objectives": {"goal_1": "Reach 500 families", "goal_2": "Train volunteers"},
+    })
+
+    assert content["problem_statement"] == "First paragraph.\nSecond paragraph."
+    assert content["implementation_plan"] == "Phase 1: Hire staff\nPhase 2: Open\nExpand"
+    assert content["goals_objectives"] == ["Reach 500 families", "Train volunteers"]
+
+
+def test_goals_from_editor_html_are_split_into_items():
+    content = normalize_grant_content({"goals_objectives": "<p>Serve families</p><p>Train <b>volunteers</b></p>"})
+
+    assert content["goals_objectives"] == ["Serve families", "Train volunteers"]
+
+
+def test_budget_shapes_become_budget_items():
+    assert normalize_grant_content({"budget": {"Staff": 50000}})["budget"] == [
+        {"item": "Staff", "description": "", "amount": "50000"}
+    ]
+    assert normalize_grant_content({"budget": "About $10,000"})["budget"] == [
+        {"item": "Budget", "description": "About $10,000", "amount": "0"}
+    ]
+
+
+def test_structured_output_mode_follows_the_environment(monkeypatch):
+    monkeypatch.delenv("GRANT_STRUCTURED_OUTPUT", raising=False)
+    assert structured_output_settings() == {"response_format": {"type": "json_object"}}
+
+    monkeypatch.setenv("GRANT_STRUCTURED_OUTPUT", "off")
+    assert structured_output_settings() == {}
+
+
+def test_budget_lines_as_text_or_with_alternate_keys_are_kept():
+    content = normalize_grant_content({"budget": [
+        "Staff: $5000",
+        {"category": "Supplies", "cost": 1200},
+        {"name": "Rent", "total": "$900", "description": "Six months"},
+    ]})
+
+    assert content["budget"] == [
+        {"item": "Staff: $5000", "description": "Staff: $5000", "amount": "0"},
+        {"item": "Supplies", "description": "", "amount": "1200"},
+        {"item": "Rent", "description": "Six months", "amount": "$900"},
+    ]
+
+
+def test_draft_schema_keeps_the_canonical_budget_fields():
+    properties = GrantDraft.model_json_schema()["$defs"]["BudgetItem"]["properties"]
+
+    assert set(properties) == {"item", "description", "amount"}
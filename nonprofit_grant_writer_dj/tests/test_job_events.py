@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from backend.utils.job_events import JobEventBus
+from backend.utils.job_store import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    yield store
+    store.close()
+
+
+async def collect(subscription, count=None):
+    messages = []
+    async for message in subscription:
+        messages.append(message)
+        if count is not None and len(messages) == count:
+            break
+    return messages
+
+
+def test_late_subscribers_receive_the_history(store):
+    bus = JobEventBus(store)
+    job_id = store.create_job({})
+    bus.publish(job_id, "started", {"attempt": 1})
+    bus.publish(job_id, "failed", {"message": "boom"})
+
+    messages = asyncio.run(collect(bus.subscribe(job_id)))
+
+    assert [(m["event"], m["data"]) for m in messages] == [("started", {"attempt": 1}), ("failed", {"message": "boom"})]
+
+
+def test_events_published_in_process_are_pushed_without_polling(store):
+    bus = JobEventBus(store, poll_interval=60)
+    job_id = store.create_job({})
+
+    async def main():
+        subscriber = asyncio.create_task(collect(bus.subscribe(job_id)))
+        await asyncio.sleep(0.05)
+        bus.publish(job_id, "research_started")
+        bus.publish(job_id, "cancelled", {"message": "Cancelled by user"})
+        return await asyncio.wait_for(subscriber, timeout=1)
+
+    assert [m["event"] for m in asyncio.run(main())] == ["research_started", "cancelled"]
+
+
+def test_events_from_other_processes_are_polled_once_per_job(tmp_path):
+    web, worker = JobStore(tmp_path / "jobs.db"), JobStore(tmp_path / "jobs.db")
+    bus, worker_bus = JobEventBus(web, poll_interval=0.02), JobEventBus(worker)
+    job_id = web.create_job({})
+
+    async def main():
+        subscribers = [asyncio.create_task(collect(bus.subscribe(job_id))) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert len(bus._pollers) == 1
+        worker_bus.publish(job_id, "started", {"attempt": 1})
+        worker_bus.publish(job_id, "failed", {"message": "boom"})
+        return await asyncio.wait_for(asyncio.gather(*subscribers), timeout=1)
+
+    for messages in asyncio.run(main()):
+        assert [m["event"] for m in messages] == ["started", "failed"]
+    assert bus._pollers == {} and bus._subscriptions == {}
+    web.close()
+    worker.close()
+
+
+def test_completed_events_store_only_a_pointer_to_the_result(store):
+    bus = JobEventBus(store)
+    job_id = store.create_job({})
+    result = {"title": "Grant", "executive_summary": "x" * 1000}
+    store.complete_job(job_id, result)
+    bus.publish(job_id, "completed", {"job_id": job_id, "data": result})
+
+    assert store.get_events(job_id)[0]["data"] == {"job_id": job_id}
+    messages = asyncio.run(collect(bus.subscribe(job_id)))
+    assert messages[0]["data"] == {"job_id": job_id, "data": result}
+
+
+def test_idle_subscriptions_yield_heartbeats(store):
+    bus = JobEventBus(store, poll_interval=60)
+    job_id = store.create_job({})
+
+    messages = asyncio.run(collect(bus.subscribe(job_id, heartbeat=0.01), count=2))
+
+    assert messages == [None, None]
+    assert bus._subscriptions == {}
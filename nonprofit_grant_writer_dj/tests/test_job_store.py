@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+from backend.utils.job_store import (
+    JobStore, STATUS_CANCELLED, STATUS_COMPLETED, STATUS_FAILED, STATUS_PROCESSING, STATUS_QUEUED
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    yield store
+    store.close()
+
+
+def make_stale(store, job_id):
+    store._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time() - 120, job_id))
+
+
+def test_jobs_are_claimed_by_priority_then_age(store):
+    batch = store.create_job({"name": "batch"}, priority=1)
+    first = store.create_job({"name": "first"})
+    second = store.create_job({"name": "second"})
+
+    claimed = [store.claim_job("w1")["job_id"] for _ in range(3)]
+
+    assert claimed == [first, second, batch]
+    assert store.claim_job("w1") is None
+    assert store.get_status(first)["status"] == STATUS_PROCESSING
+
+
+def test_a_job_is_claimed_by_one_worker_only(tmp_path):
+    web, worker = JobStore(tmp_path / "jobs.db"), JobStore(tmp_path / "jobs.db")
+    job_id = web.create_job({"name": "a"})
+
+    assert worker.claim_job("w1") == {"job_id": job_id, "request": {"name": "a"}, "attempt": 1}
+    assert web.claim_job("w2") is None
+    web.close()
+    worker.close()
+
+
+def test_heartbeat_fails_once_the_job_is_no_longer_held(store):
+    job_id = store.create_job({})
+    store.claim_job("w1")
+
+    assert store.heartbeat(job_id, "w1")
+    assert not store.heartbeat(job_id, "w2")
+    store.complete_job(job_id, {"title": "Grant"}, "w1")
+    assert not store.heartbeat(job_id, "w1")
+
+
+def test_released_jobs_are_requeued_without_using_an_attempt(store):
+    job_id = store.create_job({})
+    store.claim_job("w1")
+    store.release_job(job_id, "w1")
+
+    assert store.get_status(job_id)["status"] == STATUS_QUEUED
+    assert store.claim_job("w2")["attempt"] == 1
+
+
+def test_stale_jobs_are_requeued_failed_or_cancelled(store):
+    requeued, exhausted, cancelled = (store.create_job({}) for _ in range(3))
+    for job_id in (requeued, exhausted, cancelled):
+        store.claim_job("dead")
+        make_stale(store, job_id)
+    store._conn.execute("UPDATE jobs SET attempts = 3 WHERE id = ?", (exhausted,))
+    store.request_cancel(cancelled)
+
+    reclaimed = store.reclaim_stale(stale_seconds=60, max_attempts=3)
+
+    assert reclaimed == {STATUS_QUEUED: [requeued], STATUS_FAILED: [exhausted], STATUS_CANCELLED: [cancelled]}
+    assert store.claim_job("w2") == {"job_id": requeued, "request": {}, "attempt": 2}
+    assert "3 attempts" in store.get_status(exhausted)["error"]
+
+
+def test_live_jobs_are_not_reclaimed(store):
+    store.create_job({})
+    store.claim_job("w1")
+
+    assert store.reclaim_stale(stale_seconds=60, max_attempts=3)[STATUS_QUEUED] == []
+
+
+def test_cancel_request_cancels_queued_jobs_and_flags_running_ones(store):
+    queued = store.create_job({})
+    running = store.create_job({})
+    store._conn.execute("UPDATE jobs SET priority = -1 WHERE id = ?", (running,))
+    store.claim_job("w1")
+
+    assert store.request_cancel(queued) == STATUS_CANCELLED
+    assert store.request_cancel(running) == STATUS_PROCESSING
+    assert store.cancel_requested(running)
+    assert store.request_cancel(queued) is None
+
+
+def test_a_reclaimed_job_keeps_the_new_workers_outcome(store):
+    job_id = store.create_job({})
+    store.claim_job("w1")
+    make_stale(store, job_id)
+    store.reclaim_stale(stale_seconds=60, max_attempts=3)
+    store.claim_job("w2")
+
+    assert not store.save_context(job_id, {"research": "stale"}, "w1")
+    assert not store.complete_job(job_id, {"title": "Stale"}, "w1")
+    assert not store.fail_job(job_id, "stale error", "w1")
+    assert store.get_status(job_id)["status"] == STATUS_PROCESSING
+
+    assert store.save_context(job_id, {"research": "fresh"}, "w2")
+    assert store.complete_job(job_id, {"title": "Fresh"}, "w2")
+    assert store.get_status(job_id)["status"] == STATUS_COMPLETED
+    assert store.get_result(job_id) == {"title": "Fresh"}
+    assert store.get_context(job_id) == {"research": "fresh"}
+
+
+def test_events_are_returned_after_the_last_seen_id(store):
+    job_id = store.create_job({})
+    store.add_event(job_id, "started", {"attempt": 1})
+    store.add_event(job_id, "research_started", {})
+
+    events = store.get_events(job_id)
+
+    assert [e["event"] for e in events] == ["started", "research_started"]
+    assert store.get_events(job_id, events[0]["id"])[0]["event"] == "research_started"
+    assert store.has_events(job_id) and not store.has_events("unknown")
+
+
+def test_eviction_removes_expired_jobs_and_old_events(tmp_path):
+    store = JobStore(tmp_path / "jobs.db", ttl_seconds=0, event_retention_seconds=0)
+    job_id = store.create_job({})
+    store.add_event(job_id, "started", {})
+
+    assert store.evict_expired() == 1
+    assert store.get_status(job_id) is None
+    assert not store.has_events(job_id)
+    store.close()
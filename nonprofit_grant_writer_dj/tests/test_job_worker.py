@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from backend.utils.job_store import JobStore, STATUS_COMPLETED, STATUS_PROCESSING
+from backend.utils.job_worker import JobWorker
+
+
+class RecordingEvents:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, job_id, event, data=None):
+        self.events.append((job_id, event))
+
+
+class FakeOrchestrator:
+    def __init__(self, during=None):
+        self.during = during
+
+    async def generate_grant_content(self, website, grant_url, name, mission, context):
+        if self.during is not None:
+            self.during()
+        context["research"] = "notes"
+        return {"title": f"Grant for {name}"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    yield store
+    store.close()
+
+
+def run_until(worker, condition):
+    async def main():
+        runner = asyncio.create_task(worker.run())
+        while not condition():
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await runner
+
+    asyncio.run(asyncio.wait_for(main(), timeout=5))
+
+
+def test_worker_runs_claimed_jobs_to_completion(store, monkeypatch):
+    monkeypatch.setenv("WORKER_POLL_SECONDS", "0.01")
+    events = RecordingEvents()
+    job_id = store.create_job({"nonprofit_name": "Food Bank"})
+    worker = JobWorker(store, events, FakeOrchestrator(), concurrency=2, worker_id="w1")
+
+    run_until(worker, lambda: (job_id, "completed") in events.events)
+
+    assert store.get_status(job_id)["status"] == STATUS_COMPLETED
+    assert store.get_result(job_id)["title"] == "Grant for Food Bank"
+    assert store.get_context(job_id) == {"research": "notes"}
+
+
+def test_result_of_a_reclaimed_job_is_dropped(store, monkeypatch):
+    monkeypatch.setenv("WORKER_POLL_SECONDS", "0.01")
+    events = RecordingEvents()
+    job_id = store.create_job({"nonprofit_name": "Food Bank"})
+
+    def reclaim():
+        store._conn.execute("UPDATE jobs SET worker_id = 'w2' WHERE id = ?", (job_id,))
+
+    worker = JobWorker(store, events, FakeOrchestrator(during=reclaim), worker_id="w1")
+
+    run_until(worker, lambda: not worker._running and (job_id, "started") in events.events)
+
+    assert store.get_status(job_id)["status"] == STATUS_PROCESSING
+    assert store.get_result(job_id) is None
+    assert (job_id, "completed") not in events.events
@@ -0,0 +1,70 @@
+import pytest
+
+from backend.utils.json_stream import JSONParseError, StreamingJSONParser, parse_json, validate_json
+
+
+def test_json_is_extracted_from_prose_and_fences():
+    text = 'Here is the result:\n```json\n{"score": 8, "notes": ["clear"]}\n```\nLet me know!'
+
+    assert parse_json(text) == {"score": 8, "notes": ["clear"]}
+
+
+def test_root_selects_an_array_over_an_earlier_object():
+    assert parse_json('Example {"a": 1}; answer: [1, 2]', root="[") == [1, 2]
+
+
+def test_common_model_defects_are_repaired():
+    text = "{'title': 'Line one\nLine two', 'done': True, 'missing': None, 'items': [1, 2,],}"
+
+    assert parse_json(text) == {"title": "Line one\nLine two", "done": True, "missing": None, "items": [1, 2]}
+
+
+def test_quotes_inside_single_quoted_strings_are_escaped():
+    assert parse_json("""{'quote': 'She said "yes"', 'apostrophe': 'it\\'s'}""") == {
+        "quote": 'She said "yes"', "apostrophe": "it's"
+    }
+
+
+def test_truncated_output_keeps_complete_members():
+    assert parse_json('{"summary": "Done", "sections": [{"a": 1}, {"b": ') == {
+        "summary": "Done", "sections": [{"a": 1}, {"b": None}]
+    }
+    assert parse_json('{"summary": "Cut off mid-str') == {"summary": "Cut off mid-str"}
+
+
+def test_fields_are_reported_as_soon_as_they_close():
+    fields = []
+    parser = StreamingJSONParser("{", on_field=lambda key, value: fields.append((key, value)))
+
+    for chunk in ['{"executive_', 'summary": "Short", "budget": [{"item"', ': "Staff"}]', ', "done": true}']:
+        parser.feed(chunk)
+        if chunk.startswith('{"exec'):
+            assert fields == []
+
+    assert fields == [("executive_summary", "Short"), ("budget", [{"item": "Staff"}]), ("done", True)]
+    assert parser.close() == {"executive_summary": "Short", "budget": [{"item": "Staff"}], "done": True}
+
+
+def test_array_items_are_reported_by_index():
+    items = []
+    parser = StreamingJSONParser("[", on_field=lambda index, item: items.append((index, item)))
+    parser.feed('[{"q": "a"}, {"q": "b"}]')
+
+    assert items == [(0, {"q": "a"}), (1, {"q": "b"})]
+
+
+def test_output_without_json_raises_with_the_text():
+    with pytest.raises(JSONParseError, match="No JSON value") as excinfo:
+        parse_json("I could not evaluate this content.")
+
+    assert excinfo.value.text == "I could not evaluate this content."
+
+
+def test_schema_checks_fields_and_types():
+    schema = {"overall_score": (int, float), "strengths": list}
+
+    assert validate_json({"overall_score": 7, "strengths": []}, schema) == {"overall_score": 7, "strengths": []}
+    with pytest.raises(JSONParseError, match="Missing field: strengths"):
+        parse_json('{"overall_score": 7}', schema=schema)
+    with pytest.raises(JSONParseError, match="Field strengths"):
+        parse_json('{"overall_score": 7, "strengths": "many"}', schema=schema)
@@ -0,0 +1,88 @@
+import sqlite3
+
+from backend.utils.llm_cache import CompletionCache, TOUCH_BATCH_SIZE, make_cache_key
+
+
+def test_cache_key_depends_on_every_input():
+    key = make_cache_key("gpt", "Be brief.", "Summarize", {"temperature": 0})
+
+    assert key == make_cache_key("gpt", "Be brief.", "Summarize", {"temperature": 0})
+    assert key != make_cache_key("gpt", "Be brief.", "Summarize", {"temperature": 1})
+    assert key != make_cache_key("gpt", "Be verbose.", "Summarize", {"temperature": 0})
+    assert key != make_cache_key("other", "Be brief.", "Summarize", {"temperature": 0})
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+    path = tmp_path / "cache.db"
+    CompletionCache(path).set("key", "completion")
+
+    cache = CompletionCache(path)
+    assert cache.get("key") == "completion"
+    assert cache.get("missing") is None
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_memory_only_cache(tmp_path):
+    cache = CompletionCache(None)
+    cache.set("key", "completion")
+
+    assert cache.get("key") == "completion"
+
+
+def test_expired_disk_entries_are_misses(tmp_path):
+    path = tmp_path / "cache.db"
+    CompletionCache(path, ttl_seconds=-1).set("key", "completion")
+
+    assert CompletionCache(path, ttl_seconds=-1).get("key") is None
+
+
+def test_disk_tier_is_bounded_by_least_recent_access(tmp_path):
+    path = tmp_path / "cache.db"
+    writer = CompletionCache(path, max_disk_entries=2)
+    writer.set("a", "1")
+    writer.set("b", "2")
+    # A disk hit on "a" in another process leaves "b" least recently used
+    other = CompletionCache(path, max_disk_entries=2)
+    assert other.get("a") == "1"
+    other.set("c", "3")
+
+    fresh = CompletionCache(path)
+    assert fresh.get("b") is None
+    assert fresh.get("a") == "1"
+    assert fresh.get("c") == "3"
+
+
+def test_access_times_are_written_in_batches(tmp_path):
+    path = tmp_path / "cache.db"
+    CompletionCache(path).set("key", "completion")
+    cache = CompletionCache(path)
+    cache.get("key")
+    assert len(cache._touched) == 1
+    for i in range(TOUCH_BATCH_SIZE - 1):
+        cache._touch(f"other-{i}", 0)
+    assert cache._touched == {}
+
+
+def test_hits_do_not_wait_for_another_writer(tmp_path):
+    path = tmp_path / "cache.db"
+    CompletionCache(path).set("key", "completion")
+    cache = CompletionCache(path)
+    writer = sqlite3.connect(str(path), isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        assert cache.get("key") == "completion"
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+
+def test_database_errors_are_misses(tmp_path):
+    cache = CompletionCache(tmp_path / "cache.db")
+    cache.set("key", "completion")
+    cache.memory.clear()
+    cache._conn.close()
+
+    assert cache.get("key") is None
+    # Writes are dropped with a logged error
+    cache.set("other", "completion")
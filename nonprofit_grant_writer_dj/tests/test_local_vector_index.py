@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.tools.local_vector_index import INITIAL_CAPACITY, PAYLOAD_LOG, LocalVectorIndex
+
+
+def test_search_returns_nearest_vectors_with_payloads(tmp_path):
+    index = LocalVectorIndex(tmp_path)
+    index.create_collection("docs", 2)
+    index.upsert("docs", np.array([[1, 0], [0, 1], [1, 1]]), ["a", "b", "c"],
+                 [{"kind": "x"}, {"kind": "y"}, {"kind": "x"}])
+
+    results = index.search("docs", [1, 0.1], limit=2)
+
+    assert [r["id"] for r in results] == ["a", "c"]
+    assert results[0]["metadata"] == {"kind": "x"}
+    assert [r["id"] for r in index.search("docs", [1, 0], filter_condition={"kind": "y"})] == ["b"]
+
+
+def test_upserts_append_payloads_instead_of_rewriting_them(tmp_path):
+    index = LocalVectorIndex(tmp_path)
+    index.create_collection("docs", 2)
+    index.upsert("docs", np.array([[1, 0]]), ["a"], [{"v": 1}])
+    index.upsert("docs", np.array([[0, 1]]), ["b"], [{"v": 2}])
+    index.upsert("docs", np.array([[0, 1]]), ["a"], [{"v": 3}])
+
+    lines = (tmp_path / "docs" / PAYLOAD_LOG).read_text(encoding="utf-8").splitlines()
+    meta = json.loads((tmp_path / "docs" / "meta.json").read_text(encoding="utf-8"))
+
+    assert len(lines) == 3
+    assert meta == {"dim": 2, "capacity": INITIAL_CAPACITY}
+
+
+def test_reopened_collection_replays_the_payload_log(tmp_path):
+    index = LocalVectorIndex(tmp_path)
+    index.create_collection("docs", 2)
+    index.upsert("docs", np.array([[1, 0], [0, 1]]), ["a", "b"], [{"v": 1}, {"v": 2}])
+    index.upsert("docs", np.array([[0, 1]]), ["a"], [{"v": 3}])
+    with (tmp_path / "docs" / PAYLOAD_LOG).open("a", encoding="utf-8") as f:
+        f.write('{"id": "c", "pay')
+
+    results = LocalVectorIndex(tmp_path).search("docs", [0, 1], limit=3)
+
+    assert [(r["id"], r["metadata"]) for r in results] == [("a", {"v": 3}), ("b", {"v": 2})]
+
+
+def test_collection_grows_past_its_initial_capacity(tmp_path):
+    index = LocalVectorIndex(tmp_path)
+    index.create_collection("docs", 2)
+    count = INITIAL_CAPACITY + 10
+    vectors = np.column_stack([np.ones(count), np.arange(count)])
+    index.upsert("docs", vectors, list(range(count)), [{"n": n} for n in range(count)])
+
+    reopened = LocalVectorIndex(tmp_path)
+
+    assert reopened.search("docs", [0, 1], limit=1)[0]["id"] == count - 1
+
+
+def test_collections_with_payloads_in_meta_are_migrated(tmp_path):
+    path = tmp_path / "docs"
+    path.mkdir()
+    vectors = np.memmap(path / "vectors.f32", dtype=np.float32, mode="w+", shape=(4, 2))
+    vectors[:2] = [[1, 0], [0, 1]]
+    vectors.flush()
+    (path / "meta.json").write_text(json.dumps(
+        {"dim": 2, "capacity": 4, "ids": ["a", "b"], "payloads": [{"v": 1}, {"v": 2}]}), encoding="utf-8")
+
+    results = LocalVectorIndex(tmp_path).search("docs", [0, 1], limit=1)
+
+    assert results == [{"id": "b", "score": pytest.approx(1.0), "metadata": {"v": 2}}]
+    assert "ids" not in json.loads((path / "meta.json").read_text(encoding="utf-8"))
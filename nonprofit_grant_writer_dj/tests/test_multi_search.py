@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("semantic_kernel")
+
+from semantic_kernel.exceptions import ServiceInvalidRequestError
+
+from backend.agents.multi_search_connector import MultiEngineSearchConnector, _shingles, _similarity
+
+
+class FakeEngine:
+    def __init__(self, snippets=(), delay=0.0, error=None):
+        self.snippets = list(snippets)
+        self.delay = delay
+        self.error = error
+
+    async def search(self, query, num_results=3, offset=0):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.snippets[:num_results]
+
+
+def test_similarity_of_near_duplicate_snippets():
+    a = _shingles("The foundation funds literacy programs for rural youth")
+    b = _shingles("the foundation funds literacy programs for rural youth.")
+    c = _shingles("Applications are due on March first each year")
+
+    assert _similarity(a, b) == 1.0
+    assert _similarity(a, c) == 0.0
+
+
+def test_reciprocal_rank_fusion_prefers_results_engines_agree_on():
+    connector = MultiEngineSearchConnector({
+        "a": FakeEngine(["Only engine a has this", "Grants support food security programs"]),
+        "b": FakeEngine(["Grants support food security programs.", "Only engine b has this"]),
+    }, deadline=1.0)
+
+    results = asyncio.run(connector.search("food security", num_results=3))
+
+    # Found by both engines, so it outranks each engine's own top result
+    assert results[0] == "Grants support food security programs."
+    assert len(results) == 3
+
+
+def test_failed_and_slow_engines_are_skipped():
+    connector = MultiEngineSearchConnector({
+        "ok": FakeEngine(["A useful snippet"]),
+        "broken": FakeEngine(error=RuntimeError("down")),
+        "slow": FakeEngine(["Too late"], delay=5.0),
+    }, deadline=0.1)
+
+    assert asyncio.run(connector.search("query", num_results=3)) == ["A useful snippet"]
+
+
+def test_error_when_every_engine_fails():
+    connector = MultiEngineSearchConnector({"broken": FakeEngine(error=RuntimeError("down"))}, deadline=0.1)
+
+    with pytest.raises(ServiceInvalidRequestError):
+        asyncio.run(connector.search("query"))
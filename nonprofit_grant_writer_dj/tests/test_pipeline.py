@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("semantic_kernel")
+
+from backend.agents.pipeline import PipelineStage, run_pipeline
+
+
+def test_stages_run_after_their_dependencies():
+    order = []
+
+    def stage(name, delay=0.0):
+        async def func(results):
+            await asyncio.sleep(delay)
+            order.append(name)
+            return name.upper()
+        return func
+
+    results = asyncio.run(run_pipeline([
+        PipelineStage("draft", stage("draft"), depends_on=("research", "scrape")),
+        PipelineStage("research", stage("research", 0.02)),
+        PipelineStage("scrape", stage("scrape")),
+    ]))
+
+    assert results == {"research": "RESEARCH", "scrape": "SCRAPE", "draft": "DRAFT"}
+    assert order[-1] == "draft"
+
+
+def test_stages_receive_earlier_results():
+    async def research(results):
+        return ["fact"]
+
+    async def draft(results):
+        return f"draft from {results['research']}"
+
+    results = asyncio.run(run_pipeline([
+        PipelineStage("research", research),
+        PipelineStage("draft", draft, depends_on=("research",)),
+    ]))
+
+    assert results["draft"] == "draft from ['fact']"
+
+
+def test_independent_stages_run_concurrently():
+    running = set()
+    overlapped = []
+
+    def stage(name):
+        async def func(results):
+            running.add(name)
+            await asyncio.sleep(0.02)
+            overlapped.append(len(running) > 1)
+            running.discard(name)
+        return func
+
+    asyncio.run(run_pipeline([PipelineStage(name, stage(name)) for name in ("a", "b", "c")]))
+
+    assert any(overlapped)
+
+
+def test_dependency_cycle_is_rejected():
+    async def noop(results):
+        return None
+
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(run_pipeline([
+            PipelineStage("a", noop, depends_on=("b",)),
+            PipelineStage("b", noop, depends_on=("a",)),
+        ]))
+
+
+def test_unknown_dependency_and_duplicate_names_are_rejected():
+    async def noop(results):
+        return None
+
+    with pytest.raises(ValueError, match="unknown"):
+        asyncio.run(run_pipeline([PipelineStage("a", noop, depends_on=("missing",))]))
+    with pytest.raises(ValueError, match="unique"):
+        asyncio.run(run_pipeline([PipelineStage("a", noop), PipelineStage("a", noop)]))
+
+
+def test_failure_cancels_and_awaits_running_stages():
+    cancelled = []
+
+    async def slow(results):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def failing(results):
+        raise RuntimeError("search failed")
+
+    async def main():
+        with pytest.raises(RuntimeError, match="search failed"):
+            await run_pipeline([PipelineStage("slow", slow), PipelineStage("failing", failing)])
+        # The slow stage has already finished cancelling when the pipeline returns
+        assert cancelled == [True]
+
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import pytest
+
+from backend.utils.prompt_budget import PromptBudgetError, PromptBuilder, prune
+from backend.utils.tokens import count_tokens
+
+
+def words(count, word="grant"):
+    return " ".join(f"{word}{i}" for i in range(count))
+
+
+def test_prompt_within_budget_is_unchanged():
+    builder = PromptBuilder("TestAgent", budget=1000)
+
+    assert builder.build("Info: {info}", info={"name": "Food Bank"}) == 'Info: {\n "name": "Food Bank"\n}'
+
+
+def test_prune_drops_empty_and_low_relevance_fields():
+    assert prune({"name": "A", "links": ["x"], "notes": "", "items": [None, {"raw_content": "y"}, "b"]}) == {
+        "name": "A", "items": ["b"]
+    }
+
+
+def test_oversized_fields_shrink_by_priority():
+    builder = PromptBuilder("TestAgent", budget=600)
+
+    prompt = builder.build("{high}\n{low}", priorities={"high": 3, "low": 1},
+                           high=words(1000, "high"), low=words(1000, "low"))
+
+    assert count_tokens(prompt) <= 600
+    assert prompt.count("high") > 2 * prompt.count("low")
+
+
+def test_fields_too_small_to_be_useful_are_omitted():
+    builder = PromptBuilder("TestAgent", budget=300)
+
+    prompt = builder.build("{main}\n{extra}", priorities={"main": 20, "extra": 1},
+                           main=words(1000), extra=words(1000, "extra"))
+
+    assert "[omitted to fit the prompt budget]" in prompt
+    assert "extra" not in prompt
+
+
+def test_required_fields_are_never_compacted():
+    builder = PromptBuilder("TestAgent", budget=600)
+    section = words(200)
+
+    prompt = builder.build("{section}\n{notes}", required=("section",), section=section, notes=words(1000, "note"))
+
+    assert section in prompt
+    assert count_tokens(prompt) <= 600
+
+
+def test_required_fields_over_budget_raise():
+    builder = PromptBuilder("TestAgent", budget=100)
+
+    with pytest.raises(PromptBudgetError, match="section"):
+        builder.build("{section}\n{notes}", required=("section",), section=words(300), notes="short")
@@ -0,0 +1,141 @@
+import time
+import asyncio
+
+import pytest
+
+from backend.utils import rate_limiter
+from backend.utils.rate_limiter import (
+    PRIORITY_BATCH, PRIORITY_INTERACTIVE, RateLimitScheduler, TokenBucket, get_scheduler, is_transient_error,
+    retry_after_seconds, scheduling_priority
+)
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.response = Response(status_code, headers)
+
+
+def test_retry_after_is_read_from_wrapped_rate_limit_errors():
+    try:
+        try:
+            raise APIError(429, {"retry-after": "7"})
+        except APIError as e:
+            raise RuntimeError("service call failed") from e
+    except RuntimeError as wrapped:
+        assert retry_after_seconds(wrapped) == 7.0
+
+    assert retry_after_seconds(APIError(429, {"retry-after-ms": "1500", "retry-after": "7"})) == 1.5
+    assert retry_after_seconds(APIError(429)) == 0.0
+    assert retry_after_seconds(APIError(400)) is None
+
+
+def test_transient_errors_are_server_errors_and_dropped_connections():
+    class APIConnectionError(Exception):
+        pass
+
+    assert is_transient_error(APIError(503))
+    assert is_transient_error(APIConnectionError())
+    assert not is_transient_error(APIError(400))
+    assert not is_transient_error(APIError(429))
+
+
+def test_token_bucket_refills_at_its_quota_rate():
+    bucket = TokenBucket(600)
+    bucket.take(600)
+    bucket.refill(bucket.updated + 1.0, factor=1.0)
+
+    assert bucket.level == pytest.approx(10)
+    assert bucket.wait_time(20, factor=1.0) == pytest.approx(1.0)
+    assert bucket.wait_time(20, factor=0.5) == pytest.approx(2.0)
+    # Requests larger than the bucket wait for a full bucket, not forever
+    assert bucket.wait_time(10000, factor=1.0) == pytest.approx(59.0)
+
+
+def test_interactive_calls_are_admitted_before_queued_batch_calls():
+    scheduler = RateLimitScheduler(requests_per_minute=6000)
+    admitted = []
+
+    async def call(name, priority):
+        await scheduler.acquire(1, priority)
+        admitted.append(name)
+
+    async def main():
+        scheduler.requests.level = 0
+        await asyncio.gather(call("batch", PRIORITY_BATCH), call("interactive", PRIORITY_INTERACTIVE))
+
+    asyncio.run(main())
+
+    assert admitted == ["interactive", "batch"]
+
+
+def test_priority_defaults_to_the_context():
+    scheduler = RateLimitScheduler(requests_per_minute=6000)
+    admitted = []
+
+    async def call(name):
+        await scheduler.acquire(1)
+        admitted.append(name)
+
+    async def main():
+        scheduler.requests.level = 0
+        with scheduling_priority(PRIORITY_BATCH):
+            batch = asyncio.ensure_future(call("batch"))
+        await asyncio.gather(batch, call("interactive"))
+
+    asyncio.run(main())
+
+    assert admitted == ["interactive", "batch"]
+
+
+def test_throttling_pauses_every_caller_and_lowers_the_rate():
+    scheduler = RateLimitScheduler(requests_per_minute=6000)
+
+    async def main():
+        scheduler.throttled(0.2, attempt=0)
+        start = time.monotonic()
+        await scheduler.acquire(1)
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) >= 0.15
+    assert scheduler.rate_factor == 0.5
+    scheduler.settle(estimated=100, actual=100)
+    assert scheduler.rate_factor == pytest.approx(0.55)
+
+
+def test_settle_returns_overestimated_tokens():
+    scheduler = RateLimitScheduler(tokens_per_minute=1000)
+    scheduler.tokens.take(500)
+    scheduler.settle(estimated=500, actual=200)
+
+    assert scheduler.tokens.level == pytest.approx(800)
+
+
+def test_scheduler_is_configured_from_the_environment(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_scheduler", None)
+    monkeypatch.setenv("AZURE_OPENAI_RPM", "120")
+    monkeypatch.setenv("AZURE_OPENAI_TPM", "60000")
+    monkeypatch.setenv("AZURE_OPENAI_MAX_RETRIES", "2")
+    monkeypatch.delenv("AZURE_OPENAI_QUOTA_SHARES", raising=False)
+
+    scheduler = get_scheduler()
+
+    assert scheduler is get_scheduler()
+    assert (scheduler.requests.capacity, scheduler.tokens.capacity, scheduler.max_retries) == (120, 60000, 2)
+
+
+def test_quota_is_split_between_processes(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_scheduler", None)
+    monkeypatch.setenv("AZURE_OPENAI_RPM", "300")
+    monkeypatch.setenv("AZURE_OPENAI_TPM", "90000")
+    monkeypatch.setenv("AZURE_OPENAI_QUOTA_SHARES", "3")
+
+    scheduler = get_scheduler()
+
+    assert (scheduler.requests.capacity, scheduler.tokens.capacity) == (100, 30000)
@@ -0,0 +1,52 @@
+import asyncio
+
+from backend.agents.review import SectionReviewer
+
+
+class FakeQualityChecker:
+    def __init__(self, scores):
+        self.scores = scores
+
+    async def evaluate_section(self, section, content):
+        return {"overall_score": self.scores[content], "improvement_suggestions": ["Add data"]}
+
+
+class FakeGroundingChecker:
+    async def verify_section_alignment(self, section, content, nonprofit_info):
+        return {"aligned": True, "alignment_score": 90}
+
+
+def reviewer(scores, max_rounds=3):
+    return SectionReviewer(FakeQualityChecker(scores), FakeGroundingChecker(),
+                           quality_threshold=80, alignment_threshold=80, max_rounds=max_rounds)
+
+
+def test_sections_are_revised_until_they_pass():
+    async def revise(section, content, quality, alignment):
+        return "revised"
+
+    result = asyncio.run(reviewer({"draft": 60, "revised": 85}).review_section("evaluation", "draft", {}, revise))
+
+    assert (result["content"], result["passed"], result["rounds"]) == ("revised", True, 2)
+
+
+def test_best_version_is_kept_when_rounds_run_out():
+    revisions = iter(["worse", "still worse"])
+
+    async def revise(section, content, quality, alignment):
+        return next(revisions)
+
+    result = asyncio.run(
+        reviewer({"draft": 70, "worse": 50, "still worse": 40}).review_section("evaluation", "draft", {}, revise)
+    )
+
+    assert (result["content"], result["passed"], result["rounds"]) == ("draft", False, 3)
+
+
+def test_failed_revision_ends_only_that_section():
+    async def revise(section, content, quality, alignment):
+        raise ValueError("section does not fit the prompt budget")
+
+    result = asyncio.run(reviewer({"draft": 60}).review_section("evaluation", "draft", {}, revise))
+
+    assert (result["content"], result["passed"], result["rounds"]) == ("draft", False, 1)
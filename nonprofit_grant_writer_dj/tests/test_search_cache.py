@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("semantic_kernel")
+httpx = pytest.importorskip("httpx")
+
+from semantic_kernel.exceptions import ServiceInvalidRequestError
+
+from backend.agents import cached_connector
+from backend.agents.cached_connector import CachedSearchConnector, is_engine_failure
+
+
+class FakeConnector(CachedSearchConnector):
+    engine = "fake"
+
+    def __init__(self, errors=None):
+        self.calls = []
+        self.errors = errors or {}
+
+    async def _search(self, query, num_results, offset):
+        self.calls.append(query)
+        if query in self.errors:
+            raise self.errors[query]
+        return [f"{query} result {i}" for i in range(num_results)]
+
+
+def http_error(status):
+    request = httpx.Request("GET", "https://search.example/")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.delenv("CASSETTE_MODE", raising=False)
+    monkeypatch.setattr(cached_connector, "_result_cache", None)
+    monkeypatch.setattr(cached_connector, "_failure_cache", None)
+
+
+def test_results_are_cached_per_query():
+    connector = FakeConnector()
+
+    first = asyncio.run(connector.search("food banks", 2))
+    second = asyncio.run(connector.search("food banks", 2))
+
+    assert first == second == ["food banks result 0", "food banks result 1"]
+    assert connector.calls == ["food banks"]
+
+
+def test_query_failure_only_skips_that_query():
+    connector = FakeConnector(errors={"bad query": http_error(400)})
+
+    with pytest.raises(ServiceInvalidRequestError):
+        asyncio.run(connector.search("bad query"))
+    with pytest.raises(ServiceInvalidRequestError):
+        asyncio.run(connector.search("bad query"))
+
+    assert asyncio.run(connector.search("good query")) == ["good query result 0"]
+    assert connector.calls == ["bad query", "good query"]
+
+
+def test_engine_failure_skips_every_query():
+    connector = FakeConnector(errors={"first": http_error(503)})
+
+    with pytest.raises(ServiceInvalidRequestError):
+        asyncio.run(connector.search("first"))
+    with pytest.raises(ServiceInvalidRequestError, match="temporarily unavailable"):
+        asyncio.run(connector.search("second"))
+
+    assert connector.calls == ["first"]
+
+
+def test_engine_failures_are_transport_errors_throttling_and_server_errors():
+    assert is_engine_failure(httpx.ConnectError("refused"))
+    assert is_engine_failure(http_error(429))
+    assert is_engine_failure(http_error(502))
+    assert not is_engine_failure(http_error(400))
+    assert not is_engine_failure(ValueError("bad JSON"))
+
+
+def test_connectors_must_implement_search():
+    class Incomplete(CachedSearchConnector):
+        engine = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,35 @@
+import time
+
+from backend.utils.ttl_cache import TTLCache
+
+
+def test_get_returns_stored_value_and_counts_hits():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("missing", "default") == "default"
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_entries_expire_after_their_ttl():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert len(cache) == 1
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
@@ -36,9 +36,9 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             // Check response status
-            if (data.status === 'processing') {
-                // Redirect to review page
-                window.location.href = 'http://127.0.0.1:8000/review/';
+            if (['queued', 'processing'].includes(data.status) && data.job_id) {
+                // Redirect to review page for this job
+                window.location.href = `http://127.0.0.1:8000/review/?job_id=${encodeURIComponent(data.job_id)}`;
             } else {
                 // Show error if any
                 statusMessage.textContent = data.message || 'An error occurred. Please try again.';
@@ -26,6 +26,18 @@ document.addEventListener('DOMContentLoaded', function() {
         conclusion: new Quill('#conclusion-editor', { theme: 'snow', placeholder: 'Conclusion content...' })
     };
     
+    // Editors by section key, as used in the grant content and progress events
+    const sectionEditors = {
+        executive_summary: editors.executiveSummary,
+        problem_statement: editors.problemStatement,
+        project_description: editors.projectDescription,
+        goals_objectives: editors.goalsObjectives,
+        implementation_plan: editors.implementation,
+        evaluation: editors.evaluation,
+        sustainability: editors.sustainability,
+        conclusion: editors.conclusion
+    };
+    
     // Track budget items
     let budgetItems = [];
     
@@ -39,25 +51,135 @@ document.addEventListener('DOMContentLoaded', function() {
     const saveBudgetItemBtn = document.getElementById('save-budget-item');
     const budgetItemModal = new bootstrap.Modal(document.getElementById('budgetItemModal'));
     
+    // Job being reviewed, passed by the home page
+    const jobId = new URLSearchParams(window.location.search).get('job_id');
+    
     // Organization info elements
     const orgName = document.getElementById('org-name');
     const orgMission = document.getElementById('org-mission');
     const orgWebsite = document.getElementById('org-website');
     
-    // Poll the server for grant status
+    // Human-readable labels for progress events
+    const progressLabels = {
+        queued: 'Waiting for a worker to start the grant generation...',
+        requeued: 'Restarting grant generation...',
+        started: 'Grant generation started...',
+        planning_started: 'Planning the grant application...',
+        planning_finished: 'Finalizing the grant application...'
+    };
+    let sectionsDrafted = 0;
+    let sectionsReviewed = 0;
+    
+    // Show the editors while sections are still being written
+    function showEditors() {
+        editorContainer.classList.remove('d-none');
+    }
+    
+    // Show a finished or revised section in its editor
+    function showSection(payload) {
+        if (payload.section === 'budget' && Array.isArray(payload.content)) {
+            showEditors();
+            budgetItems = payload.content;
+            renderBudgetItems();
+        } else if (sectionEditors[payload.section] && payload.content !== undefined) {
+            showEditors();
+            sectionEditors[payload.section].root.innerHTML = formatContent(payload.content);
+        }
+    }
+    
+    // Show the grant once generation has finished
+    function showGrant(data) {
+        loadingMessage.classList.add('d-none');
+        editorContainer.classList.remove('d-none');
+        loadGrantData(data);
+    }
+    
+    // Subscribe to the server's progress stream for this job
+    function subscribeToProgress() {
+        const source = new EventSource(`http://127.0.0.1:5000/api/jobs/${encodeURIComponent(jobId)}/events`);
+        
+        Object.keys(progressLabels).forEach(eventName => {
+            source.addEventListener(eventName, () => {
+                loadingMessage.textContent = progressLabels[eventName];
+            });
+        });
+        source.addEventListener('requeued', () => {
+            // The job starts over on another worker; drop what the previous attempt wrote
+            sectionsDrafted = 0;
+            sectionsReviewed = 0;
+            Object.values(sectionEditors).forEach(editor => editor.setText(''));
+            budgetItems = [];
+            renderBudgetItems();
+        });
+        source.addEventListener('agent_started', event => {
+            const step = JSON.parse(event.data);
+            loadingMessage.textContent = `${step.agent} is working on ${step.function}...`;
+        });
+        source.addEventListener('research_started', event => {
+            const payload = JSON.parse(event.data);
+            loadingMessage.textContent = `Researching the ${payload.topic}...`;
+        });
+        source.addEventListener('scrape_started', event => {
+            const payload = JSON.parse(event.data);
+            loadingMessage.textContent = `Reading the ${payload.topic} website...`;
+        });
+        source.addEventListener('section_delta', event => {
+            // Append streamed text to the section's editor as it is written
+            const payload = JSON.parse(event.data);
+            const editor = sectionEditors[payload.section];
+            if (!editor) return;
+            showEditors();
+            editor.insertText(editor.getLength() - 1, payload.text);
+        });
+        source.addEventListener('section_drafted', event => {
+            sectionsDrafted += 1;
+            loadingMessage.textContent = `Drafted ${sectionsDrafted} of 9 sections...`;
+            // Replace the streamed text with the finished section
+            showSection(JSON.parse(event.data));
+        });
+        source.addEventListener('section_revised', event => {
+            const payload = JSON.parse(event.data);
+            loadingMessage.textContent = `Revised ${payload.section.replace(/_/g, ' ')} after review...`;
+            showSection(payload);
+        });
+        source.addEventListener('section_reviewed', () => {
+            sectionsReviewed += 1;
+            loadingMessage.textContent = `Reviewed ${sectionsReviewed} of 9 sections...`;
+        });
+        source.addEventListener('completed', event => {
+            source.close();
+            const payload = JSON.parse(event.data);
+            console.log('Grant generation completed, data:', payload.data);
+            showGrant(payload.data);
+        });
+        ['failed', 'cancelled'].forEach(eventName => {
+            source.addEventListener(eventName, event => {
+                source.close();
+                const payload = JSON.parse(event.data);
+                loadingMessage.textContent = payload.message || 'Grant generation failed. Please try again.';
+            });
+        });
+        source.onerror = () => {
+            // Fall back to a single status check if the stream cannot be opened or drops
+            source.close();
+            checkStatus();
+        };
+    }
+    
+    // Check the server for grant status once
     async function checkStatus() {
         console.log('Checking grant status...');
         try {
-            const response = await fetch('http://127.0.0.1:5000/api/get-grant-status');
+            const response = await fetch(`http://127.0.0.1:5000/api/get-grant-status?job_id=${encodeURIComponent(jobId)}`);
             const data = await response.json();
             console.log('Status response:', data);
             if (data.status === 'completed') {
-                console.log('Grant generation completed, data:', data.data);
-                loadingMessage.classList.add('d-none');
-                editorContainer.classList.remove('d-none');
-                loadGrantData(data.data);
+                showGrant(data.data);
+            } else if (['failed', 'cancelled', 'error'].includes(data.status)) {
+                loadingMessage.textContent = data.message || 'Grant generation failed. Please try again.';
             } else {
-                setTimeout(checkStatus, 5000);
+                // Still running: resubscribe to the progress stream
+                setTimeout(subscribeToProgress, 2000);
             }
         } catch (error) {
             console.error('Error checking status:', error);
@@ -75,43 +197,14 @@ document.addEventListener('DOMContentLoaded', function() {
         orgWebsite.textContent = orgInfo.website || 'N/A';
         orgWebsite.href = orgInfo.website || '#';
         
-        // Set editor contents with content formatting
-        // Insert HTML into Quill editor
-        const execHtml = formatContent(data.executive_summary || data['Executive Summary'] || '');
-        editors.executiveSummary.root.innerHTML = execHtml;
-        const probHtml = formatContent(data.problem_statement || data['Problem Statement'] || '');
-        editors.problemStatement.root.innerHTML = probHtml;
-        const projHtml = formatContent(data.project_description || data['Project Description'] || '');
-        editors.projectDescription.root.innerHTML = projHtml;
-        
-        // Goals & Objectives
-        const goalsData = data.goals_objectives || data['Goals and Objectives'] || '';
-        const goalsHtml = formatContent(goalsData);
-        editors.goalsObjectives.root.innerHTML = goalsHtml;
-        
-        const implHtml = formatContent(data.implementation_plan || data['Implementation Plan'] || '');
-        editors.implementation.root.innerHTML = implHtml;
-        const evalHtml = formatContent(data.evaluation || data['Evaluation and Impact'] || '');
-        editors.evaluation.root.innerHTML = evalHtml;
-        const sustHtml = formatContent(data.sustainability || data['Sustainability Plan'] || '');
-        editors.sustainability.root.innerHTML = sustHtml;
-        const conclHtml = formatContent(data.conclusion || data['Conclusion'] || '');
-        editors.conclusion.root.innerHTML = conclHtml;
+        // Fill each editor; the server returns the canonical GrantContent keys
+        Object.entries(sectionEditors).forEach(([section, editor]) => {
+            editor.root.innerHTML = formatContent(data[section] || '');
+        });
         
-        // Handle budget - support array or object
-        if (data.budget) {
-            if (Array.isArray(data.budget)) {
-                budgetItems = data.budget;
-            } else if (typeof data.budget === 'object') {
-                // convert object of {item: amount} to array
-                budgetItems = Object.entries(data.budget).map(([item, amount]) => ({
-                    item,
-                    description: '',
-                    amount: amount
-                }));
-            }
-            renderBudgetItems();
-        }
+        // The budget is always a list of items
+        budgetItems = data.budget || [];
+        renderBudgetItems();
     }
     
     // Function to render budget items in the table
@@ -154,6 +247,64 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Redraft a single section from the job's stored research
+    document.querySelectorAll('.regenerate-section').forEach(button => {
+        button.addEventListener('click', async function() {
+            const section = this.getAttribute('data-section');
+            const instructions = window.prompt('Optional instructions for the new draft:', '');
+            if (instructions === null) return;
+            const label = this.textContent;
+            this.disabled = true;
+            this.textContent = 'Regenerating...';
+            try {
+                const response = await fetch('http://127.0.0.1:5000/api/regenerate-section', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ job_id: jobId, section, instructions })
+                });
+                const data = await response.json();
+                if (!response.ok) throw new Error(data.message || 'Regeneration failed');
+                if (section === 'budget' && Array.isArray(data.content)) {
+                    budgetItems = data.content;
+                    renderBudgetItems();
+                } else if (sectionEditors[section]) {
+                    sectionEditors[section].root.innerHTML = formatContent(data.content);
+                }
+            } catch (error) {
+                console.error('Error regenerating section:', error);
+                alert('Error regenerating section. Please try again.');
+            } finally {
+                this.disabled = false;
+                this.textContent = label;
+            }
+        });
+    });
+    
+    // Revise only the sections named in the stored review findings
+    document.getElementById('apply-review').addEventListener('click', async function() {
+        const label = this.textContent;
+        this.disabled = true;
+        this.textContent = 'Revising...';
+        try {
+            const response = await fetch('http://127.0.0.1:5000/api/revise-grant', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ job_id: jobId })
+            });
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.message || 'Revision failed');
+            const sections = Object.keys(data.patches);
+            sections.forEach(section => showSection({ section, content: data.patches[section] }));
+            alert(sections.length ? `Revised ${sections.length} section(s).` : 'No sections needed revision.');
+        } catch (error) {
+            console.error('Error applying review suggestions:', error);
+            alert('Error applying review suggestions. Please try again.');
+        } finally {
+            this.disabled = false;
+            this.textContent = label;
+        }
+    });
+    
     // Handle add budget item
     addBudgetItemBtn.addEventListener('click', function() {
         // Clear form
@@ -242,6 +393,10 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
-    // Start checking status when page loads
-    checkStatus();
+    // Start listening for progress when page loads
+    if (jobId) {
+        subscribeToProgress();
+    } else {
+        loadingMessage.textContent = 'No grant generation job specified. Please start from the home page.';
+    }
 }); 
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Generation worker pool.
+
+Runs the grant generation jobs the API enqueues in data/jobs.db, in processes separate
+from the web server, so web and generation capacity scale independently. Each process
+runs several jobs concurrently and heartbeats them; jobs held by a process that crashes
+are requeued once their heartbeat goes stale, and exited processes are restarted.
+The Azure OpenAI quota is split evenly between the worker processes and the API process.
+
+    python worker.py --processes 2 --concurrency 4
+"""
+import os
+import time
+import signal
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / 'data'
+
+from backend.agents.registry import init_registry, close_registry
+from backend.utils.cassette import close_cassette
+from backend.utils.http_client import close_shared_clients
+from backend.utils.job_events import JobEventBus
+from backend.utils.job_store import JobStore
+from backend.utils.job_worker import JobWorker
+from backend.utils.metrics import REGISTRY
+
+# Load environment variables from .env in the app directory
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# Exit code of a worker that cannot run jobs until its configuration is fixed
+EXIT_NOT_CONFIGURED = 78
+
+
+async def serve_metrics(port: int):
+    """Serve this process's metrics in the Prometheus text format on every path of the port."""
+    async def handle(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = REGISTRY.render().encode("utf-8")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, "127.0.0.1", port)
+
+
+async def run_worker(concurrency: int, metrics_port: int = 0) -> int:
+    """
+    Run one worker process until it receives SIGINT or SIGTERM.
+
+    Args:
+        concurrency (int): Jobs run at once by this process
+        metrics_port (int): Port serving this process's metrics; 0 to disable
+
+    Returns:
+        int: Exit code
+    """
+    job_store = JobStore(DATA_DIR / 'jobs.db', ttl_seconds=int(os.getenv('JOB_TTL_SECONDS', '86400')))
+    try:
+        registry = await init_registry(warm_up=os.getenv('AZURE_OPENAI_WARMUP', 'true').lower() == 'true')
+    except ValueError as reg_e:
+        logger.error(f"Agent registry not initialized: {reg_e}")
+        job_store.close()
+        return EXIT_NOT_CONFIGURED
+    worker = JobWorker(job_store, JobEventBus(job_store), registry.orchestrator, concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            # Windows: Ctrl+C interrupts the loop instead
+            pass
+    metrics_server = await serve_metrics(metrics_port) if metrics_port else None
+    try:
+        await worker.run()
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        await close_registry()
+        await close_shared_clients()
+        close_cassette()
+        job_store.close()
+    return 0
+
+
+def worker_process(index: int, concurrency: int, metrics_port: int) -> None:
+    """Entry point of a pooled worker process."""
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'),
+                        format=f"%(asctime)s worker-{index} %(levelname)s %(name)s: %(message)s")
+    raise SystemExit(asyncio.run(run_worker(concurrency, metrics_port + index if metrics_port else 0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued grant generation jobs")
+    parser.add_argument("--processes", type=int, default=int(os.getenv('WORKER_PROCESSES', '2')),
+                        help="Worker processes")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv('WORKER_CONCURRENCY', '4')),
+                        help="Jobs run at once by each process")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv('WORKER_METRICS_PORT', '0')),
+                        help="First port serving per-process metrics; 0 to disable")
+    args = parser.parse_args()
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    # Split the deployment quota between the worker processes and the API process, unless configured;
+    # spawned processes inherit the environment
+    os.environ.setdefault('AZURE_OPENAI_QUOTA_SHARES', str(max(args.processes, 1) + 1))
+
+    if args.processes <= 1:
+        worker_process(0, args.concurrency, args.metrics_port)
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'),
+                        format="%(asctime)s pool %(levelname)s %(name)s: %(message)s")
+    # Spawned processes build their own kernel, clients and database connections
+    context = multiprocessing.get_context("spawn")
+    stopping = False
+
+    def start(index):
+        process = context.Process(target=worker_process, args=(index, args.concurrency, args.metrics_port),
+                                  name=f"worker-{index}")
+        process.start()
+        return process
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    processes = [start(index) for index in range(args.processes)]
+    logger.info(f"Started {args.processes} worker processes running {args.concurrency} jobs each")
+    while not stopping:
+        for index, process in enumerate(processes):
+            if process.exitcode == EXIT_NOT_CONFIGURED:
+                logger.error("Workers are not configured; stopping the pool")
+                stopping = True
+            elif not process.is_alive():
+                logger.warning(f"Worker {index} exited with code {process.exitcode}; restarting it")
+                processes[index] = start(index)
+        time.sleep(1.0)
+
+    # Workers requeue their unfinished jobs on SIGTERM
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(timeout=30)
+        if process.is_alive():
+            process.kill()
+
+
+if __name__ == '__main__':
+    main()